@@ -1,10 +1,16 @@
 """Versioned (v1) serializers of the hubuum models."""
+from django.conf import settings
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from rest_framework.fields import empty
+from rest_framework.permissions import SAFE_METHODS
 
+from hubuum.cache import identifier_cache
+from hubuum.filters import can_read
 from hubuum.models import (
     Host,
     HostType,
@@ -15,6 +21,7 @@ from hubuum.models import (
     PurchaseDocuments,
     PurchaseOrder,
     Room,
+    Tombstone,
     User,
     Vendor,
 )
@@ -62,8 +69,392 @@ class ErrorOnBadFieldMixin:  # pylint: disable=too-few-public-methods
         return super().run_validation(data)
 
 
+def sparse_fieldset(request, names):
+    """Return the names of the fields requested with ?fields= and ?exclude=.
+
+    Both parameters take a comma separated list of field names. Sparse fieldsets
+    only apply to safe methods, writes always see all the fields.
+
+    param: request (the request, or None)
+    param: names (the names of the available fields, in order)
+
+    returns: the requested names, in the order of names.
+
+    raises: ValidationError if unknown fields are requested.
+    """
+    selected = list(names)
+    if request is None or request.method not in SAFE_METHODS:
+        return selected
+
+    for param in ("fields", "exclude"):
+        value = request.query_params.get(param)
+        if not value:
+            continue
+
+        requested = {name.strip() for name in value.split(",") if name.strip()}
+        unknown = requested - set(names)
+        if unknown:
+            raise ValidationError(
+                code="unknown_field",
+                detail={param: f"Unknown fields: {', '.join(sorted(unknown))}."},
+            )
+
+        if param == "fields":
+            selected = [name for name in selected if name in requested]
+        else:
+            selected = [name for name in selected if name not in requested]
+
+    return selected
+
+
+def expansions(request):
+    """Return the related fields requested with ?expand= as a tree.
+
+    The parameter takes a comma separated list of dotted paths, ie
+    ?expand=room,purchase_order.vendor gives {"room": {}, "purchase_order":
+    {"vendor": {}}}. Expansions only apply to safe methods.
+    """
+    tree = {}
+    if request is None or request.method not in SAFE_METHODS:
+        return tree
+
+    for path in request.query_params.get("expand", "").split(","):
+        node = tree
+        for name in path.strip().split("."):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+def serializer_for_model(model):
+    """Return the serializer class of a model, or None."""
+    classes = list(HubuumSerializer.__subclasses__())
+    while classes:
+        cls = classes.pop()
+        if getattr(cls.Meta, "model", None) is model:
+            return cls
+        classes += cls.__subclasses__()
+    return None
+
+
+class ExpandedField(serializers.Field):
+    """A related field, rendered as the related object(s) rather than the id(s).
+
+    Related objects the user of the request can't read are rendered as their ids,
+    as if the field wasn't expanded.
+    """
+
+    def __init__(self, serializer, many=False, **kwargs):
+        """Wrap the serializer of the related model."""
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+        self.serializer = serializer
+        self.many = many
+
+    def bind(self, field_name, parent):
+        """Bind the field, and the serializer of the related model."""
+        super().bind(field_name, parent)
+        self.serializer.bind(field_name, self)
+
+    def to_representation(self, value):
+        """Render the related object(s) the user can read."""
+        if self.many:
+            return [self.represent(obj) for obj in value.all()]
+        return self.represent(value)
+
+    def represent(self, obj):
+        """Render a single related object, or its id if it can't be read."""
+        request = self.context.get("request")
+        if request is not None and not can_read(request, obj):
+            return obj.pk
+        return self.serializer.to_representation(obj)
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """A primary key related field that can look up its related objects in bulk.
+
+    After prefetch(), values are looked up among the prefetched objects rather
+    than with a query each, see HubuumListSerializer.
+    """
+
+    prefetched = None
+
+    def prefetch(self, values):
+        """Fetch the related objects for the given values, in one query."""
+        pk_field = self.get_queryset().model._meta.pk  # pylint: disable=W0212
+        pks = set()
+        for value in values:
+            if value is None or isinstance(value, bool):
+                continue
+            try:
+                pks.add(pk_field.to_python(value))
+            except DjangoValidationError:
+                continue
+        self.prefetched = self.get_queryset().in_bulk(pks)
+
+    def to_internal_value(self, data):
+        """Return the related object, from the prefetched objects if any."""
+        if self.prefetched is None or self.pk_field is not None:
+            return super().to_internal_value(data)
+
+        pk_field = self.get_queryset().model._meta.pk  # pylint: disable=W0212
+        try:
+            if isinstance(data, bool):
+                raise TypeError
+            obj = self.prefetched.get(pk_field.to_python(data))
+        except (DjangoValidationError, TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if obj is None:
+            self.fail("does_not_exist", pk_value=data)
+        return obj
+
+
+class HubuumListSerializer(serializers.ListSerializer):
+    """Validate and create lists of objects in bulk.
+
+    The related objects of all the items are fetched with one query per related
+    field before the items are validated, and the objects are inserted with
+    bulk_create (or updated with bulk_update, if the serializer is given a list
+    of instances matching the items), in batches of
+    settings.HUBUUM_BULK_BATCH_SIZE. As neither sends signals, the cached
+    identifiers of the model are dropped here.
+
+    Only models without many-to-many fields can be created in bulk.
+    """
+
+    def to_internal_value(self, data):
+        """Validate the items, with their related objects prefetched."""
+        related = [
+            field
+            for field in self.child.fields.values()
+            if isinstance(field, PrefetchedPrimaryKeyRelatedField)
+            and not field.read_only
+        ]
+        if isinstance(data, list):
+            for field in related:
+                field.prefetch(
+                    item.get(field.field_name)
+                    for item in data
+                    if isinstance(item, dict)
+                )
+        try:
+            return super().to_internal_value(data)
+        finally:
+            for field in related:
+                field.prefetched = None
+
+    def create(self, validated_data):
+        """Insert the objects in bulk."""
+        model = self.child.Meta.model
+        objects = model.objects.bulk_create(
+            [model(**attrs) for attrs in validated_data],
+            batch_size=getattr(settings, "HUBUUM_BULK_BATCH_SIZE", 500),
+        )
+        identifier_cache.invalidate(model)
+        return objects
+
+    def update(self, instance, validated_data):
+        """Update the objects in bulk, instance[i] with validated_data[i].
+
+        Only the fields given for any of the items are written, and updated_at is
+        set explicitly, as bulk_update doesn't apply auto_now.
+        """
+        model = self.child.Meta.model
+        now = timezone.now()
+        fields = {"updated_at"}
+        for obj, attrs in zip(instance, validated_data):
+            for attr, value in attrs.items():
+                setattr(obj, attr, value)
+            obj.updated_at = now
+            fields.update(attrs)
+        model.objects.bulk_update(
+            instance,
+            sorted(fields),
+            batch_size=getattr(settings, "HUBUUM_BULK_BATCH_SIZE", 500),
+        )
+        identifier_cache.invalidate(model)
+        return instance
+
+
+# The serializer fields that represent a single column of the model by its value.
+PLAIN_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.DateField,
+    serializers.DateTimeField,
+    serializers.DecimalField,
+    serializers.FloatField,
+    serializers.IntegerField,
+    serializers.JSONField,
+    serializers.ReadOnlyField,
+    serializers.TimeField,
+    serializers.UUIDField,
+)
+
+
+class ReadPlan:
+    """A precompiled plan for representing rows the way a serializer would.
+
+    The plan maps every field of the serializer to a column of the model, and to
+    the to_representation of the field (or None, if the column value is the
+    representation, as for primary key related fields). Rows are fetched with
+    values_list(named=True), so no model instances are built, and represented
+    without the per-field machinery of the serializer. The output is identical to
+    the output of the serializer.
+
+    Only serializers where every field is a plain column (see PLAIN_FIELDS) or a
+    primary key related field have a plan.
+    """
+
+    __slots__ = ("fields", "columns")
+
+    def __init__(self, fields):
+        """Create a plan from a list of (name, column, to_representation)."""
+        self.fields = fields
+        self.columns = [column for _, column, _ in fields]
+
+    @staticmethod
+    def compile_fields(serializer):
+        """Return the plan entries of the readable fields of a serializer, by name.
+
+        An entry is (field class, column, to_representation), or None if the
+        field can't be read from a column of its own.
+        """
+        meta = serializer.Meta.model._meta  # pylint: disable=protected-access
+        columns = {field.name: field for field in meta.concrete_fields}
+        entries = {}
+        for field in serializer._readable_fields:  # pylint: disable=protected-access
+            column = columns.get(field.source)
+            entries[field.field_name] = None
+            if column is None:
+                continue
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                if field.pk_field is None and column.target_field.primary_key:
+                    entries[field.field_name] = (type(field), column.attname, None)
+            elif isinstance(field, PLAIN_FIELDS) and not column.is_relation:
+                entries[field.field_name] = (
+                    type(field),
+                    column.attname,
+                    field.to_representation,
+                )
+        return entries
+
+    @classmethod
+    def select(cls, entries, fields):
+        """Return the plan for the given fields from compiled entries, or None.
+
+        param: entries (see compile_fields())
+        param: fields (the readable fields of a serializer, in order)
+        """
+        plan = []
+        for field in fields:
+            entry = entries.get(field.field_name)
+            if entry is None or entry[0] is not type(field):
+                return None
+            plan.append((field.field_name, entry[1], entry[2]))
+        return cls(plan)
+
+    def rows(self, queryset, *columns):
+        """Return the queryset as rows with the columns of the plan, and columns."""
+        return queryset.values_list(
+            *dict.fromkeys([*self.columns, *columns]), named=True
+        )
+
+    def to_representation(self, row):
+        """Represent a row."""
+        data = {}
+        for name, column, to_representation in self.fields:
+            value = getattr(row, column)
+            if value is not None and to_representation is not None:
+                value = to_representation(value)
+            data[name] = value
+        return data
+
+
+# ReadPlan entries, by serializer class, see HubuumSerializer.read_plan().
+READ_PLAN_FIELDS = {}
+
+
 class HubuumSerializer(ErrorOnBadFieldMixin, serializers.ModelSerializer):
-    """General Hubuum Serializer."""
+    """General Hubuum Serializer.
+
+    The fields of the top-level serializer of a request are:
+      - expanded as requested with ?expand=, see expansions(), and
+      - limited to the ones requested with ?fields= and ?exclude=, see
+        sparse_fieldset().
+
+    Serializers that set fast_reads are represented through a ReadPlan in lists,
+    unless disabled with settings.HUBUUM_FAST_READS, see read_plan(). Lists of
+    objects are created through HubuumListSerializer.
+    """
+
+    fast_reads = False
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+
+    def __init__(self, *args, expand=None, **kwargs):
+        """Create the serializer, with the given expansions if nested."""
+        super().__init__(*args, **kwargs)
+        self.expand = expand
+
+    def get_fields(self):
+        """Return the fields of the serializer, expanded and limited as requested."""
+        fields = super().get_fields()
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            return self.expand_fields(fields, self.expand or {})
+
+        request = self.context.get("request")
+        fields = self.expand_fields(fields, expansions(request))
+        selected = sparse_fieldset(request, list(fields))
+        return {name: fields[name] for name in selected}
+
+    def read_plan(self):
+        """Return the ReadPlan for the fields of the serializer, or None."""
+        if not self.fast_reads or not getattr(settings, "HUBUUM_FAST_READS", True):
+            return None
+
+        # The entries are compiled once per class, from a serializer without a
+        # request, so they hold nothing of the request they were compiled for and
+        # the cache doesn't grow with the fields clients ask for.
+        serializer_class = type(self)
+        if serializer_class not in READ_PLAN_FIELDS:
+            READ_PLAN_FIELDS[serializer_class] = ReadPlan.compile_fields(
+                serializer_class(context={})
+            )
+        return ReadPlan.select(
+            READ_PLAN_FIELDS[serializer_class],
+            self._readable_fields,  # pylint: disable=protected-access
+        )
+
+    def expand_fields(self, fields, tree):
+        """Replace the related fields named in the tree with ExpandedFields.
+
+        raises: ValidationError if a name isn't an expandable field.
+        """
+        meta = self.Meta.model._meta  # pylint: disable=protected-access
+        for name, subtree in tree.items():
+            field = fields.get(name)
+            many = isinstance(field, serializers.ManyRelatedField)
+            serializer = None
+            if many or isinstance(field, serializers.RelatedField):
+                related_model = meta.get_field(field.source or name).related_model
+                serializer = serializer_for_model(related_model)
+            if serializer is None:
+                raise ValidationError(
+                    code="invalid_expand",
+                    detail={"expand": f"'{name}' can not be expanded."},
+                )
+
+            # DRF rejects a source that is the same as the field name.
+            source = (
+                {"source": field.source} if field.source not in (None, name) else {}
+            )
+            fields[name] = ExpandedField(
+                serializer(expand=subtree), many=many, **source
+            )
+        return fields
 
 
 class UserSerializer(HubuumSerializer):
@@ -101,6 +492,8 @@ class GroupSerializer(HubuumSerializer):
 class HostSerializer(HubuumSerializer):
     """Serialize a Host object."""
 
+    fast_reads = True
+
     # serializers.HyperlinkedModelSerializer
     #    externals = serializers.SerializerMethodField()
     #    _mod_dns = serializers.PrimaryKeyRelatedField(many=True, queryset=Snippet.objects.all())
@@ -116,6 +509,8 @@ class HostSerializer(HubuumSerializer):
 class NamespaceSerializer(HubuumSerializer):
     """Serialize a Namespace object."""
 
+    fast_reads = True
+
     class Meta:
         """How to serialize the object."""
 
@@ -124,18 +519,29 @@ class NamespaceSerializer(HubuumSerializer):
 
 
 class PermissionSerializer(HubuumSerializer):
-    """Serialize a Permission object."""
+    """Serialize a Permission object.
+
+    The permission mask is exposed as the individual has_* flags.
+    """
+
+    has_create = serializers.BooleanField(required=False)
+    has_read = serializers.BooleanField(required=False)
+    has_update = serializers.BooleanField(required=False)
+    has_delete = serializers.BooleanField(required=False)
+    has_namespace = serializers.BooleanField(required=False)
 
     class Meta:
         """How to serialize the object."""
 
         model = Permission
-        fields = "__all__"
+        exclude = ("mask",)
 
 
 class HostTypeSerializer(HubuumSerializer):
     """Serialize a HostType object."""
 
+    fast_reads = True
+
     class Meta:
         """How to serialize the object."""
 
@@ -146,6 +552,8 @@ class HostTypeSerializer(HubuumSerializer):
 class JackSerializer(HubuumSerializer):
     """Serialize a Jack object."""
 
+    fast_reads = True
+
     class Meta:
         """How to serialize the object."""
 
@@ -156,6 +564,8 @@ class JackSerializer(HubuumSerializer):
 class PersonSerializer(HubuumSerializer):
     """Serialize a Person object."""
 
+    fast_reads = True
+
     class Meta:
         """How to serialize the object."""
 
@@ -166,6 +576,8 @@ class PersonSerializer(HubuumSerializer):
 class RoomSerializer(HubuumSerializer):
     """Serialize a Room object."""
 
+    fast_reads = True
+
     class Meta:
         """How to serialize the object."""
 
@@ -186,6 +598,8 @@ class PurchaseDocumentsSerializer(HubuumSerializer):
 class PurchaseOrderSerializer(HubuumSerializer):
     """Serialize a PurchaseOrder object."""
 
+    fast_reads = True
+
     class Meta:
         """How to serialize the object."""
 
@@ -196,8 +610,20 @@ class PurchaseOrderSerializer(HubuumSerializer):
 class VendorSerializer(HubuumSerializer):
     """Serialize a Vendor object."""
 
+    fast_reads = True
+
     class Meta:
         """How to serialize the object."""
 
         model = Vendor
         fields = "__all__"
+
+
+class TombstoneSerializer(HubuumSerializer):
+    """Serialize a Tombstone object."""
+
+    class Meta:
+        """How to serialize the object."""
+
+        model = Tombstone
+        fields = "__all__"
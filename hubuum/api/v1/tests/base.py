@@ -2,9 +2,11 @@
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
+from django.core.cache import cache
 from knox.models import AuthToken
 from rest_framework.test import APIClient, APITestCase
 
+from hubuum.cache import identifier_cache
 from hubuum.exceptions import MissingParam
 
 # from hubuum.models import Namespace
@@ -17,6 +19,9 @@ class HubuumAPITestCase(APITestCase):  # pylint: disable=too-many-public-methods
 
     def setUp(self):
         """By default setUp sets up an APIClient for the superuser with a token."""
+        # Object ids are reused between tests, cached data must not be.
+        cache.clear()
+        identifier_cache.clear()
         self.user = None
         self.namespace = None
 
@@ -163,10 +168,18 @@ class HubuumAPITestCase(APITestCase):  # pylint: disable=too-many-public-methods
         """Delete and assert status as 204."""
         return self.assert_delete_and_204(path, **kwargs)
 
+    def assert_delete_and_200(self, path, **kwargs):
+        """Delete and assert status as 200."""
+        return self._assert_delete_and_status(path, 200, **kwargs)
+
     def assert_delete_and_204(self, path, **kwargs):
         """Delete and assert status as 204."""
         return self._assert_delete_and_status(path, 204, **kwargs)
 
+    def assert_delete_and_400(self, path, **kwargs):
+        """Delete and assert status as 400."""
+        return self._assert_delete_and_status(path, 400, **kwargs)
+
     def assert_delete_and_401(self, path, **kwargs):
         """Delete and assert status as 401."""
         return self._assert_delete_and_status(path, 401, **kwargs)
@@ -217,6 +230,10 @@ class HubuumAPITestCase(APITestCase):  # pylint: disable=too-many-public-methods
         """Get and assert status as 404."""
         return self._assert_get_and_status(path, 404, **kwargs)
 
+    def assert_get_and_409(self, path, **kwargs):
+        """Get and assert status as 409."""
+        return self._assert_get_and_status(path, 409, **kwargs)
+
     def assert_patch(self, path, *args, **kwargs):
         """Patch and assert status as 200."""
         return self.assert_patch_and_200(path, *args, **kwargs)
@@ -1,9 +1,15 @@
 """Test internals."""
 
+import inspect
+
 import pytest
+from django.test import SimpleTestCase
 from rest_framework.test import APIClient
 
+from hubuum.api.v1 import views
 from hubuum.exceptions import MissingParam
+from hubuum.filters import indexed_lookups, is_indexed
+from hubuum.models import Host
 
 from .base import HubuumAPITestCase
 
@@ -31,3 +37,35 @@ class APITokenAuthenticationTestCase(HubuumAPITestCase):
         self.assertEqual(self._create_path("/api/v1/target"), target)
         self.assertEqual(self._create_path("/target"), target)
         self.assertEqual(self._create_path("target"), target)
+
+
+class APIIndexTestCase(SimpleTestCase):
+    """Test that the views look up, order, and filter by indexed fields."""
+
+    def test_lookup_and_order_fields_are_indexed(self):
+        """Test that every lookup_fields, order_by and filter_fields field is indexed."""
+        checked = 0
+        for _, view in inspect.getmembers(views, inspect.isclass):
+            queryset = getattr(view, "queryset", None)
+            if queryset is None:
+                continue
+
+            fields = list(getattr(view, "lookup_fields", ()))
+            fields += [name.lstrip("-") for name in queryset.query.order_by]
+            fields += list(getattr(view, "filter_fields", ()))
+            for name in fields:
+                with self.subTest(view=view.__name__, field=name):
+                    self.assertTrue(is_indexed(queryset.model, name))
+                    checked += 1
+
+        self.assertGreater(checked, 0)
+
+    def test_indexed_lookups(self):
+        """Test that lookups are only allowed where an index supports them."""
+        self.assertEqual(
+            indexed_lookups(Host, "fqdn"), ["exact", "in", "iexact", "startswith"]
+        )
+        self.assertEqual(indexed_lookups(Host, "serial"), ["exact", "in"])
+        self.assertIn("range", indexed_lookups(Host, "updated_at"))
+        self.assertEqual(indexed_lookups(Host, "registration_date"), [])
+        self.assertEqual(indexed_lookups(Host, "room"), ["exact", "in"])
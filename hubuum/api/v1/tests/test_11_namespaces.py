@@ -1,6 +1,9 @@
 """Test namespaces."""
+from django.test import override_settings
 from rest_framework.test import APIClient
 
+from hubuum.models import Namespace
+
 from .base import HubuumAPITestCase
 
 
@@ -59,6 +62,15 @@ class APINamespace(HubuumAPITestCase):
         self.assert_get_elements("/namespaces/", 0)
         self.assert_get_and_404("/namespaces/namespace_not_two")
 
+        # Renames that would give a descendant the name of an existing namespace.
+        for name in ["one", "one.a"]:
+            self.assert_post("/namespaces/", {"name": name})
+        Namespace.objects.create(name="two.a")
+        self.assert_patch_and_400("/namespaces/one", {"name": "two"})
+        self.assert_get("/namespaces/one.a")
+        self.assert_patch("/namespaces/one", {"name": "three"})
+        self.assert_get("/namespaces/three.a")
+
     def test_namespace_get_as_user(self):
         """Test get on namespaces as a normal user."""
         # This creates the user and the group in one go.
@@ -184,3 +196,40 @@ class APINamespace(HubuumAPITestCase):
             "/namespaces/", {"name": "yes.subnamespace", "group": grouptwo.data["id"]}
         )
         self.assert_get("/namespaces/yes.subnamespace")
+
+    def test_namespace_scoped_deep_as_user(self):
+        """Test creating namespaces more than one level deep as a normal user."""
+        userclient = self.get_user_client(username="tmp", groupname="tmpgroup")
+        self.client = self.get_superuser_client()
+        self.assert_post("/namespaces/", {"name": "yes"})
+        self.assert_post("/namespaces/", {"name": "yes.sub"})
+        self.assert_post_and_204(
+            "/namespaces/yes.sub/groups/tmpgroup", {"has_namespace": True}
+        )
+
+        # Permissions for the parent (yes.sub) are required, not the root.
+        self.client = userclient
+        self.assert_post_and_403("/namespaces/", {"name": "yes.sibling"})
+        self.assert_post("/namespaces/", {"name": "yes.sub.deeper"})
+        self.assert_post_and_404("/namespaces/", {"name": "yes.nope.deeper"})
+
+    def test_namespace_inherited_permissions(self):
+        """Test that inherited permissions apply to sub-namespaces."""
+        userclient = self.get_user_client(username="tmp", groupname="tmpgroup")
+        self.client = self.get_superuser_client()
+        self.assert_post("/namespaces/", {"name": "yes"})
+        self.assert_post("/namespaces/", {"name": "yes.sub"})
+        self.assert_post("/namespaces/", {"name": "no"})
+        self.assert_post_and_204(
+            "/namespaces/yes/groups/tmpgroup", {"has_read": True, "inherit": True}
+        )
+
+        self.client = userclient
+        self.assert_get_elements("/namespaces/", 2)
+        self.assert_get("/namespaces/yes.sub")
+        self.assert_get_and_403("/namespaces/no")
+
+
+@override_settings(HUBUUM_FILTER_MAX_NAMESPACE_IDS=0)
+class APINamespaceExists(APINamespace):
+    """Test namespaces, with lists filtered by EXISTS rather than namespace ids."""
@@ -1,4 +1,5 @@
 """Test host object creation."""
+from django.test import override_settings
 from rest_framework.test import APIClient
 
 from .base import HubuumAPITestCase
@@ -101,3 +102,30 @@ class APIHost(HubuumAPITestCase):
         self.assert_patch("/hosts/yes", {"serial": 1})
         self.client = self.get_superuser_client()
         self.assert_delete("/namespaces/namespace1")
+
+    def test_host_lookup(self):
+        """Test looking up hosts by id, name, and fqdn, in order of precedence."""
+        self._create_namespace("namespace1")
+        self._create_host("one")
+        host = self.assert_get("/hosts/one").data
+        self.assert_patch("/hosts/one", {"fqdn": "one.example.com"})
+        self.assertEqual(self.assert_get(f"/hosts/{host['id']}").data["name"], "one")
+        self.assertEqual(
+            self.assert_get("/hosts/one.example.com").data["id"], host["id"]
+        )
+        self.assert_get_and_404("/hosts/99999999999999999999")
+
+        # A name that is also the id of another host resolves to that host.
+        self._create_host(str(host["id"]))
+        self.assertEqual(self.assert_get(f"/hosts/{host['id']}").data["name"], "one")
+
+        # Ambiguous names are reported rather than resolved to an arbitrary host.
+        self._create_host("one")
+        self.assert_get_and_409("/hosts/one")
+        self.assert_get("/hosts/one.example.com")
+        self.assert_delete("/namespaces/namespace1")
+
+
+@override_settings(HUBUUM_FILTER_MAX_NAMESPACE_IDS=0)
+class APIHostExists(APIHost):
+    """Test hosts, with lists filtered by EXISTS rather than namespace ids."""
@@ -0,0 +1,85 @@
+"""Test the batch permission check endpoint."""
+from .base import HubuumAPITestCase
+
+
+class APIPermissionCheck(HubuumAPITestCase):
+    """Test batch permission checks."""
+
+    def setUp(self):
+        """Create two namespaces with a host each."""
+        super().setUp()
+        for namespace in ["one", "two"]:
+            nsblob = self.assert_post("/namespaces/", {"name": namespace})
+            self.assert_post(
+                "/hosts/", {"name": f"host{namespace}", "namespace": nsblob.data["id"]}
+            )
+
+    def _check(self, checks, client=None):
+        """Post a batch of checks and return the results."""
+        return self.assert_post_and_200("/permissions/check/", checks, client=client)
+
+    def test_check_as_user(self):
+        """Test permission checks as a normal user."""
+        self.client = self.get_user_client(username="tmp", groupname="tmpgroup")
+        self.grant("tmpgroup", "one", ["has_read", "has_update"])
+        self.grant("tmpgroup", "two", ["has_read", "has_create", "has_namespace"])
+        response = self._check(
+            [
+                {"model": "host", "object": "hostone", "operation": "read"},
+                {"model": "host", "object": "hostone", "operation": "update"},
+                {"model": "host", "object": "hostone", "operation": "delete"},
+                {"model": "host", "object": "hosttwo", "operation": "update"},
+                {"model": "host", "namespace": "one", "operation": "create"},
+                {"model": "host", "namespace": "two", "operation": "create"},
+                {"model": "namespace", "object": "one", "operation": "update"},
+                {"model": "namespace", "object": "two", "operation": "delete"},
+                {"model": "namespace", "namespace": "two", "operation": "create"},
+                {"model": "host", "object": "nosuchhost", "operation": "read"},
+                {"model": "host", "namespace": "nosuchnamespace", "operation": "read"},
+                {"model": "user", "object": "tmp", "operation": "read"},
+                {"model": "user", "object": "tmp", "operation": "delete"},
+            ]
+        )
+        self.assertEqual(
+            response.data,
+            [True, True, False, False, False, True]
+            + [False, True, True, None, None, True, False],
+        )
+
+    def test_check_moved_permission(self):
+        """Test that moving a permission to another group is seen by both groups."""
+        read = [{"model": "host", "object": "hostone", "operation": "read"}]
+        user = self.get_user_client(username="tmp", groupname="tmpgroup")
+        other = self.get_user_client(username="tmp2", groupname="tmpgroup2")
+        self.grant("tmpgroup", "one", ["has_read"])
+        self.assertEqual(self._check(read, client=user).data, [True])
+        self.assertEqual(self._check(read, client=other).data, [False])
+
+        group = self.assert_get("/groups/tmpgroup2").data["id"]
+        permission = self.assert_get("/permissions/").data[0]["id"]
+        self.assert_patch(f"/permissions/{permission}", {"group": group})
+        self.assertEqual(self._check(read, client=user).data, [False])
+        self.assertEqual(self._check(read, client=other).data, [True])
+
+    def test_check_as_superuser(self):
+        """Test that superusers can do everything with objects that exist."""
+        response = self._check(
+            [
+                {"model": "host", "object": "hostone", "operation": "delete"},
+                {"model": "namespace", "object": "two", "operation": "update"},
+                {"model": "host", "object": "nosuchhost", "operation": "read"},
+            ]
+        )
+        self.assertEqual(response.data, [True, True, None])
+
+    def test_check_validation(self):
+        """Test that malformed checks are rejected."""
+        self.assert_post_and_400("/permissions/check/", {"model": "host"})
+        for check in [
+            "host",
+            {"model": "nosuchmodel", "object": 1, "operation": "read"},
+            {"model": "host", "object": 1, "operation": "nosuchoperation"},
+            {"model": "host", "operation": "read"},
+            {"model": "host", "object": 1, "namespace": 1, "operation": "read"},
+        ]:
+            self.assert_post_and_400("/permissions/check/", [check])
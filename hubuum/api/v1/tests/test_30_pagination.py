@@ -0,0 +1,133 @@
+"""Test cursor pagination of lists."""
+from unittest import mock
+from urllib.parse import urlsplit
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from hubuum.models import Host, Namespace, Vendor
+
+from .base import HubuumAPITestCase
+
+
+class APIPagination(HubuumAPITestCase):
+    """Test paginating lists by cursor."""
+
+    def setUp(self):
+        """Create a namespace with hosts and vendors."""
+        super().setUp()
+        self.namespace = Namespace.objects.create(name="namespace1")
+        for i in range(7):
+            Host.objects.create(name=f"host{i}", namespace=self.namespace)
+        for name in ["c", "a", "b", "a", "c"]:
+            Vendor.objects.create(
+                vendor_name=name,
+                vendor_url="https://example.com",
+                contact_email="vendor@example.com",
+                namespace=self.namespace,
+            )
+
+    @staticmethod
+    def _path(link):
+        """Return the path and query of a link."""
+        parts = urlsplit(link)
+        return f"{parts.path}?{parts.query}"
+
+    def _walk(self, path):
+        """Follow the next links from path, returning the pages."""
+        pages = []
+        while path:
+            page = self.assert_get(path).data
+            pages.append(page)
+            path = self._path(page["next"]) if page["next"] else None
+        return pages
+
+    def test_unpaginated(self):
+        """Test that lists are not paginated unless the client asks for it."""
+        self.assert_get_elements("/hosts/", 7)
+
+    def test_paginate_forward_and_back(self):
+        """Test following next and previous links."""
+        pages = self._walk("/hosts/?page_size=3")
+        self.assertEqual([len(page["results"]) for page in pages], [3, 3, 1])
+        ids = [host["id"] for page in pages for host in page["results"]]
+        self.assertEqual(
+            ids, list(Host.objects.order_by("id").values_list("id", flat=True))
+        )
+        self.assertIsNone(pages[0]["previous"])
+
+        previous = self.assert_get(self._path(pages[2]["previous"])).data
+        self.assertEqual(previous["results"], pages[1]["results"])
+        previous = self.assert_get(self._path(previous["previous"])).data
+        self.assertEqual(previous["results"], pages[0]["results"])
+        self.assertIsNone(previous["previous"])
+        self.assertEqual(
+            self.assert_get(self._path(previous["next"])).data["results"],
+            pages[1]["results"],
+        )
+
+    def test_ties_and_inserts(self):
+        """Test that pages are stable with ties in the ordering and new objects."""
+        first = self.assert_get("/vendors/?page_size=2").data
+        Vendor.objects.create(
+            vendor_name="a",
+            vendor_url="https://example.com",
+            contact_email="vendor@example.com",
+            namespace=self.namespace,
+        )
+        pages = [first] + self._walk(self._path(first["next"]))
+        vendors = [vendor for page in pages for vendor in page["results"]]
+        ids = [vendor["id"] for vendor in vendors]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(
+            [vendor["vendor_name"] for vendor in vendors],
+            ["a", "a", "a", "b", "c", "c"],
+        )
+
+    def test_page_cost(self):
+        """Test that deep pages cost the same number of queries as the first."""
+        first = self.assert_get("/hosts/?page_size=1").data
+        with CaptureQueriesContext(connection) as shallow:
+            self.assert_get("/hosts/?page_size=1")
+        last = self._walk(self._path(first["next"]))[-1]
+        with CaptureQueriesContext(connection) as deep:
+            self.assert_get(self._path(last["previous"]))
+        self.assertEqual(len(shallow), len(deep))
+        self.assertNotIn("OFFSET", deep[-1]["sql"])
+
+    def test_invalid_cursor(self):
+        """Test that invalid cursors are rejected."""
+        self.assert_get_and_404("/hosts/?cursor=nope")
+        self.assert_get_and_404("/hosts/?cursor=eyJwIjpbXX0=")
+        self.assertEqual(len(self.assert_get("/hosts/?page_size=0").data["results"]), 1)
+
+    def test_count(self):
+        """Test that pages are only counted on request."""
+        page = self.assert_get("/hosts/?page_size=2").data
+        self.assertNotIn("count", page)
+        with CaptureQueriesContext(connection) as queries:
+            page = self.assert_get("/hosts/?page_size=2&count=none")
+        self.assertNotIn("count", page.data)
+        self.assertNotIn("ETag", page)
+        self.assertFalse(any("COUNT" in query["sql"] for query in queries))
+
+        page = self.assert_get("/hosts/?count=exact").data
+        self.assertEqual((page["count"], len(page["results"])), (7, 7))
+        page = self.assert_get("/hosts/?page_size=2&count=exact&name=host1").data
+        self.assertEqual(page["count"], 1)
+        self.assertEqual(self.assert_get("/hosts/?count=estimate").data["count"], 7)
+        self._assert_get_and_status("/hosts/?count=maybe", 400)
+
+        self.client = self.get_user_client(username="tmp", groupname="tmpgroup")
+        self.assertEqual(self.assert_get("/hosts/?count=exact").data["count"], 0)
+
+    @override_settings(HUBUUM_EXACT_COUNT_THRESHOLD=5)
+    def test_count_estimate(self):
+        """Test that the planner estimate is used for large lists on PostgreSQL."""
+        explain = '[{"Plan": {"Plan Rows": 5000}}]'
+        with mock.patch.object(connection, "vendor", "postgresql"), mock.patch(
+            "django.db.models.query.QuerySet.explain", return_value=explain
+        ):
+            page = self.assert_get("/hosts/?page_size=1&count=estimate").data
+        self.assertEqual(page["count"], 5000)
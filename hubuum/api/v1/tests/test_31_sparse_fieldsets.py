@@ -0,0 +1,68 @@
+"""Test sparse fieldsets (?fields= and ?exclude=)."""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from hubuum.models import Host, Namespace, PurchaseDocuments, PurchaseOrder
+
+from .base import HubuumAPITestCase
+
+
+class APISparseFieldsets(HubuumAPITestCase):
+    """Test limiting the fields of responses."""
+
+    def setUp(self):
+        """Create a namespace with a host and a purchase document."""
+        super().setUp()
+        self.namespace = Namespace.objects.create(name="namespace1")
+        self.host = Host.objects.create(
+            name="one", fqdn="one.example.com", namespace=self.namespace
+        )
+        order = PurchaseOrder.objects.create(po_number="1", namespace=self.namespace)
+        PurchaseDocuments.objects.create(
+            document_id="doc",
+            purchase_order=order,
+            document=b"blob" * 1024,
+            namespace=self.namespace,
+        )
+
+    def test_fields(self):
+        """Test selecting fields on lists and details."""
+        hosts = self.assert_get("/hosts/?fields=id,name").data
+        self.assertEqual(
+            [dict(host) for host in hosts], [{"id": self.host.id, "name": "one"}]
+        )
+        host = self.assert_get("/hosts/one?fields=fqdn,name").data
+        self.assertEqual(dict(host), {"name": "one", "fqdn": "one.example.com"})
+
+        host = self.assert_get("/hosts/one?exclude=fqdn,serial").data
+        self.assertNotIn("fqdn", host)
+        self.assertNotIn("serial", host)
+        self.assertIn("namespace", host)
+
+        host = self.assert_get("/hosts/one?fields=name,fqdn&exclude=fqdn").data
+        self.assertEqual(dict(host), {"name": "one"})
+
+    def test_unknown_fields(self):
+        """Test that unknown fields are rejected."""
+        self._assert_get_and_status("/hosts/?fields=id,nosuchfield", 400)
+        self._assert_get_and_status("/hosts/one?exclude=nosuchfield", 400)
+
+    def test_deferred_columns(self):
+        """Test that the columns of dropped fields are not fetched."""
+        with CaptureQueriesContext(connection) as queries:
+            documents = self.assert_get("/purchasedocuments/?exclude=document").data
+        self.assertNotIn("document", documents[0])
+        self.assertNotIn('."document"', queries[-1]["sql"])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assert_get("/hosts/one?fields=name")
+        self.assertNotIn('."serial"', queries[-1]["sql"])
+        # Deferred fields are not loaded afterwards, one by one.
+        hosts = [query for query in queries if "hubuum_host" in query["sql"]]
+        self.assertEqual(len(hosts), 1)
+
+    def test_writes_see_all_fields(self):
+        """Test that sparse fieldsets don't apply to writes."""
+        host = self.assert_patch("/hosts/one?fields=name", {"serial": "1"}).data
+        self.assertEqual(host["serial"], "1")
+        self.assertIn("fqdn", host)
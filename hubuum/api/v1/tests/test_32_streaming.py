@@ -0,0 +1,68 @@
+"""Test streaming lists as newline delimited JSON."""
+import json
+
+from django.test import override_settings
+
+from hubuum.models import Host, Namespace
+
+from .base import HubuumAPITestCase
+
+
+class APIStreaming(HubuumAPITestCase):
+    """Test streaming lists."""
+
+    def setUp(self):
+        """Create two namespaces with hosts."""
+        super().setUp()
+        for name in ["namespace1", "namespace2"]:
+            namespace = Namespace.objects.create(name=name)
+            for i in range(3):
+                Host.objects.create(name=f"{name}-host{i}", namespace=namespace)
+
+    def _stream(self, path, **extra):
+        """Get a streamed list, returning the decoded lines."""
+        response = self.client.get(
+            self._create_path(path), HTTP_ACCEPT="application/x-ndjson", **extra
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        content = b"".join(response.streaming_content).decode("utf-8")
+        self.assertTrue(content == "" or content.endswith("\n"))
+        return [json.loads(line) for line in content.splitlines()]
+
+    @override_settings(HUBUUM_STREAM_CHUNK_SIZE=2)
+    def test_stream(self):
+        """Test that the streamed list matches the regular list."""
+        streamed = self._stream("/hosts/")
+        self.assertEqual(streamed, json.loads(self.assert_get("/hosts/").content))
+        self.assertEqual(len(streamed), 6)
+
+    def test_stream_format_and_fields(self):
+        """Test streaming with ?format=ndjson, and with sparse fieldsets."""
+        response = self.client.get(self._create_path("/hosts/?format=ndjson"))
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            self._stream("/hosts/?fields=name")[0], {"name": "namespace1-host0"}
+        )
+
+    def test_stream_permissions(self):
+        """Test that streamed lists are filtered by permissions."""
+        self.client = self.get_user_client(username="tmp", groupname="tmpgroup")
+        self.assertEqual(self._stream("/hosts/"), [])
+        self.grant("tmpgroup", "namespace2", ["has_read"])
+        self.assertEqual(
+            [host["name"] for host in self._stream("/hosts/")],
+            [f"namespace2-host{i}" for i in range(3)],
+        )
+
+    def test_stream_pagination(self):
+        """Test that streamed lists can't be paginated."""
+        for query in ("page_size=2", "cursor=x", "count=exact"):
+            response = self.client.get(
+                self._create_path(f"/hosts/?{query}"),
+                HTTP_ACCEPT="application/x-ndjson",
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(b"paginated", response.content)
+        self.assertEqual(len(self.assert_get("/hosts/?page_size=2").data["results"]), 2)
@@ -0,0 +1,93 @@
+"""Test filtering lists on the fields of objects."""
+from datetime import timedelta
+from urllib.parse import quote
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from hubuum.api.v1.views import HostList
+from hubuum.filters import HubuumFieldFilter
+from hubuum.models import Host, Namespace, Room
+
+from .base import HubuumAPITestCase
+
+
+class APIFieldFilters(HubuumAPITestCase):
+    """Test filtering lists."""
+
+    def setUp(self):
+        """Create two namespaces with hosts."""
+        super().setUp()
+        self.namespaces = [
+            Namespace.objects.create(name=name) for name in ["namespace1", "namespace2"]
+        ]
+        self.room = Room.objects.create(room_id="1", namespace=self.namespaces[0])
+        for i, namespace in enumerate(self.namespaces):
+            Host.objects.create(
+                name=f"web{i}",
+                fqdn=f"web{i}.Example.com",
+                room=self.room if i == 0 else None,
+                namespace=namespace,
+            )
+            Host.objects.create(name=f"db{i}", namespace=namespace)
+
+    def _names(self, path):
+        """Get a list, returning the names of the objects."""
+        return sorted(obj["name"] for obj in self.assert_get(path).data)
+
+    def test_filters(self):
+        """Test the whitelisted lookups."""
+        self.assertEqual(self._names("/hosts/?name=web0"), ["web0"])
+        self.assertEqual(self._names("/hosts/?name__in=web0,db1"), ["db1", "web0"])
+        self.assertEqual(self._names("/hosts/?name__startswith=web"), ["web0", "web1"])
+        self.assertEqual(self._names("/hosts/?fqdn__iexact=WEB1.example.COM"), ["web1"])
+        self.assertEqual(self._names(f"/hosts/?room={self.room.id}"), ["web0"])
+        self.assertEqual(
+            self._names(f"/hosts/?namespace={self.namespaces[1].id}&name!=db1"),
+            ["web1"],
+        )
+        self.assertEqual(
+            self._names("/namespaces/?name__startswith=namespace"),
+            [
+                "namespace1",
+                "namespace2",
+            ],
+        )
+
+        now = timezone.now()
+        since = quote((now - timedelta(hours=1)).isoformat())
+        until = quote((now + timedelta(hours=1)).isoformat())
+        self.assertEqual(len(self._names(f"/hosts/?updated_at__gte={since}")), 4)
+        self.assertEqual(
+            len(self._names(f"/hosts/?updated_at__range={since},{until}")), 4
+        )
+        self.assertEqual(self._names(f"/hosts/?updated_at__gt={until}"), [])
+
+    def test_rejected_filters(self):
+        """Test that unindexed fields, lookups, and invalid values are rejected."""
+        self._assert_get_and_status("/hosts/?registration_date__gte=2020-01-01", 400)
+        self._assert_get_and_status("/hosts/?name__contains=eb", 400)
+        self._assert_get_and_status("/hosts/?name__iexact=WEB0", 400)
+        self._assert_get_and_status("/hosts/?room=nope", 400)
+        self._assert_get_and_status("/hosts/?updated_at__gte=yesterday", 400)
+        self._assert_get_and_status("/users/?password=x", 400)
+
+    def test_filters_and_permissions(self):
+        """Test that filters are combined with the permission filtering."""
+        self.client = self.get_user_client(username="tmp", groupname="tmpgroup")
+        self.grant("tmpgroup", "namespace2", ["has_read"])
+        self.assertEqual(self._names("/hosts/?name__startswith=web"), ["web1"])
+        self.assertEqual(self._names(f"/hosts/?room={self.room.id}"), [])
+
+    def test_unindexed_filter_fields(self):
+        """Test that views can't declare filters on unindexed fields."""
+
+        class BadHostList(HostList):
+            """A host list filtering on an unindexed field."""
+
+            filter_fields = ("registration_date",)
+
+        request = APIRequestFactory().get("/hosts/")
+        with self.assertRaises(ImproperlyConfigured):
+            HubuumFieldFilter().get_filterset(BadHostList(request=request), Host)
@@ -0,0 +1,89 @@
+"""Test expanding related objects with ?expand=."""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from hubuum.models import Host, Namespace, Person, PurchaseOrder, Room, Vendor
+
+from .base import HubuumAPITestCase
+
+
+class APIExpand(HubuumAPITestCase):
+    """Test expanding related objects."""
+
+    def setUp(self):
+        """Create hosts with related objects in two namespaces."""
+        super().setUp()
+        self.namespace1 = Namespace.objects.create(name="namespace1")
+        self.namespace2 = Namespace.objects.create(name="namespace2")
+        self.room = Room.objects.create(
+            room_id="1", building="A", floor="1", namespace=self.namespace2
+        )
+        self.person = Person.objects.create(username="bob", namespace=self.namespace1)
+        vendor = Vendor.objects.create(
+            vendor_name="acme",
+            vendor_url="https://example.com",
+            contact_email="acme@example.com",
+            namespace=self.namespace1,
+        )
+        self.order = PurchaseOrder.objects.create(
+            po_number="1", vendor=vendor, namespace=self.namespace1
+        )
+
+    def _create_hosts(self, count):
+        """Create hosts with all the related objects set."""
+        for i in range(count):
+            Host.objects.create(
+                name=f"host{Host.objects.count()}-{i}",
+                room=self.room,
+                person=self.person,
+                purchase_order=self.order,
+                namespace=self.namespace1,
+            )
+
+    def test_expand(self):
+        """Test expanding foreign keys, nested foreign keys, and many-to-many."""
+        self._create_hosts(1)
+        host = self.assert_get(
+            "/hosts/?expand=room,person,purchase_order.vendor,namespace"
+        ).data[0]
+        self.assertEqual(host["room"]["room_id"], "1")
+        self.assertEqual(host["person"]["username"], "bob")
+        self.assertEqual(host["purchase_order"]["vendor"]["vendor_name"], "acme")
+        self.assertEqual(host["namespace"]["name"], "namespace1")
+        self.assertIsNone(host["jack"])
+
+        host = self.assert_get(f"/hosts/{host['id']}?expand=purchase_order").data
+        self.assertEqual(host["purchase_order"]["vendor"], self.order.vendor_id)
+
+        user = self.assert_get("/users/?expand=groups").data[0]
+        self.assertEqual(user["groups"], [])
+
+    def test_constant_queries(self):
+        """Test that the number of queries does not grow with the number of hosts."""
+        path = "/hosts/?expand=room,person,purchase_order.vendor"
+        self._create_hosts(2)
+        with CaptureQueriesContext(connection) as few:
+            self.assert_get(path)
+        self._create_hosts(10)
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(len(self.assert_get(path).data), 12)
+        self.assertEqual(len(few), len(many))
+
+    def test_expand_permissions(self):
+        """Test that related objects the user can't read are not expanded."""
+        self._create_hosts(1)
+        self.client = self.get_user_client(username="tmp", groupname="tmpgroup")
+        self.grant("tmpgroup", "namespace1", ["has_read"])
+        host = self.assert_get("/hosts/?expand=room,person").data[0]
+        self.assertEqual(host["room"], self.room.id)
+        self.assertEqual(host["person"]["username"], "bob")
+
+    def test_invalid_expand(self):
+        """Test that only related fields can be expanded."""
+        self._create_hosts(1)
+        self._assert_get_and_status("/hosts/?expand=name", 400)
+        self._assert_get_and_status("/hosts/?expand=nosuchfield", 400)
+        self._assert_get_and_status("/hosts/?expand=room.nosuchfield", 400)
+        # Expanded fields that are not selected are simply not expanded.
+        host = self.assert_get("/hosts/?expand=room&fields=name").data[0]
+        self.assertEqual(list(host), ["name"])
@@ -0,0 +1,83 @@
+"""Test conditional GETs with ETag and Last-Modified."""
+from django.test import override_settings
+from django.utils.http import http_date
+
+from hubuum.models import Host, Namespace
+
+from .base import HubuumAPITestCase
+
+
+class APIConditional(HubuumAPITestCase):
+    """Test validators and 304 responses."""
+
+    def setUp(self):
+        """Create two namespaces with a host each."""
+        super().setUp()
+        for name in ["namespace1", "namespace2"]:
+            namespace = Namespace.objects.create(name=name)
+            Host.objects.create(name=f"{name}-host", namespace=namespace)
+
+    def _get(self, path, status, **headers):
+        """Get a path with extra headers, asserting the status code."""
+        response = self.client.get(self._create_path(path), **headers)
+        self.assertEqual(response.status_code, status)
+        return response
+
+    def test_detail(self):
+        """Test that details are not sent again until they change."""
+        response = self._get("/hosts/namespace1-host", 200)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+
+        response = self._get("/hosts/namespace1-host", 304, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.content, b"")
+        self._get(
+            "/hosts/namespace1-host",
+            304,
+            HTTP_IF_MODIFIED_SINCE=http_date(),
+        )
+        # The representation differs with the query string.
+        self._get("/hosts/namespace1-host?fields=name", 200, HTTP_IF_NONE_MATCH=etag)
+
+        self.assert_patch("/hosts/namespace1-host", {"serial": "1"})
+        response = self._get("/hosts/namespace1-host", 200, HTTP_IF_NONE_MATCH=etag)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["serial"], "1")
+
+    def test_list(self):
+        """Test that the ETag of a list changes with the objects in it."""
+        etag = self._get("/hosts/", 200)["ETag"]
+        response = self._get("/hosts/", 304, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response["ETag"], etag)
+        self.assertNotIn("Last-Modified", self._get("/hosts/", 200))
+
+        host = Host.objects.create(
+            name="new", namespace=Namespace.objects.get(name="namespace1")
+        )
+        created = self._get("/hosts/", 200, HTTP_IF_NONE_MATCH=etag)["ETag"]
+        self.assertNotEqual(created, etag)
+        host.delete()
+        # Back to the original list, so back to the original ETag.
+        self._get("/hosts/", 304, HTTP_IF_NONE_MATCH=etag)
+
+        streamed = self._get("/hosts/", 200, HTTP_ACCEPT="application/x-ndjson")
+        self.assertTrue(streamed.streaming)
+        self.assertNotEqual(streamed["ETag"], etag)
+
+    def test_list_permissions(self):
+        """Test that the ETag of a list changes with what the user can read."""
+        self.client = self.get_user_client(username="tmp", groupname="tmpgroup")
+        self.grant("tmpgroup", "namespace1", ["has_read"])
+        etag = self._get("/hosts/", 200)["ETag"]
+        self._get("/hosts/", 304, HTTP_IF_NONE_MATCH=etag)
+
+        self.grant("tmpgroup", "namespace2", ["has_read"])
+        response = self._get("/hosts/", 200, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(response.data), 2)
+
+    def test_no_validators(self):
+        """Test that expanded representations and disabled lists get no ETag."""
+        self.assertNotIn("ETag", self._get("/hosts/?expand=namespace", 200))
+        self.assertNotIn("ETag", self._get("/hosts/namespace1-host?expand=room", 200))
+        with override_settings(HUBUUM_LIST_ETAGS=False):
+            self.assertNotIn("ETag", self._get("/hosts/", 200))
@@ -0,0 +1,129 @@
+"""Test the change feeds and tombstones."""
+from urllib.parse import quote, urlsplit
+
+from django.db import connection
+from django.db.models.deletion import Collector
+from django.test.utils import CaptureQueriesContext
+
+from hubuum.models import (
+    EffectivePermission,
+    Host,
+    Namespace,
+    Tombstone,
+    TombstoneReader,
+)
+
+from .base import HubuumAPITestCase
+
+
+class APIChanges(HubuumAPITestCase):
+    """Test syncing through the change feeds."""
+
+    def setUp(self):
+        """Create two namespaces with hosts."""
+        super().setUp()
+        for name in ["namespace1", "namespace2"]:
+            namespace = Namespace.objects.create(name=name)
+            for i in range(3):
+                Host.objects.create(name=f"{name}-host{i}", namespace=namespace)
+
+    def _feed(self, path):
+        """Follow a feed from path to the end, returning the objects."""
+        objects = []
+        while path:
+            page = self.assert_get(path).data
+            objects += page["results"]
+            path = None
+            if page["next"]:
+                parts = urlsplit(page["next"])
+                path = f"{parts.path}?{parts.query}"
+        return objects
+
+    @staticmethod
+    def _since(obj, field="updated_at"):
+        """Return the ?since= for the objects changed after obj."""
+        return quote(obj[field])
+
+    def test_changes(self):
+        """Test that the feed lists only the objects changed since the last poll."""
+        hosts = self._feed("/hosts/changes/?page_size=2")
+        self.assertEqual(len(hosts), 6)
+        self.assertEqual(
+            self._feed(f"/hosts/changes/?since={self._since(hosts[-1])}"), []
+        )
+
+        host = Host.objects.get(name="namespace1-host0")
+        host.serial = "1"
+        host.save()
+        changes = self._feed(f"/hosts/changes/?since={self._since(hosts[-1])}")
+        self.assertEqual([change["name"] for change in changes], ["namespace1-host0"])
+
+        # Filters and sparse fieldsets apply to the feed.
+        self.assertEqual(len(self._feed("/hosts/changes/?name=namespace2-host1")), 1)
+        self.assertEqual(
+            self._feed("/hosts/changes/?fields=name&name=namespace2-host1"),
+            [{"name": "namespace2-host1"}],
+        )
+        self._assert_get_and_status("/hosts/changes/?since=yesterday", 400)
+
+    def test_tombstones(self):
+        """Test that deletes, including cascades, leave tombstones."""
+        self.assertEqual(self._feed("/tombstones/"), [])
+        host = Host.objects.get(name="namespace1-host0")
+        host_id = host.id
+        self.assert_delete("/hosts/namespace1-host0")
+        tombstones = self._feed("/tombstones/")
+        self.assertEqual(
+            [(t["model"], t["object_id"]) for t in tombstones], [("host", host_id)]
+        )
+
+        namespace = Namespace.objects.get(name="namespace2")
+        self.assert_delete("/namespaces/namespace2")
+        since = self._since(tombstones[-1], "deleted_at")
+        tombstones = self._feed(f"/tombstones/?since={since}")
+        self.assertEqual(
+            sorted(t["model"] for t in tombstones), ["host"] * 3 + ["namespace"]
+        )
+        self.assertEqual({t["namespace"] for t in tombstones}, {namespace.id})
+        self.assertEqual(len(self._feed(f"/tombstones/?since={since}&model=host")), 3)
+
+    def test_tombstone_queries(self):
+        """Test that the tombstones of a cascade are recorded with one INSERT."""
+        namespace = Namespace.objects.get(name="namespace1")
+        for i in range(3, 20):
+            Host.objects.create(name=f"namespace1-host{i}", namespace=namespace)
+        with CaptureQueriesContext(connection) as queries:
+            self.assert_delete("/namespaces/namespace1")
+        inserts = [q for q in queries if 'INTO "hubuum_tombstone"' in q["sql"]]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Tombstone.objects.filter(namespace=namespace.id).count(), 21)
+
+        # Models without tombstones are deleted without fetching their rows.
+        collector = Collector(using="default")
+        for model in (EffectivePermission, TombstoneReader):
+            self.assertTrue(collector.can_fast_delete(model.objects.all()))
+
+    def test_permissions(self):
+        """Test that the feeds only list what the user can read."""
+        namespace = Namespace.objects.get(name="namespace2")
+        Host.objects.get(name="namespace1-host0").delete()
+        self.client = self.get_user_client(username="tmp", groupname="tmpgroup")
+        self.grant("tmpgroup", "namespace2", ["has_read"])
+
+        changes = self._feed("/hosts/changes/")
+        self.assertEqual({change["namespace"] for change in changes}, {namespace.id})
+        self.assertEqual(self._feed("/tombstones/"), [])
+
+        # The readers of a deleted namespace still see its tombstones.
+        namespace.delete()
+        self.assertEqual(len(self._feed("/tombstones/")), 4)
+        self.assertEqual(Tombstone.objects.count(), 5)
+        self.assertEqual(
+            list(TombstoneReader.objects.values_list("user__username", flat=True)),
+            ["tmp"],
+        )
+        # The readers are checked in the query of the page.
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(self.assert_get("/tombstones/").data["results"]), 4)
+        tombstones = [q for q in queries if "hubuum_tombstone" in q["sql"]]
+        self.assertEqual(len(tombstones), 1)
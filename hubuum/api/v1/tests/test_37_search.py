@@ -0,0 +1,75 @@
+"""Test full-text search."""
+from hubuum.models import Host, Namespace, Person, Room, Vendor
+
+from .base import HubuumAPITestCase
+
+
+class APISearch(HubuumAPITestCase):
+    """Test searching across models."""
+
+    def setUp(self):
+        """Create searchable objects in two namespaces."""
+        super().setUp()
+        self.namespace1 = Namespace.objects.create(name="namespace1")
+        self.namespace2 = Namespace.objects.create(name="namespace2")
+        Host.objects.create(name="laptop1", serial="XQ-4471", namespace=self.namespace1)
+        Host.objects.create(
+            name="server1", fqdn="laptop-builder.example.com", namespace=self.namespace1
+        )
+        Host.objects.create(name="laptop2", namespace=self.namespace2)
+        Room.objects.create(
+            room_id="3.14", building="Laptop lab", namespace=self.namespace1
+        )
+        Person.objects.create(
+            username="bob", department="Physics", namespace=self.namespace1
+        )
+        Vendor.objects.create(
+            vendor_name="Acme",
+            vendor_url="https://example.com",
+            contact_email="acme@example.com",
+            namespace=self.namespace2,
+        )
+
+    def test_search(self):
+        """Test that matches are found across models, best first."""
+        results = self.assert_get("/search/?q=laptop").data
+        self.assertEqual(
+            [result["model"] for result in results], ["host", "host", "host", "room"]
+        )
+        # Names match with a higher weight than buildings.
+        ranks = [result["rank"] for result in results]
+        self.assertGreater(min(ranks[:3]), ranks[3])
+        self.assertEqual(
+            [result["object"].get("name") for result in results[:3]],
+            ["laptop1", "server1", "laptop2"],
+        )
+
+        results = self.assert_get("/search/?q=4471").data
+        self.assertEqual(results[0]["object"]["name"], "laptop1")
+        results = self.assert_get("/search/?q=laptop%203.14").data
+        self.assertEqual([result["model"] for result in results], ["room"])
+        results = self.assert_get("/search/?q=phys").data
+        self.assertEqual(results[0]["object"]["username"], "bob")
+
+        # Terms match the start of words, not any part of them.
+        self.assertEqual(self.assert_get("/search/?q=aptop").data, [])
+        self.assertEqual(self.assert_get("/search/?q=ysics").data, [])
+
+    def test_search_options(self):
+        """Test limiting the models and the number of results."""
+        results = self.assert_get("/search/?q=laptop&models=room").data
+        self.assertEqual([result["model"] for result in results], ["room"])
+        self.assertEqual(len(self.assert_get("/search/?q=laptop&limit=2").data), 2)
+
+        self._assert_get_and_status("/search/", 400)
+        self._assert_get_and_status("/search/?q=%20", 400)
+        self._assert_get_and_status("/search/?q=laptop&models=namespace", 400)
+        self._assert_get_and_status("/search/?q=laptop&limit=many", 400)
+
+    def test_search_permissions(self):
+        """Test that only readable objects are found."""
+        self.client = self.get_user_client(username="tmp", groupname="tmpgroup")
+        self.assertEqual(self.assert_get("/search/?q=laptop").data, [])
+        self.grant("tmpgroup", "namespace2", ["has_read"])
+        results = self.assert_get("/search/?q=laptop").data
+        self.assertEqual([result["object"]["name"] for result in results], ["laptop2"])
@@ -0,0 +1,119 @@
+"""Test the fast read path of lists against the serializers."""
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from hubuum.api.v1.serializers import (
+    READ_PLAN_FIELDS,
+    HostSerializer,
+    PermissionSerializer,
+)
+from hubuum.models import (
+    Host,
+    HostType,
+    Jack,
+    Namespace,
+    Person,
+    PurchaseOrder,
+    Room,
+    Vendor,
+)
+
+from .base import HubuumAPITestCase
+
+
+class APIFastReads(HubuumAPITestCase):
+    """Test that the fast read path is a drop-in for the serializers."""
+
+    def setUp(self):
+        """Create objects with and without related objects."""
+        super().setUp()
+        namespace = Namespace.objects.create(name="namespace1", description="ns")
+        room = Room.objects.create(
+            room_id="3.14", building="A", floor="1", namespace=namespace
+        )
+        vendor = Vendor.objects.create(
+            vendor_name="acme",
+            vendor_url="https://example.com",
+            contact_email="acme@example.com",
+            namespace=namespace,
+        )
+        Host.objects.create(
+            name="full",
+            fqdn="full.example.com",
+            serial="XQ-1",
+            type=HostType.objects.create(name="laptop", namespace=namespace),
+            room=room,
+            jack=Jack.objects.create(name="j1", room=room, namespace=namespace),
+            purchase_order=PurchaseOrder.objects.create(
+                po_number="1", vendor=vendor, namespace=namespace
+            ),
+            person=Person.objects.create(
+                username="bob", section=3, room=room, namespace=namespace
+            ),
+            namespace=namespace,
+        )
+        Host.objects.create(name="empty", namespace=namespace)
+
+    def _get(self, path, **headers):
+        """Get a path, returning the content as bytes."""
+        response = self.client.get(self._create_path(path), **headers)
+        self.assertEqual(response.status_code, 200)
+        if response.streaming:
+            return b"".join(response.streaming_content)
+        return response.content
+
+    def test_identical_output(self):
+        """Test that the fast path output is byte-identical to the serializers."""
+        paths = [
+            "/hosts/",
+            "/hosts/?fields=name,room,updated_at",
+            "/hosts/?exclude=fqdn&name=full",
+            "/hosts/?page_size=1",
+            "/hosttypes/",
+            "/jacks/",
+            "/namespaces/",
+            "/persons/",
+            "/pos/",
+            "/rooms/",
+            "/vendors/?page_size=1&count=exact",
+        ]
+        for path in paths:
+            with self.subTest(path=path):
+                fast = self._get(path)
+                with override_settings(HUBUUM_FAST_READS=False):
+                    slow = self._get(path)
+                self.assertEqual(fast, slow)
+
+        ndjson = {"HTTP_ACCEPT": "application/x-ndjson"}
+        fast = self._get("/hosts/", **ndjson)
+        with override_settings(HUBUUM_FAST_READS=False):
+            self.assertEqual(fast, self._get("/hosts/", **ndjson))
+
+    def test_columns(self):
+        """Test that only the columns of the selected fields are fetched."""
+        with CaptureQueriesContext(connection) as queries:
+            self._get("/hosts/?fields=name")
+        # The list, and the aggregate of the ETag.
+        hosts = [query["sql"] for query in queries if "hubuum_host" in query["sql"]]
+        self.assertEqual(len(hosts), 2)
+        # Lookup fields are not deferred in the serializer path, see
+        # SparseFieldsetMixin.
+        self.assertNotIn('"fqdn"', hosts[-1])
+
+    def test_plans(self):
+        """Test which serializers have plans."""
+        self.assertIsNotNone(HostSerializer().read_plan())
+        self.assertIsNone(PermissionSerializer().read_plan())
+        with override_settings(HUBUUM_FAST_READS=False):
+            self.assertIsNone(HostSerializer().read_plan())
+        # The plans are compiled once per serializer, without the request.
+        for fields in ("name", "name,serial", "serial,name", "id"):
+            self._get(f"/hosts/?fields={fields}")
+        self.assertTrue(all(isinstance(key, type) for key in READ_PLAN_FIELDS))
+        for entry in READ_PLAN_FIELDS[HostSerializer].values():
+            if entry is not None and entry[2] is not None:
+                self.assertEqual(entry[2].__self__.parent.context, {})
+
+        # Expanded related objects are not plain columns.
+        self.assertEqual(self._get("/hosts/?expand=room&fields=room,name")[:2], b"[{")
@@ -0,0 +1,77 @@
+"""Test the JSON and MessagePack renderers and parsers."""
+import json
+from decimal import Decimal
+
+import msgpack
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from hubuum.models import Host, Namespace
+from hubuum.renderers import MessagePackRenderer, ORJSONRenderer
+
+from .base import HubuumAPITestCase
+
+
+class APIRenderers(HubuumAPITestCase):
+    """Test content negotiation and the encodings."""
+
+    def setUp(self):
+        """Create a namespace with hosts."""
+        super().setUp()
+        self.namespace = Namespace.objects.create(name="namespace1")
+        for i in range(3):
+            Host.objects.create(name=f"høst{i}", namespace=self.namespace)
+
+    def test_json_compatibility(self):
+        """Test that JSON is rendered exactly like the DRF JSONRenderer does."""
+        data = {
+            "text": "blåbær ",
+            "lazy": gettext_lazy("lazy"),
+            "decimal": Decimal("1.10"),
+            "when": timezone.now(),
+            "nested": [None, True, 1.5, {"a": []}],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            ORJSONRenderer().render(data, "application/json; indent=2"),
+            JSONRenderer().render(data, "application/json; indent=2"),
+        )
+
+        response = self.client.get(self._create_path("/hosts/"))
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_msgpack(self):
+        """Test reading and writing MessagePack."""
+        response = self.client.get(
+            self._create_path("/hosts/"), HTTP_ACCEPT="application/msgpack"
+        )
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        hosts = msgpack.unpackb(response.content)
+        self.assertEqual(hosts, json.loads(self.assert_get("/hosts/").content))
+
+        response = self.client.get(self._create_path("/hosts/høst1?format=msgpack"))
+        self.assertEqual(msgpack.unpackb(response.content)["name"], "høst1")
+
+        response = self.client.post(
+            self._create_path("/hosts/"),
+            MessagePackRenderer().render(
+                {"name": "new", "namespace": self.namespace.id}
+            ),
+            content_type="application/msgpack",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Host.objects.get(name="new").namespace, self.namespace)
+
+    def test_parse_errors(self):
+        """Test that malformed bodies are rejected."""
+        for body, content_type in [
+            (b"{nope", "application/json"),
+            (b"\xc1", "application/msgpack"),
+        ]:
+            with self.subTest(content_type=content_type):
+                response = self.client.post(
+                    self._create_path("/hosts/"), body, content_type=content_type
+                )
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,102 @@
+"""Test response compression."""
+import gzip
+import json
+from unittest import skipUnless
+
+from django.test import override_settings
+
+from hubuum import middleware
+from hubuum.models import Host, Namespace
+
+from .base import HubuumAPITestCase
+
+
+class APICompression(HubuumAPITestCase):
+    """Test negotiating and compressing responses."""
+
+    def setUp(self):
+        """Create a namespace with enough hosts to compress."""
+        super().setUp()
+        namespace = Namespace.objects.create(name="namespace1")
+        for i in range(50):
+            Host.objects.create(name=f"host{i}", namespace=namespace)
+        self.hosts = json.loads(self.assert_get("/hosts/").content)
+
+    def _get(self, path, encoding, **headers):
+        """Get a path accepting the encoding, returning the response and body."""
+        response = self.client.get(
+            self._create_path(path), HTTP_ACCEPT_ENCODING=encoding, **headers
+        )
+        self.assertEqual(response.status_code, 200)
+        if response.streaming:
+            return response, b"".join(response.streaming_content)
+        return response, response.content
+
+    @override_settings(HUBUUM_COMPRESSION_ENCODINGS=["gzip"])
+    def test_gzip(self):
+        """Test gzip, and the headers of compressed responses."""
+        response, body = self._get("/hosts/", "gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        self.assertEqual(int(response["Content-Length"]), len(body))
+        self.assertEqual(json.loads(gzip.decompress(body)), self.hosts)
+
+        response, body = self._get("/hosts/", "identity")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(json.loads(body), self.hosts)
+
+    def test_threshold(self):
+        """Test that small responses are not compressed."""
+        response, _ = self._get("/hosts/host1", "gzip")
+        self.assertNotIn("Content-Encoding", response)
+        with override_settings(HUBUUM_COMPRESSION_MIN_SIZE=10):
+            response, _ = self._get("/hosts/host1", "gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+    def _stream(self, encoding):
+        """Get the hosts as NDJSON, returning the chunks of the stream."""
+        response = self.client.get(
+            self._create_path("/hosts/"),
+            HTTP_ACCEPT_ENCODING=encoding,
+            HTTP_ACCEPT="application/x-ndjson",
+        )
+        self.assertTrue(response.streaming)
+        self.assertNotIn("Content-Length", response)
+        return list(response.streaming_content)
+
+    @override_settings(HUBUUM_STREAM_CHUNK_SIZE=10)
+    def test_streaming(self):
+        """Test that streamed responses are compressed as well as one-shot ones."""
+        raw = b"".join(self._stream("identity"))
+        compressor = middleware.GzipCompressor(middleware.DEFAULT_LEVELS["gzip"])
+        oneshot = compressor.compress(raw) + compressor.finish()
+
+        with override_settings(HUBUUM_COMPRESSION_LEVELS={}):
+            chunks = self._stream("gzip")
+        self.assertLessEqual(len(b"".join(chunks)), len(oneshot) * 1.05)
+        lines = gzip.decompress(b"".join(chunks)).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.hosts)
+
+        # Flushing every object costs most of the compression.
+        with override_settings(HUBUUM_COMPRESSION_FLUSH_SIZE=1):
+            chunks = self._stream("gzip")
+        self.assertEqual(len(chunks), 51)
+        self.assertGreater(len(b"".join(chunks)), len(oneshot) * 1.5)
+        self.assertEqual(gzip.decompress(b"".join(chunks)), raw)
+
+    @skipUnless(middleware.brotli and middleware.zstandard, "brotli and zstandard")
+    def test_preferred_encodings(self):
+        """Test choosing between the encodings."""
+        response, body = self._get("/hosts/", "gzip, br, zstd")
+        self.assertEqual(response["Content-Encoding"], "zstd")
+        decompressor = middleware.zstandard.ZstdDecompressor().decompressobj()
+        self.assertEqual(json.loads(decompressor.decompress(body)), self.hosts)
+
+        response, body = self._get("/hosts/", "gzip, br, zstd;q=0")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(json.loads(middleware.brotli.decompress(body)), self.hosts)
+
+        with override_settings(HUBUUM_COMPRESSION_ENCODINGS=["gzip", "zstd"]):
+            response, _ = self._get("/hosts/", "*")
+        self.assertEqual(response["Content-Encoding"], "gzip")
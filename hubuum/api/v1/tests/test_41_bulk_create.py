@@ -0,0 +1,95 @@
+"""Test creating objects in bulk."""
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from hubuum.models import Host, Namespace, Room
+
+from .base import HubuumAPITestCase
+
+
+class APIBulkCreate(HubuumAPITestCase):
+    """Test POSTing lists of objects to list views."""
+
+    def setUp(self):
+        """Create namespaces and a room."""
+        super().setUp()
+        self.namespace1 = Namespace.objects.create(name="namespace1")
+        self.namespace2 = Namespace.objects.create(name="namespace2")
+        self.room = Room.objects.create(room_id="1", namespace=self.namespace1)
+
+    def _hosts(self, count, prefix="host", **attrs):
+        """Return a list of hosts to create."""
+        return [
+            {"name": f"{prefix}{i}", "namespace": self.namespace1.id, **attrs}
+            for i in range(count)
+        ]
+
+    def test_bulk_create(self):
+        """Test creating a list of hosts with related objects."""
+        response = self.assert_post("/hosts/", self._hosts(3, room=self.room.id))
+        self.assertEqual(
+            [host["name"] for host in response.data], ["host0", "host1", "host2"]
+        )
+        self.assertTrue(all(host["id"] for host in response.data))
+        self.assertEqual(Host.objects.filter(room=self.room).count(), 3)
+
+        # Single objects are still created as before.
+        response = self.assert_post(
+            "/hosts/", {"name": "single", "namespace": self.namespace1.id}
+        )
+        self.assertEqual(response.data["name"], "single")
+
+    def test_queries(self):
+        """Test that the number of queries does not grow with the items."""
+        counts = []
+        for prefix, count in (("a", 2), ("b", 20)):
+            with CaptureQueriesContext(connection) as queries:
+                self.assert_post(
+                    "/hosts/", self._hosts(count, prefix, room=self.room.id)
+                )
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+        with override_settings(HUBUUM_BULK_BATCH_SIZE=5):
+            self.assert_post("/hosts/", self._hosts(12, "c"))
+        self.assertEqual(Host.objects.filter(name__startswith="c").count(), 12)
+
+    def test_errors(self):
+        """Test that invalid items are reported per item, and nothing is created."""
+        hosts = self._hosts(3)
+        hosts[1]["room"] = 4711
+        hosts[2]["name"] = ""
+        response = self.assert_post_and_400("/hosts/", hosts)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("room", response.data[1])
+        self.assertIn("name", response.data[2])
+        self.assertFalse(Host.objects.exists())
+
+        self.assert_post_and_400("/hosts/", self._hosts(2) + [["not", "an", "object"]])
+        self.assert_post_and_400("/hosts/", [])
+        with override_settings(HUBUUM_BULK_MAX_ITEMS=2):
+            self.assert_post_and_400("/hosts/", self._hosts(3))
+        self.assert_post_and_400("/users/", [{"username": "bulk"}])
+        response = self.assert_post_and_400("/namespaces/", [{"name": "bulk"}])
+        self.assertEqual(
+            response.data["detail"], "namespaces can't be created in bulk."
+        )
+        self.assertFalse(Namespace.objects.filter(name="bulk").exists())
+        self.assertFalse(Host.objects.exists())
+
+    def test_permissions(self):
+        """Test that every namespace of the list must allow creating objects."""
+        self.client = self.get_user_client(username="tmp", groupname="tmpgroup")
+        self.grant("tmpgroup", "namespace1", ["has_create"])
+        hosts = self._hosts(2)
+        self.assert_post("/hosts/", hosts)
+
+        hosts = self._hosts(2, "other")
+        hosts[1]["namespace"] = self.namespace2.id
+        self.assert_post_and_403("/hosts/", hosts)
+        self.assertFalse(Host.objects.filter(name__startswith="other").exists())
+
+        self.grant("tmpgroup", "namespace2", ["has_create"])
+        self.assert_post("/hosts/", hosts)
@@ -0,0 +1,141 @@
+"""Test updating objects in bulk."""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from hubuum.models import Host, Namespace, Room
+
+from .base import HubuumAPITestCase
+
+
+class APIBulkUpdate(HubuumAPITestCase):
+    """Test PATCHing list views."""
+
+    def setUp(self):
+        """Create namespaces with rooms and hosts."""
+        super().setUp()
+        self.namespace1 = Namespace.objects.create(name="namespace1")
+        self.namespace2 = Namespace.objects.create(name="namespace2")
+        self.room1 = Room.objects.create(room_id="1", namespace=self.namespace1)
+        self.room2 = Room.objects.create(room_id="2", namespace=self.namespace1)
+        for i in range(4):
+            Host.objects.create(
+                name=f"one{i}", room=self.room1, namespace=self.namespace1
+            )
+            Host.objects.create(name=f"two{i}", namespace=self.namespace2)
+
+    def test_filtered_update(self):
+        """Test updating the objects matching a filter."""
+        before = Host.objects.get(name="one0").updated_at
+        response = self.assert_patch(
+            f"/hosts/?room={self.room1.id}", {"room": self.room2.id, "serial": "S"}
+        )
+        self.assertEqual(response.data, {"updated": 4, "namespaces": {"namespace1": 4}})
+        self.assertEqual(Host.objects.filter(room=self.room2, serial="S").count(), 4)
+        self.assertGreater(Host.objects.get(name="one0").updated_at, before)
+        self.assertNotEqual(Host.objects.get(name="two0").serial, "S")
+
+        ids = ",".join(
+            str(pk)
+            for pk in Host.objects.filter(name__in=["one1", "two1"]).values_list(
+                "pk", flat=True
+            )
+        )
+        response = self.assert_patch(f"/hosts/?id__in={ids}", {"fqdn": "x.example.com"})
+        self.assertEqual(
+            response.data,
+            {"updated": 2, "namespaces": {"namespace1": 1, "namespace2": 1}},
+        )
+        self.assertEqual(Host.objects.filter(fqdn="x.example.com").count(), 2)
+
+    def test_filtered_update_errors(self):
+        """Test that invalid bulk updates are rejected."""
+        self.assert_patch_and_400("/hosts/", {"serial": "S"})
+        self.assert_patch_and_400("/hosts/?name=one0", {})
+        self.assert_patch_and_400("/hosts/?name=one0", {"room": 4711})
+        self.assert_patch_and_400("/hosts/?nope=1", {"serial": "S"})
+        self.assert_patch_and_400("/namespaces/?name=namespace1", {"description": "x"})
+        self.assertFalse(Host.objects.filter(serial="S").exists())
+
+    def test_item_update(self):
+        """Test updating a list of objects, each with their own values."""
+        hosts = list(Host.objects.filter(namespace=self.namespace1).order_by("id"))
+        items = [{"id": host.id, "serial": f"S{i}"} for i, host in enumerate(hosts)]
+        items[0]["room"] = self.room2.id
+        response = self.assert_patch("/hosts/", items)
+        self.assertEqual(response.data, {"updated": 4, "namespaces": {"namespace1": 4}})
+        for i, host in enumerate(hosts):
+            host.refresh_from_db()
+            self.assertEqual(host.serial, f"S{i}")
+        self.assertEqual(hosts[0].room, self.room2)
+        self.assertEqual(hosts[1].room, self.room1)
+
+        # Unknown ids and invalid values are reported per item.
+        response = self.assert_patch_and_400(
+            "/hosts/", [{"id": hosts[0].id, "serial": "T"}, {"id": 4711, "serial": "T"}]
+        )
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(list(response.data[1]), ["id"])
+        response = self.assert_patch_and_400(
+            "/hosts/",
+            [{"id": hosts[0].id, "serial": "T"}, {"id": hosts[1].id, "room": 4711}],
+        )
+        self.assertEqual(response.data[0], {})
+        self.assertIn("room", response.data[1])
+        response = self.assert_patch_and_400(
+            "/hosts/",
+            [
+                {"id": hosts[0].id, "serial": "T"},
+                {"id": hosts[1].id, "serial": "T"},
+                {"id": hosts[0].id, "serial": "U"},
+            ],
+        )
+        self.assertEqual(response.data[:2], [{}, {}])
+        self.assertEqual(list(response.data[2]), ["id"])
+        self.assert_patch_and_400("/hosts/", [{"serial": "T"}])
+        self.assertFalse(Host.objects.filter(serial="T").exists())
+
+    def test_queries(self):
+        """Test that the number of queries does not grow with the objects."""
+        counts = []
+        for name in ("one", "two"):
+            hosts = Host.objects.filter(name__startswith=name)
+            with CaptureQueriesContext(connection) as queries:
+                self.assert_patch(
+                    f"/hosts/?name__in={','.join(h.name for h in hosts)}",
+                    {"serial": "S"},
+                )
+            counts.append(len(queries))
+
+        items = [{"id": host.id, "room": self.room2.id} for host in Host.objects.all()]
+        with CaptureQueriesContext(connection) as queries:
+            self.assert_patch("/hosts/", items[:2])
+        counts.append(len(queries))
+        with CaptureQueriesContext(connection) as queries:
+            self.assert_patch("/hosts/", items)
+        counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(counts[2], counts[3])
+
+    def test_permissions(self):
+        """Test that every affected namespace must allow updates."""
+        self.client = self.get_user_client(username="tmp", groupname="tmpgroup")
+        self.grant("tmpgroup", "namespace1", ["has_read", "has_update"])
+        self.grant("tmpgroup", "namespace2", ["has_read"])
+        self.assert_patch("/hosts/?name__startswith=one", {"serial": "S"})
+        self.assert_patch_and_403("/hosts/?name__startswith=t", {"serial": "T"})
+        self.assert_patch_and_403("/hosts/?id__gte=0", {"serial": "T"})
+
+        two = Host.objects.get(name="two0")
+        self.assert_patch_and_403("/hosts/", [{"id": two.id, "serial": "T"}])
+        self.assertFalse(Host.objects.filter(serial="T").exists())
+
+        # Moving objects needs has_create in the new namespace.
+        namespace3 = Namespace.objects.create(name="namespace3")
+        move = {"namespace": namespace3.id}
+        self.assert_patch_and_403("/hosts/?name=one0", move)
+        self.assert_patch_and_403(
+            "/hosts/", [{"id": Host.objects.get(name="one1").id, **move}]
+        )
+        self.grant("tmpgroup", "namespace3", ["has_create"])
+        self.assert_patch("/hosts/?name=one0", move)
+        self.assertEqual(Host.objects.get(name="one0").namespace, namespace3)
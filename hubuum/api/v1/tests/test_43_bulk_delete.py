@@ -0,0 +1,92 @@
+"""Test deleting objects in bulk."""
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from hubuum.models import Host, Namespace, Person, Tombstone
+
+from .base import HubuumAPITestCase
+
+
+class APIBulkDelete(HubuumAPITestCase):
+    """Test DELETEing list views."""
+
+    def setUp(self):
+        """Create namespaces with hosts and persons."""
+        super().setUp()
+        self.namespace1 = Namespace.objects.create(name="namespace1")
+        self.namespace2 = Namespace.objects.create(name="namespace2")
+        for i in range(5):
+            Host.objects.create(name=f"one{i}", namespace=self.namespace1)
+            Host.objects.create(name=f"two{i}", namespace=self.namespace2)
+        Person.objects.create(username="bob", namespace=self.namespace1)
+
+    def test_bulk_delete(self):
+        """Test deleting the objects matching a filter, with tombstones."""
+        response = self.assert_delete_and_200("/hosts/?name__in=one0,one1,two0")
+        self.assertEqual(
+            response.data,
+            {"deleted": 3, "namespaces": {"namespace1": 2, "namespace2": 1}},
+        )
+        self.assertEqual(Host.objects.count(), 7)
+        self.assertEqual(
+            sorted(Tombstone.objects.values_list("model", "namespace")),
+            sorted(
+                [
+                    ("host", self.namespace1.id),
+                    ("host", self.namespace1.id),
+                    ("host", self.namespace2.id),
+                ]
+            ),
+        )
+
+        bob = Person.objects.get(username="bob")
+        response = self.assert_delete_and_200(f"/persons/?id__in={bob.id}")
+        self.assertEqual(response.data["deleted"], 1)
+        self.assertFalse(Person.objects.exists())
+
+        response = self.assert_delete_and_200("/hosts/?name=nope")
+        self.assertEqual(response.data, {"deleted": 0, "namespaces": {}})
+
+    def test_errors(self):
+        """Test that unfiltered and non-namespaced deletes are rejected."""
+        self.assert_delete_and_400("/hosts/")
+        self.assert_delete_and_400("/hosts/?nope=1")
+        self.assert_delete_and_400("/namespaces/?name=namespace1")
+        self.assertEqual(Host.objects.count(), 10)
+        self.assertEqual(Namespace.objects.count(), 2)
+
+    @override_settings(HUBUUM_BULK_BATCH_SIZE=2)
+    def test_batches(self):
+        """Test that the objects are deleted in batches, each with a constant cost."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.assert_delete_and_200(
+                f"/hosts/?namespace={self.namespace1.id}"
+            )
+        self.assertEqual(response.data["deleted"], 5)
+        self.assertFalse(Host.objects.filter(namespace=self.namespace1).exists())
+        deletes = [q["sql"] for q in queries if q["sql"].startswith("DELETE")]
+        self.assertEqual(len(deletes), 3)
+        tombstones = [
+            q["sql"] for q in queries if 'INTO "hubuum_tombstone"' in q["sql"]
+        ]
+        self.assertEqual(len(tombstones), 3)
+
+    def test_permissions(self):
+        """Test that every affected namespace must allow deletes."""
+        self.client = self.get_user_client(username="tmp", groupname="tmpgroup")
+        self.grant("tmpgroup", "namespace1", ["has_read", "has_delete"])
+        self.grant("tmpgroup", "namespace2", ["has_read"])
+
+        self.assert_delete_and_403("/hosts/?name__in=one0,two0")
+        self.assertEqual(Host.objects.count(), 10)
+
+        response = self.assert_delete_and_200("/hosts/?name__in=one0,one1")
+        self.assertEqual(response.data, {"deleted": 2, "namespaces": {"namespace1": 2}})
+
+        # Objects the user can't read are not selected at all.
+        self.client = self.get_user_client(username="tmp2", groupname="tmpgroup2")
+        self.grant("tmpgroup2", "namespace1", ["has_read", "has_delete"])
+        response = self.assert_delete_and_200("/hosts/?name__in=one2,two1")
+        self.assertEqual(response.data, {"deleted": 1, "namespaces": {"namespace1": 1}})
+        self.assertTrue(Host.objects.filter(name="two1").exists())
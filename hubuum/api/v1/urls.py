@@ -21,10 +21,15 @@ urlpatterns = [
     #    path('api-auth/', include('rest_framework.urls', namespace='rest_framework')),
     #    path('token-auth/', tokens.ObtainExpiringAuthToken.as_view()),
     path("permissions/", views.PermissionList.as_view()),
+    path("permissions/check/", views.PermissionCheck.as_view()),
     path(
         "permissions/<val>", views.PermissionDetail.as_view(), name="permission-detail"
     ),
     path("namespaces/", views.NamespaceList.as_view()),
+    path(
+        "namespaces/changes/",
+        views.HubuumChanges.for_list(views.NamespaceList).as_view(),
+    ),
     path("namespaces/<val>", views.NamespaceDetail.as_view(), name="namespace-detail"),
     path(
         "namespaces/<val>/groups/",
@@ -36,25 +41,42 @@ urlpatterns = [
         views.NamespaceMembersGroup.as_view(),
         name="namespace-groups",
     ),
+    path("search/", views.Search.as_view()),
+    path("tombstones/", views.TombstoneList.as_view()),
     path("hosts/", views.HostList.as_view()),
+    path("hosts/changes/", views.HubuumChanges.for_list(views.HostList).as_view()),
     path("hosts/<val>", views.HostDetail.as_view(), name="host-detail"),
     path("hosttypes/", views.HostTypeList.as_view()),
+    path(
+        "hosttypes/changes/", views.HubuumChanges.for_list(views.HostTypeList).as_view()
+    ),
     path("hosttypes/<val>", views.HostTypeDetail.as_view(), name="hosttype-detail"),
     path("rooms/", views.RoomList.as_view()),
+    path("rooms/changes/", views.HubuumChanges.for_list(views.RoomList).as_view()),
     path("rooms/<val>", views.RoomDetail.as_view(), name="room-detail"),
     path("jacks/", views.JackList.as_view()),
+    path("jacks/changes/", views.HubuumChanges.for_list(views.JackList).as_view()),
     path("jacks/<val>", views.JackDetail.as_view(), name="jack-detail"),
     path("persons/", views.PersonList.as_view()),
+    path("persons/changes/", views.HubuumChanges.for_list(views.PersonList).as_view()),
     path("persons/<val>", views.PersonDetail.as_view(), name="person-detail"),
     path("vendors/", views.VendorList.as_view()),
+    path("vendors/changes/", views.HubuumChanges.for_list(views.VendorList).as_view()),
     path("vendors/<val>", views.VendorDetail.as_view(), name="vendor-detail"),
     path("pos/", views.PurchaseOrderList.as_view()),
+    path(
+        "pos/changes/", views.HubuumChanges.for_list(views.PurchaseOrderList).as_view()
+    ),
     path(
         "pos/<val>",
         views.PurchaseOrderDetail.as_view(),
         name="purchaseorder-detail",
     ),
     path("purchasedocuments/", views.PurchaseDocumentList.as_view()),
+    path(
+        "purchasedocuments/changes/",
+        views.HubuumChanges.for_list(views.PurchaseDocumentList).as_view(),
+    ),
     path(
         "purchasedocuments/<val>",
         views.PurchaseDocumentDetail.as_view(),
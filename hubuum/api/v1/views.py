@@ -1,8 +1,14 @@
 """Versioned (v1) views for the hubuum models."""
 # from ipaddress import ip_address
+from collections import Counter
 
+from django.conf import settings
 from django.contrib.auth.models import Group
-from django.http import HttpResponse
+from django.db import transaction
+from django.db.models import Count, Q
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import generics, status
 from rest_framework.exceptions import (  # NotAuthenticated,
     MethodNotAllowed,
@@ -10,35 +16,65 @@ from rest_framework.exceptions import (  # NotAuthenticated,
     ParseError,
     ValidationError,
 )
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.schemas.openapi import AutoSchema
+from rest_framework.settings import api_settings
 from rest_framework.views import Response
 
+from hubuum.cache import identifier_cache
+from hubuum.conditional import (
+    add_validators,
+    detail_validators,
+    has_validators,
+    list_validators,
+    not_modified,
+)
 from hubuum.exceptions import Conflict
-from hubuum.filters import HubuumObjectPermissionsFilter
+from hubuum.filters import HubuumFieldFilter, HubuumObjectPermissionsFilter
 from hubuum.models import (
     Host,
     HostType,
     Jack,
     Namespace,
+    NamespacedHubuumModel,
     Permission,
     Person,
     PurchaseDocuments,
     PurchaseOrder,
     Room,
+    Tombstone,
+    TombstoneReader,
     User,
     Vendor,
+    model_is_open,
 )
+from hubuum.pagination import FeedPagination, KeysetPagination
 from hubuum.permissions import (
+    NAMESPACE_PERMISSIONS,
+    OBJECT_PERMISSIONS,
+    OPERATION_METHODS,
     IsSuperOrAdminOrReadOnly,
     NameSpace,
     fully_qualified_operations,
+    is_super_or_admin,
+    permission_snapshot,
+)
+from hubuum.renderers import NDJSONRenderer
+from hubuum.search import SEARCH_FIELDS, search, search_terms
+from hubuum.tools import (
+    get_group,
+    get_permission,
+    get_user,
+    resolve_object,
+    resolve_objects,
 )
-from hubuum.tools import get_group, get_permission, get_user
 
 from .serializers import (
+    ExpandedField,
     GroupSerializer,
     HostSerializer,
     HostTypeSerializer,
+    HubuumListSerializer,
     JackSerializer,
     NamespaceSerializer,
     PermissionSerializer,
@@ -46,6 +82,7 @@ from .serializers import (
     PurchaseDocumentsSerializer,
     PurchaseOrderSerializer,
     RoomSerializer,
+    TombstoneSerializer,
     UserSerializer,
     VendorSerializer,
 )
@@ -62,67 +99,558 @@ class MultipleFieldLookupORMixin:  # pylint: disable=too-few-public-methods
 
     lookup_fields = ("id", "username", "email")
 
-    Applying this mixin will make the class attempt to:
-      1. Try to find object where id=foo (the default behaviour)
-      2. If no match was found, try to find an object where username=foo
-      3. If still no match, try to find an object where email=foo
+    Applying this mixin will make the class look for objects where id=foo,
+    username=foo or email=foo in a single query, skipping fields that "foo" can't
+    be a value of (here, id). The first field in the given order that matches
+    decides the object:
+      1. An object where id=foo (the default behaviour)
+      2. If no match was found, an object where username=foo
+      3. If still no match, an object where email=foo
 
-    If no matches are found, return 404.
+    If no matches are found, return 404. If the deciding field matches more than
+    one object, return 409.
     """
 
     def get_object(self):
         """Perform the actual lookup based on the model's lookup_fields.
 
-        raises: 404 if not found.
+        raises: 404 if not found, 409 if ambiguous.
         return: object
         """
         #        if self.request.user.is_anonymous:
         #            raise NotAuthenticated()
 
-        queryset = self.get_queryset()
-        obj = None
-        value = self.kwargs["val"]
-        for field in self.lookup_fields:
-            try:
-                # https://stackoverflow.com/questions/9122169/calling-filter-with-a-variable-for-field-name
-                # No, just no.
-                obj = queryset.get(**{field: value})
-                if obj:
-                    break
-
-            # If we didn't get a hit, or an error, keep trying.
-            # If we don't get a hit at all, we'll raise 404.
-            except Exception:  # nosec pylint: disable=broad-except
-                pass
-
-        if obj is None:
-            raise NotFound()
+        obj = resolve_object(
+            self.get_queryset(), self.lookup_fields, self.kwargs["val"]
+        )
 
         # As we overload get_object, we need to manually check permissions.
         self.check_object_permissions(self.request, obj)
         return obj
 
 
-class HubuumList(generics.ListCreateAPIView):
-    """Get: List objects. Post: Add object."""
+class SparseFieldsetMixin:  # pylint: disable=too-few-public-methods
+    """A mixin to fetch only the columns of the fields requested by the client.
+
+    When the client limits the fields of the response with ?fields= or ?exclude=
+    (see serializers.sparse_fieldset), the model fields backing the dropped
+    serializer fields are deferred, so they are neither read from the database
+    nor loaded into the objects. The primary key, the namespace, the lookup
+    fields of the view, and updated_at are always fetched, as lookups, permission
+    checks, and the validators of hubuum.conditional need them.
+    """
+
+    def get_queryset(self):
+        """Return the queryset, deferring the columns of the dropped fields."""
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if self.request.method not in SAFE_METHODS or not (
+            "fields" in params or "exclude" in params
+        ):
+            return queryset
+
+        selected = {field.source for field in self.get_serializer().fields.values()}
+        available = self.get_serializer_class()(context={}).fields.values()
+        meta = queryset.model._meta  # pylint: disable=protected-access
+        concrete = {field.name for field in meta.concrete_fields}
+        keep = {
+            meta.pk.name,
+            "namespace",
+            "updated_at",
+            *getattr(self, "lookup_fields", ()),
+        }
+        deferred = {
+            field.source
+            for field in available
+            if field.source in concrete and field.source not in selected | keep
+        }
+        return queryset.defer(*deferred) if deferred else queryset
+
+
+class ExpandMixin:  # pylint: disable=too-few-public-methods
+    """A mixin to fetch the related objects expanded with ?expand= up front.
+
+    Expanded foreign keys (see serializers.expansions) are joined in with
+    select_related, and expanded many-to-many fields (or paths through them) are
+    fetched with prefetch_related, so expanding a list costs a constant number of
+    queries.
+    """
+
+    def get_queryset(self):
+        """Return the queryset, with the expanded relations fetched along."""
+        queryset = super().get_queryset()
+        if (
+            self.request.method not in SAFE_METHODS
+            or not self.request.query_params.get("expand")
+        ):
+            return queryset
+
+        joined, prefetched = [], []
+        fields = [("", False, self.get_serializer().fields)]
+        while fields:
+            prefix, many, current = fields.pop()
+            for field in current.values():
+                if isinstance(field, ExpandedField):
+                    path = prefix + field.source
+                    nested = many or field.many
+                    (prefetched if nested else joined).append(path)
+                    fields.append((path + "__", nested, field.serializer.fields))
+
+        if joined:
+            queryset = queryset.select_related(*joined)
+        if prefetched:
+            queryset = queryset.prefetch_related(*prefetched)
+        return queryset
+
+
+class HubuumList(ExpandMixin, SparseFieldsetMixin, generics.ListCreateAPIView):
+    """Get: List objects. Post: Add object(s). Patch/Delete: Change objects in bulk.
+
+    Lists are streamed as newline delimited JSON if the client accepts
+    application/x-ndjson (or passes ?format=ndjson), see stream().
+    """
 
     permission_classes = (NameSpace,)
-    filter_backends = [HubuumObjectPermissionsFilter]
+    filter_backends = [HubuumObjectPermissionsFilter, HubuumFieldFilter]
+    pagination_class = KeysetPagination
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer]
+
+    def list(self, request, *args, **kwargs):
+        """List the objects, streaming them if the client asked for NDJSON.
+
+        If enabled with settings.HUBUUM_LIST_ETAGS, unpaginated lists carry an ETag,
+        and requests with a matching If-None-Match get 304, see hubuum.conditional.
+        Pages get no ETag, as it would cost an aggregate over the full list on
+        every page.
+
+        If the serializer has a ReadPlan (see HubuumSerializer.read_plan), the
+        objects are fetched as rows and represented through the plan.
+
+        raises: ParseError if a streamed list is asked to be paginated.
+        """
+        streamed = isinstance(request.accepted_renderer, NDJSONRenderer)
+        if streamed and self.paginator.is_requested(request):
+            raise ParseError(
+                detail="Streamed (NDJSON) lists can't be paginated, "
+                "drop cursor, page_size and count."
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        validators = None
+        if (
+            getattr(settings, "HUBUUM_LIST_ETAGS", True)
+            and not self.paginator.is_requested(request)
+            and has_validators(request, queryset.model)
+        ):
+            validators = list_validators(request, queryset)
+            response = not_modified(request, *validators)
+            if response is not None:
+                return add_validators(response, *validators)
+
+        serializer = self.get_serializer()
+        plan = serializer.read_plan()
+        if plan is not None:
+            ordering = KeysetPagination.get_ordering(queryset)
+            queryset = plan.rows(queryset, *[field.attname for field, _ in ordering])
+            represent = plan.to_representation
+        else:
+            represent = serializer.to_representation
+
+        if streamed:
+            response = self.stream(queryset, represent)
+        else:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                response = self.get_paginated_response([represent(obj) for obj in page])
+            else:
+                response = Response([represent(obj) for obj in queryset])
+        return add_validators(response, *validators) if validators else response
+
+    def create(self, request, *args, **kwargs):
+        """Create an object, or a list of objects in bulk."""
+        if isinstance(request.data, list):
+            return self.bulk_create(request)
+        return super().create(request, *args, **kwargs)
+
+    def bulk_create(self, request):
+        """Create a list of namespaced objects, all or nothing.
+
+        The permissions are checked once per namespace (see
+        NameSpace.can_create_all), the items are validated in one pass with their
+        related objects fetched in bulk, and the objects are inserted with
+        bulk_create in a single transaction, see HubuumListSerializer. If any item
+        is invalid, nothing is created, and the errors are returned as a list with
+        an entry per item (empty for valid items).
+
+        At most settings.HUBUUM_BULK_MAX_ITEMS objects can be created at once.
+        """
+        self.check_bulk(request, "created")
+        serializer = self.get_list_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def patch(self, request, *args, **kwargs):
+        """Update the objects selected by the filters, or a list of objects."""
+        if isinstance(request.data, list):
+            return self.bulk_update_items(request)
+        return self.bulk_update(request)
+
+    def bulk_update(self, request):
+        """Update every object matching the filters of the request with one UPDATE.
+
+        The objects are selected with the same filters as the list (ie,
+        ?room=4 or ?id__in=1,2,3), and at least one filter is required. The body
+        is a partial object, validated once, and written to all the objects in a
+        single set-based UPDATE, along with updated_at.
+
+        The user needs has_update in every namespace of the selected objects,
+        checked once per namespace, and has_create in the namespace the objects
+        are moved to, if any. Returns the number of updated objects, in total and
+        per namespace (by name).
+        """
+        model = self.check_bulk(request, "updated")
+        if not self.is_filtered(request):
+            raise ParseError(detail="Bulk updates need at least one filter.")
+
+        serializer = self.get_serializer(data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        values = serializer.validated_data
+        if not values:
+            raise ParseError(detail="Nothing to update.")
+
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        with transaction.atomic():
+            counts = self.namespace_counts(queryset)
+            self.check_namespaces(request, "has_update", counts)
+            if "namespace" in values:
+                self.check_namespaces(request, "has_create", [values["namespace"].pk])
+            queryset.filter(namespace__in=counts).update(
+                **values, updated_at=timezone.now()
+            )
+        identifier_cache.invalidate(model)
+        return Response(self.bulk_counts("updated", counts))
+
+    def bulk_update_items(self, request):
+        """Update a list of objects, each with its own values, all or nothing.
+
+        Every item is a partial object with the id of the object to update. The
+        objects are fetched in one query (among those matching the filters of
+        the request, if any), the permissions are checked once per namespace as
+        for bulk_update(), and the items are validated in one pass and written
+        with bulk_update, see HubuumListSerializer. Unknown and repeated ids and
+        invalid items are reported per item, before anything is written.
+
+        At most settings.HUBUUM_BULK_MAX_ITEMS objects can be updated at once.
+        """
+        self.check_bulk(request, "updated")
+        ids = []
+        for item in request.data:
+            value = item.get("id") if isinstance(item, dict) else None
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValidationError(
+                    code="invalid_id",
+                    detail="Every item needs the id of the object to update.",
+                )
+            ids.append(value)
+
+        objects = self.filter_queryset(self.get_queryset()).in_bulk(ids)
+        errors, seen = [], set()
+        for pk in ids:
+            if pk not in objects:
+                errors.append({"id": ["Not found."]})
+            elif pk in seen:
+                errors.append({"id": ["Duplicate id."]})
+            else:
+                errors.append({})
+            seen.add(pk)
+        if any(errors):
+            raise ValidationError(errors)
+
+        instances = [objects[pk] for pk in ids]
+        serializer = self.get_list_serializer(
+            instance=instances,
+            data=[
+                {key: value for key, value in item.items() if key != "id"}
+                for item in request.data
+            ],
+            partial=True,
+        )
+        serializer.is_valid(raise_exception=True)
+        counts = Counter(obj.namespace_id for obj in instances)
+        self.check_namespaces(request, "has_update", counts)
+        self.check_namespaces(
+            request,
+            "has_create",
+            {
+                attrs["namespace"].pk
+                for attrs in serializer.validated_data
+                if "namespace" in attrs
+            },
+        )
+        with transaction.atomic():
+            serializer.save()
+        return Response(self.bulk_counts("updated", counts))
+
+    def delete(self, request, *args, **kwargs):
+        """Delete the objects selected by the filters."""
+        return self.bulk_delete(request)
+
+    def bulk_delete(self, request):
+        """Delete every object matching the filters of the request, in batches.
+
+        The objects are selected with the same filters as the list (ie,
+        ?room=4 or ?id__in=1,2,3), and at least one filter is required. The user
+        needs has_delete in every namespace of the selected objects, checked once
+        per namespace before anything is deleted.
+
+        The objects are deleted in batches of settings.HUBUUM_BULK_BATCH_SIZE,
+        each in a transaction of its own, so no transaction holds the locks of
+        all the objects. A failing batch leaves the earlier batches deleted.
+        Returns the number of deleted objects, in total and per namespace (by
+        name).
+        """
+        model = self.check_bulk(request, "deleted")
+        if not self.is_filtered(request):
+            raise ParseError(detail="Bulk deletes need at least one filter.")
+
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        namespaces = self.namespace_counts(queryset)
+        self.check_namespaces(request, "has_delete", namespaces)
+
+        queryset = queryset.filter(namespace__in=namespaces).order_by("pk")
+        batch_size = getattr(settings, "HUBUUM_BULK_BATCH_SIZE", 500)
+        counts = Counter()
+        last = None
+        while True:
+            batch = queryset if last is None else queryset.filter(pk__gt=last)
+            rows = list(batch.values_list("pk", "namespace")[:batch_size])
+            if not rows:
+                break
+            with transaction.atomic(), Tombstone.deferred():
+                queryset.filter(pk__in=[pk for pk, _ in rows]).delete()
+            counts.update(namespace for _, namespace in rows)
+            last = rows[-1][0]
+        identifier_cache.invalidate(model)
+        return Response(self.bulk_counts("deleted", counts))
+
+    def check_bulk(self, request, action):
+        """Check that the objects of the view can be created or changed in bulk.
+
+        raises: ParseError if the model isn't namespaced, or if a list has more
+        than settings.HUBUUM_BULK_MAX_ITEMS items.
+        return: the model
+        """
+        model = self.get_queryset().model
+        if not issubclass(model, NamespacedHubuumModel):
+            raise ParseError(
+                detail=f"{model._meta.verbose_name_plural} can't be {action} in bulk."
+            )
+        max_items = getattr(settings, "HUBUUM_BULK_MAX_ITEMS", 1000)
+        if isinstance(request.data, list) and len(request.data) > max_items:
+            raise ParseError(detail=f"At most {max_items} objects can be {action}.")
+        return model
+
+    def check_namespaces(self, request, perm, namespaces):
+        """Deny the request unless the user can perform perm in all the namespaces."""
+        if not NameSpace.can_all(request, perm, namespaces):
+            self.permission_denied(request)
+
+    def is_filtered(self, request):
+        """Check if any of the filters of the view are used by the request."""
+        filter_fields = getattr(self, "filter_fields", ())
+        return any(
+            key.split("__")[0].rstrip("!") in filter_fields
+            for key in request.query_params
+        )
+
+    def get_list_serializer(self, *args, **kwargs):
+        """Return a HubuumListSerializer for the serializer of the view."""
+        context = self.get_serializer_context()
+        return HubuumListSerializer(
+            *args,
+            child=self.get_serializer_class()(context=context),
+            context=context,
+            allow_empty=False,
+            **kwargs,
+        )
+
+    @staticmethod
+    def namespace_counts(queryset):
+        """Return the number of objects of the queryset per namespace id."""
+        return dict(
+            queryset.order_by().values_list("namespace").annotate(count=Count("pk"))
+        )
+
+    @staticmethod
+    def bulk_counts(action, counts):
+        """Return the total and per namespace (by name) counts of a bulk operation.
+
+        param: action (the key of the total, ie "updated")
+        param: counts (namespace id -> number of objects)
+        """
+        names = dict(Namespace.objects.filter(pk__in=counts).values_list("pk", "name"))
+        return {
+            action: sum(counts.values()),
+            "namespaces": {names[pk]: count for pk, count in counts.items()},
+        }
+
+    @staticmethod
+    def stream(queryset, represent):
+        """Stream the objects, one JSON object per line.
+
+        The objects are fetched in chunks of settings.HUBUUM_STREAM_CHUNK_SIZE
+        (using a server-side cursor where the database supports it) and represented
+        one by one as the response is written, so memory use does not grow with
+        the number of objects. Streamed lists are not paginated, see list().
+        """
+        chunk_size = getattr(settings, "HUBUUM_STREAM_CHUNK_SIZE", 1000)
+
+        def lines():
+            for obj in queryset.iterator(chunk_size=chunk_size):
+                yield NDJSONRenderer.line(represent(obj))
+
+        return StreamingHttpResponse(lines(), content_type=NDJSONRenderer.media_type)
 
 
 # NOTE: Order for the inheritance here is vital.
-class HubuumDetail(MultipleFieldLookupORMixin, generics.RetrieveUpdateDestroyAPIView):
+class HubuumDetail(
+    MultipleFieldLookupORMixin,
+    ExpandMixin,
+    SparseFieldsetMixin,
+    generics.RetrieveUpdateDestroyAPIView,
+):
     """Get, Patch, or Destroy an object."""
 
     permission_classes = (NameSpace,)
     lookup_fields = ("id",)
 
+    def retrieve(self, request, *args, **kwargs):
+        """Get the object, or 304 if the client's copy is current.
+
+        See hubuum.conditional for the validators.
+        """
+        instance = self.get_object()
+        if not has_validators(request, type(instance)):
+            return Response(self.get_serializer(instance).data)
+
+        validators = detail_validators(request, instance)
+        response = not_modified(request, *validators)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+        return add_validators(response, *validators)
+
+    def perform_destroy(self, instance):
+        """Delete the object, recording the tombstones of any cascade at once."""
+        with transaction.atomic(), Tombstone.deferred():
+            instance.delete()
+
+
+class ChangeFeedMixin:  # pylint: disable=too-few-public-methods
+    """A mixin for change feeds, lists of what changed since a point in time.
+
+    The feed lists the objects where since_field is after ?since= (an ISO 8601
+    timestamp, all objects if not given), ordered by since_field and id, so the
+    feed pages (see FeedPagination) follow the index on since_field. A client
+    stays in sync by passing the since_field of the last object it saw as ?since=
+    on its next poll.
+    """
+
+    since_field = None
+
+    def get_since(self):
+        """Return ?since= as an aware datetime, or None if not given.
+
+        raises: ValidationError if the timestamp is invalid.
+        """
+        value = self.request.query_params.get("since")
+        if not value:
+            return None
+
+        try:
+            since = parse_datetime(value)
+        except ValueError:
+            since = None
+        if since is None:
+            raise ValidationError(
+                code="invalid_since",
+                detail={"since": f"'{value}' is not an ISO 8601 timestamp."},
+            )
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def get_queryset(self):
+        """Return the objects changed since ?since=, in feed order."""
+        queryset = super().get_queryset()
+        since = self.get_since()
+        if since is not None:
+            queryset = queryset.filter(**{f"{self.since_field}__gt": since})
+        return queryset.order_by(self.since_field, "id")
+
+
+class HubuumChanges(ChangeFeedMixin, SparseFieldsetMixin, generics.ListAPIView):
+    """Get: List the objects created or updated since ?since=.
+
+    Deleted objects are listed by TombstoneList.
+    """
+
+    permission_classes = (NameSpace,)
+    filter_backends = [HubuumObjectPermissionsFilter, HubuumFieldFilter]
+    pagination_class = FeedPagination
+    since_field = "updated_at"
+
+    @classmethod
+    def for_list(cls, list_view):
+        """Return the change feed view for the objects of a list view."""
+        name = list_view.__name__.removesuffix("List")
+        return type(
+            f"{name}Changes",
+            (cls,),
+            {
+                "__doc__": cls.__doc__,
+                "queryset": list_view.queryset,
+                "serializer_class": list_view.serializer_class,
+                "filter_fields": list_view.filter_fields,
+            },
+        )
+
+
+class TombstoneList(ChangeFeedMixin, generics.ListAPIView):
+    """Get: List the objects deleted since ?since=.
+
+    Users see the tombstones of the namespaces they can read, and of the deleted
+    namespaces they could read, see Tombstone.
+    """
+
+    queryset = Tombstone.objects.all()
+    serializer_class = TombstoneSerializer
+    filter_backends = [HubuumFieldFilter]
+    filter_fields = ("model",)
+    pagination_class = FeedPagination
+    since_field = "deleted_at"
+
+    def get_queryset(self):
+        """Return the tombstones readable by the user."""
+        queryset = super().get_queryset()
+        user = self.request.user
+        if is_super_or_admin(user):
+            return queryset
+
+        readable = permission_snapshot(self.request).namespaces_with("has_read")
+        deleted = TombstoneReader.objects.filter(user=user).values(
+            "tombstone__object_id"
+        )
+        return queryset.filter(Q(namespace__in=readable) | Q(namespace__in=deleted))
+
 
 class UserList(HubuumList):
     """Get: List users. Post: Add user."""
 
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    filter_fields = ("id", "username", "email")
     permission_classes = (IsSuperOrAdminOrReadOnly,)
 
 
@@ -140,6 +668,7 @@ class GroupList(HubuumList):
 
     queryset = Group.objects.all()
     serializer_class = GroupSerializer
+    filter_fields = ("id", "name")
     permission_classes = (IsSuperOrAdminOrReadOnly,)
 
 
@@ -239,6 +768,7 @@ class PermissionList(HubuumList):
 
     queryset = Permission.objects.all()
     serializer_class = PermissionSerializer
+    filter_fields = ("id", "namespace", "group")
 
 
 class PermissionDetail(HubuumDetail):
@@ -248,11 +778,220 @@ class PermissionDetail(HubuumDetail):
     serializer_class = PermissionSerializer
 
 
+class PermissionCheck(generics.GenericAPIView):
+    """Check permissions for a batch of operations.
+
+    POST /permissions/check/
+        [
+            {"model": "host", "object": "myhost", "operation": "update"},
+            {"model": "host", "namespace": "mynamespace", "operation": "create"},
+            {"model": "namespace", "object": "mynamespace", "operation": "delete"},
+        ]
+
+    Each check names a model, an operation (create, read, update, or delete), and
+    either an object (looked up like the detail view of the model does) or a
+    namespace (to check operations on objects in that namespace, ie creation).
+
+    Returns a list with one entry per check, in the same order: true or false,
+    using the same rules as the NameSpace permission class, or null if the object
+    or namespace does not exist. All the checks are evaluated against a single
+    permission snapshot, and objects are resolved with one query per model.
+    """
+
+    max_checks = 1000
+    schema = AutoSchema(
+        tags=["LISTVIEW"],
+        component_name="Permission checks",
+        operation_id_base="PermissionCheck",
+    )
+
+    @staticmethod
+    def detail_views():
+        """Map model names to the detail view of the model."""
+        return {
+            view.queryset.model._meta.model_name: view  # pylint: disable=protected-access
+            for view in HubuumDetail.__subclasses__()
+        }
+
+    def validate(self, checks, views):
+        """Validate the checks, raise ParseError if they are malformed."""
+        if not isinstance(checks, list):
+            raise ParseError(detail="Expected a list of checks.")
+
+        if len(checks) > self.max_checks:
+            raise ParseError(detail=f"At most {self.max_checks} checks are allowed.")
+
+        for check in checks:
+            if not isinstance(check, dict):
+                raise ParseError(detail=f"Expected a dictionary, got '{check}'.")
+            if check.get("model") not in views:
+                raise ParseError(detail=f"Unknown model in '{check}'.")
+            if check.get("operation") not in OPERATION_METHODS:
+                raise ParseError(
+                    detail=f"Operation must be one of {list(OPERATION_METHODS)}."
+                )
+            if ("object" in check) == ("namespace" in check):
+                raise ParseError(
+                    detail=f"Exactly one of 'object' or 'namespace' needed in '{check}'."
+                )
+
+    def post(self, request, *args, **kwargs):
+        """Evaluate the checks."""
+        views = self.detail_views()
+        checks = request.data
+        self.validate(checks, views)
+
+        identifiers = {}
+        for check in checks:
+            if "object" in check:
+                identifiers.setdefault(check["model"], set()).add(str(check["object"]))
+            else:
+                identifiers.setdefault("namespace", set()).add(str(check["namespace"]))
+
+        resolved = {
+            model: resolve_objects(
+                views[model].queryset, views[model].lookup_fields, values
+            )
+            for model, values in identifiers.items()
+        }
+
+        results = []
+        for check in checks:
+            if "object" in check:
+                target = resolved[check["model"]].get(str(check["object"]))
+            else:
+                target = resolved["namespace"].get(str(check["namespace"]))
+            results.append(self.check(request, check, target))
+
+        return Response(results)
+
+    @staticmethod
+    def check(request, check, target):
+        """Check a single operation on a resolved target (an object or a namespace)."""
+        if target is None:
+            return None
+
+        model = check["model"]
+        method = OPERATION_METHODS[check["operation"]]
+        if model_is_open(model):
+            return is_super_or_admin(request.user) or method == "GET"
+
+        if is_super_or_admin(request.user):
+            return True
+
+        # Creating namespaces requires has_namespace on the parent namespace.
+        if model == "namespace":
+            perm = (
+                "has_namespace" if method == "POST" else NAMESPACE_PERMISSIONS[method]
+            )
+        else:
+            perm = OBJECT_PERMISSIONS[method]
+
+        namespace = getattr(target, "namespace_id", target.pk)
+        return permission_snapshot(request).can(perm, namespace)
+
+
+class Search(generics.GenericAPIView):
+    """Search objects by text.
+
+    GET /search/?q=laptop 3.14&models=host,room
+
+    Searches the fields of hubuum.search.SEARCH_FIELDS of the given models (all of
+    them by default), and returns the best matches across the models, at most
+    ?limit= (default settings.HUBUUM_SEARCH_LIMIT), best first:
+        [{"model": "host", "rank": 0.6, "object": {...}}, ...]
+
+    The objects are filtered like lists are, with HubuumObjectPermissionsFilter.
+    """
+
+    schema = AutoSchema(
+        tags=["LISTVIEW"],
+        component_name="Search",
+        operation_id_base="Search",
+    )
+
+    @staticmethod
+    def list_views():
+        """Map the names of the searchable models to their list views."""
+        return {
+            view.queryset.model._meta.model_name: view  # pylint: disable=protected-access
+            for view in HubuumList.__subclasses__()
+            if view.queryset.model._meta.model_name  # pylint: disable=protected-access
+            in SEARCH_FIELDS
+        }
+
+    def get_limit(self):
+        """Return the number of results requested, within the limits."""
+        limit = getattr(settings, "HUBUUM_SEARCH_LIMIT", 50)
+        try:
+            limit = int(self.request.query_params.get("limit", limit))
+        except ValueError as exc:
+            raise ValidationError(
+                code="invalid_limit", detail={"limit": "Must be an integer."}
+            ) from exc
+        return min(max(limit, 1), getattr(settings, "HUBUUM_MAX_PAGE_SIZE", 1000))
+
+    def get(self, request, *args, **kwargs):
+        """Search the models."""
+        views = self.list_views()
+        query = request.query_params.get("q", "")
+        if not search_terms(query):
+            raise ValidationError(code="invalid_query", detail={"q": "Required."})
+
+        names = request.query_params.get("models")
+        names = [name.strip() for name in names.split(",")] if names else list(views)
+        unknown = [name for name in names if name not in views]
+        if unknown:
+            raise ValidationError(
+                code="invalid_models",
+                detail={
+                    "models": f"Can't search {unknown}, choose from {list(views)}."
+                },
+            )
+
+        limit = self.get_limit()
+        matches = []
+        for name in names:
+            queryset = HubuumObjectPermissionsFilter().filter_queryset(
+                request, views[name].queryset.all(), self
+            )
+            serializer = views[name].serializer_class(
+                context=self.get_serializer_context()
+            )
+            for obj in search(queryset, query)[:limit]:
+                matches.append((obj.search_rank, name, obj, serializer))
+
+        matches.sort(key=lambda match: (-match[0], match[1], match[2].pk))
+        return Response(
+            [
+                {
+                    "model": name,
+                    "rank": rank,
+                    "object": serializer.to_representation(obj),
+                }
+                for rank, name, obj, serializer in matches[:limit]
+            ]
+        )
+
+
 class HostList(HubuumList):
     """Get: List hosts. Post: Add host."""
 
     queryset = Host.objects.all().order_by("id")
     serializer_class = HostSerializer
+    filter_fields = (
+        "id",
+        "namespace",
+        "name",
+        "fqdn",
+        "serial",
+        "type",
+        "room",
+        "jack",
+        "purchase_order",
+        "person",
+        "updated_at",
+    )
 
 
 class HostDetail(HubuumDetail):
@@ -268,11 +1007,15 @@ class NamespaceList(HubuumList):
 
     queryset = Namespace.objects.all()
     serializer_class = NamespaceSerializer
+    filter_fields = ("id", "name")
     permission_classes = (NameSpace,)
     namespace_write_permission = "has_namespace"
 
     def post(self, request, *args, **kwargs):
         """Process creation of new namespaces."""
+        if isinstance(request.data, list):
+            # Namespaces aren't namespaced, check_bulk rejects them explicitly.
+            self.check_bulk(request, "created")
         user = request.user
         group = None
         if "group" in request.data:
@@ -438,6 +1181,7 @@ class HostTypeList(HubuumList):
 
     queryset = HostType.objects.all().order_by("name")
     serializer_class = HostTypeSerializer
+    filter_fields = ("id", "namespace", "name", "updated_at")
 
 
 class HostTypeDetail(HubuumDetail):
@@ -452,6 +1196,7 @@ class RoomList(HubuumList):
 
     queryset = Room.objects.all().order_by("id")
     serializer_class = RoomSerializer
+    filter_fields = ("id", "namespace", "room_id", "updated_at")
 
 
 class RoomDetail(HubuumDetail):
@@ -466,6 +1211,7 @@ class JackList(HubuumList):
 
     queryset = Jack.objects.all().order_by("name")
     serializer_class = JackSerializer
+    filter_fields = ("id", "namespace", "name", "room", "updated_at")
 
 
 class JackDetail(HubuumDetail):
@@ -480,6 +1226,7 @@ class PersonList(HubuumList):
 
     queryset = Person.objects.all().order_by("id")
     serializer_class = PersonSerializer
+    filter_fields = ("id", "namespace", "username", "room", "updated_at")
 
 
 class PersonDetail(HubuumDetail):
@@ -494,6 +1241,7 @@ class VendorList(HubuumList):
 
     queryset = Vendor.objects.all().order_by("vendor_name")
     serializer_class = VendorSerializer
+    filter_fields = ("id", "namespace", "vendor_name", "updated_at")
 
 
 class VendorDetail(HubuumDetail):
@@ -508,6 +1256,7 @@ class PurchaseOrderList(HubuumList):
 
     queryset = PurchaseOrder.objects.all().order_by("id")
     serializer_class = PurchaseOrderSerializer
+    filter_fields = ("id", "namespace", "vendor", "updated_at")
 
 
 class PurchaseOrderDetail(HubuumDetail):
@@ -522,6 +1271,7 @@ class PurchaseDocumentList(HubuumList):
 
     queryset = PurchaseDocuments.objects.all().order_by("id")
     serializer_class = PurchaseDocumentsSerializer
+    filter_fields = ("id", "namespace", "purchase_order", "updated_at")
 
 
 class PurchaseDocumentDetail(HubuumDetail):
@@ -7,3 +7,8 @@ class HubuumApiConfig(AppConfig):
     """The hubuum app."""
 
     name = "hubuum"
+
+    def ready(self):
+        """Connect the signal handlers."""
+        # pylint: disable=import-outside-toplevel,unused-import
+        from hubuum import signals  # noqa: F401
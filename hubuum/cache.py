@@ -0,0 +1,170 @@
+"""Caching of derived data for hubuum.
+
+The effective namespace permissions of a user (see User.namespace_permissions) are
+cached in the Django cache named by settings.HUBUUM_PERMISSION_CACHE, keyed by the
+user id. The entries are invalidated by the signal handlers in hubuum.signals.
+
+The resolution of identifiers (ie, names) to primary keys (see
+hubuum.tools.resolve_object) is cached per process in identifier_cache, an LRU
+cache with a TTL. Entries are invalidated when an object of their model is saved
+or deleted in this process. Other processes see such changes when their entries
+expire.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+PERMISSION_CACHE_KEY = "hubuum:permissions:{}"
+
+
+def permission_cache():
+    """Return the cache used for effective permissions."""
+    return caches[getattr(settings, "HUBUUM_PERMISSION_CACHE", "default")]
+
+
+def get_cached_permissions(user_id):
+    """Return the cached namespace permission map for a user, or None."""
+    return permission_cache().get(PERMISSION_CACHE_KEY.format(user_id))
+
+
+def set_cached_permissions(user_id, masks):
+    """Cache the namespace permission map for a user."""
+    permission_cache().set(
+        PERMISSION_CACHE_KEY.format(user_id),
+        masks,
+        getattr(settings, "HUBUUM_PERMISSION_CACHE_TIMEOUT", 300),
+    )
+
+
+def invalidate_permissions(user_ids):
+    """Drop the cached namespace permission maps for the given users.
+
+    The entries are dropped immediately, and once more when the current transaction
+    commits, so a concurrent request can't cache the state from before the commit.
+    """
+    keys = [PERMISSION_CACHE_KEY.format(user_id) for user_id in user_ids]
+    if not keys:
+        return
+
+    permission_cache().delete_many(keys)
+    transaction.on_commit(lambda: permission_cache().delete_many(keys))
+
+
+class IdentifierCache:
+    """An LRU cache with a TTL, mapping identifiers to primary keys.
+
+    The entries are keyed by (model, lookup_fields, identifier), as the order of
+    the lookup fields decides which object an identifier resolves to, and hold
+    the deciding field and the primary key of the object.
+    """
+
+    def __init__(self, maxsize=1024, timeout=60):
+        """Create an empty cache of at most maxsize entries, kept timeout seconds."""
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._models = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _label(model):
+        """Return the label of a model."""
+        return model._meta.label_lower  # pylint: disable=protected-access
+
+    def _key(self, model, lookup_fields, identifier):
+        """Return the key of an identifier."""
+        return (self._label(model), tuple(lookup_fields), str(identifier))
+
+    def _remove(self, key):
+        """Remove an entry, the lock must be held."""
+        del self._entries[key]
+        keys = self._models[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._models[key[0]]
+
+    def get(self, model, lookup_fields, identifier):
+        """Return (field, pk) for an identifier, or None."""
+        key = self._key(model, lookup_fields, identifier)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= time.monotonic():
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def set(self, model, lookup_fields, identifier, field, pk):
+        """Cache that an identifier resolves to pk, decided by field."""
+        if self.maxsize <= 0:
+            return
+
+        key = self._key(model, lookup_fields, identifier)
+        with self._lock:
+            self._entries[key] = (field, pk, time.monotonic() + self.timeout)
+            self._entries.move_to_end(key)
+            self._models.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def discard(self, model, lookup_fields, identifier):
+        """Drop the entry of an identifier, if any."""
+        key = self._key(model, lookup_fields, identifier)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate(self, model):
+        """Drop the entries of a model.
+
+        The entries are dropped immediately, and once more when the current
+        transaction commits, so a concurrent request can't cache the state from
+        before the commit.
+        """
+        label = self._label(model)
+        if label not in self._models:
+            return
+
+        self._invalidate(label)
+        transaction.on_commit(lambda: self._invalidate(label))
+
+    def _invalidate(self, label):
+        """Drop the entries with the given model label."""
+        with self._lock:
+            for key in list(self._models.get(label, ())):
+                self._remove(key)
+
+    def clear(self):
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._models.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return the hit and miss counters, and the number of entries."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+            }
+
+
+identifier_cache = IdentifierCache(
+    maxsize=getattr(settings, "HUBUUM_IDENTIFIER_CACHE_SIZE", 1024),
+    timeout=getattr(settings, "HUBUUM_IDENTIFIER_CACHE_TIMEOUT", 60),
+)
@@ -0,0 +1,70 @@
+"""Validators (ETag and Last-Modified) for conditional GETs.
+
+Detail views emit a strong ETag and Last-Modified from the updated_at of the
+object. List views emit an ETag for unpaginated lists from a fingerprint of the
+filtered list: the latest updated_at, the number of objects, and the namespaces
+the user can read.
+Both ETags also cover the query string and the media type of the response, as
+those change the representation.
+
+A request with a matching If-None-Match (or, for details, a not older
+If-Modified-Since) gets 304 Not Modified before anything is serialized.
+Representations with expanded related objects (?expand=) get no validators,
+as changes to the related objects would not be reflected.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from hubuum.permissions import is_super_or_admin, permission_snapshot
+
+
+def has_validators(request, model):
+    """Check if responses for the request can carry validators."""
+    fields = {field.name for field in model._meta.get_fields()}  # pylint: disable=W0212
+    return "updated_at" in fields and not request.query_params.get("expand")
+
+
+def make_etag(request, *parts):
+    """Return a strong ETag for the representation of the parts for a request."""
+    media_type = getattr(request.accepted_renderer, "media_type", "")
+    key = "|".join(str(part) for part in (*parts, request.get_full_path(), media_type))
+    return quote_etag(hashlib.sha256(key.encode("utf-8")).hexdigest()[:32])
+
+
+def detail_validators(request, obj):
+    """Return the (etag, last_modified) of an object."""
+    label = obj._meta.label_lower  # pylint: disable=protected-access
+    etag = make_etag(request, label, obj.pk, obj.updated_at.isoformat())
+    return etag, int(obj.updated_at.timestamp())
+
+
+def list_validators(request, queryset):
+    """Return the (etag, None) of a filtered list, with a single aggregate query."""
+    fingerprint = queryset.order_by().aggregate(
+        latest=Max("updated_at"), count=Count("pk")
+    )
+    user = request.user
+    if is_super_or_admin(user):
+        readable = "admin"
+    else:
+        readable = sorted(permission_snapshot(request).namespaces_with("has_read"))
+
+    label = queryset.model._meta.label_lower  # pylint: disable=protected-access
+    latest = fingerprint["latest"].isoformat() if fingerprint["latest"] else ""
+    return make_etag(request, label, latest, fingerprint["count"], readable), None
+
+
+def not_modified(request, etag, last_modified):
+    """Return a 304 (or 412) response if the client's copy is current, or None."""
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def add_validators(response, etag, last_modified):
+    """Set the validator headers of a response."""
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
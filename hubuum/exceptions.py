@@ -15,3 +15,11 @@ class Conflict(APIException):
     status_code = status.HTTP_409_CONFLICT
     default_detail = _("Resource already exists.")
     default_code = "resource_exists"
+
+
+class AmbiguousLookup(APIException):
+    """Thrown when a lookup matches more than one object."""
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = _("The lookup matches more than one object.")
+    default_code = "ambiguous_lookup"
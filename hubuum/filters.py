@@ -1,13 +1,35 @@
-"""Filters for hubuum permissions."""
+"""Filters for hubuum permissions, and for the fields of objects."""
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models
+from django.db.models import Exists, OuterRef
+from django.db.models.functions import Upper
 from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+from url_filter.constants import StrictMode
+from url_filter.filters import Filter
+from url_filter.filtersets import FilterSet
 
-from hubuum.models import Permission, model_is_open
+from hubuum.models import EffectivePermission, model_is_open
+from hubuum.permissions import permission_snapshot
+
+# The lookups that can use an index, by the kind of index.
+EQUALITY_LOOKUPS = ("exact", "in")
+RANGE_LOOKUPS = ("range", "gt", "gte", "lt", "lte")
+PATTERN_OPCLASSES = ("varchar_pattern_ops", "text_pattern_ops")
 
 
 class HubuumObjectPermissionsFilter(filters.BaseFilterBackend):
     """Return viewable objects for a user.
 
     This filter returns (request.)user-visible objects of a model in question.
+
+    If the user can read in at most settings.HUBUUM_FILTER_MAX_NAMESPACE_IDS
+    namespaces, the queryset is filtered on the namespace ids from the permission
+    snapshot of the request. Otherwise, the filtering is left to the database, see
+    readable().
     """
 
     def filter_queryset(self, request, queryset, view):
@@ -27,9 +49,11 @@ class HubuumObjectPermissionsFilter(filters.BaseFilterBackend):
         if user.is_admin() or model_is_open(model_name):
             return queryset
 
-        res = Permission.objects.filter(
-            has_read=True, group__in=user.groups.all()
-        ).values_list("namespace", flat=True)
+        # The snapshot is shared with the permission classes of the request.
+        res = permission_snapshot(request).namespaces_with("has_read")
+        if len(res) > getattr(settings, "HUBUUM_FILTER_MAX_NAMESPACE_IDS", 500):
+            return queryset.filter(self.readable(user, model_name))
+
         # print(res)
         # print(queryset)
         if model_name == "namespace":
@@ -39,5 +63,175 @@ class HubuumObjectPermissionsFilter(filters.BaseFilterBackend):
         # print(filtered)
         return filtered
 
+    @staticmethod
+    def readable(user, model_name):
+        """Return a condition for the objects the user can read.
+
+        An object is readable if the effective permissions of the user (which include
+        inherited permissions) allow reading in the namespace of the object. This is a
+        correlated EXISTS against a single indexed EffectivePermission row.
+        """
+        namespace = "pk" if model_name == "namespace" else "namespace"
+        return Exists(
+            EffectivePermission.objects.filter(
+                user=user, namespace=OuterRef(namespace)
+            ).granting("has_read")
+        )
+
 
 #        return get_objects_for_user(user, permission, queryset, **self.shortcut_kwargs)
+
+
+def can_read(request, obj):
+    """Check if the user of a request can read a single object.
+
+    This mirrors HubuumObjectPermissionsFilter, for objects that are not fetched
+    through a filtered list (ie, related objects).
+    """
+    user = request.user
+    model_name = obj._meta.model_name  # pylint: disable=protected-access
+    if user.is_admin() or model_is_open(model_name):
+        return True
+
+    namespace = obj.pk if model_name == "namespace" else obj.namespace_id
+    return permission_snapshot(request).can("has_read", namespace)
+
+
+def is_indexed(model, name):
+    """Check if a field of a model is the leading column of an index."""
+    meta = model._meta  # pylint: disable=protected-access
+    field = meta.pk if name == "pk" else meta.get_field(name)
+    if field.primary_key or field.unique or field.db_index:
+        return True
+
+    leading = [index.fields[0] for index in meta.indexes if index.fields]
+    leading += [fields[0] for fields in meta.unique_together]
+    return name in leading
+
+
+def indexed_lookups(model, name):
+    """Return the lookups on a field of a model that can use an index.
+
+    - exact and in need an index on the field.
+    - range, gt, gte, lt, and lte need an index on a date, time or number field.
+    - iexact needs an index on Upper(field), as used by iexact in PostgreSQL.
+    - startswith needs a pattern (ie, varchar_pattern_ops) index on the field.
+    """
+    meta = model._meta  # pylint: disable=protected-access
+    field = meta.get_field(name)
+    lookups = []
+    if is_indexed(model, name):
+        lookups += EQUALITY_LOOKUPS
+        if isinstance(
+            field, (models.DateField, models.TimeField, models.IntegerField)
+        ) and not isinstance(field, models.ForeignKey):
+            lookups += RANGE_LOOKUPS
+
+    for index in meta.indexes:
+        if index.expressions == (Upper(name),):
+            lookups.append("iexact")
+        leading = index.fields[:1] == [name]
+        if leading and index.opclasses and index.opclasses[0] in PATTERN_OPCLASSES:
+            lookups.append("startswith")
+
+    return lookups
+
+
+class HubuumFieldFilter(filters.BaseFilterBackend):
+    """Filter objects on the values of their fields, using django-url-filter.
+
+    Views whitelist the fields that can be filtered on in filter_fields, ie
+    ?name=foo, ?name__in=foo,bar or ?updated_at__gte=2023-01-01. Every field must
+    be indexed, and only the lookups that can use the indexes of a field are
+    allowed, see indexed_lookups(). Foreign keys are filtered on the id of the
+    related object.
+
+    Invalid values and lookups, and filters on fields of the model that are not
+    whitelisted, are rejected with 400 rather than silently ignored.
+    """
+
+    _filtersets = {}
+
+    @classmethod
+    def get_filterset(cls, view, model):
+        """Return the filterset class for a view, building it on first use.
+
+        raises: ImproperlyConfigured if a field can't be filtered on efficiently.
+        """
+        if view.__class__ in cls._filtersets:
+            return cls._filtersets[view.__class__]
+
+        declared = {}
+        for name in getattr(view, "filter_fields", ()):
+            lookups = indexed_lookups(model, name)
+            if not lookups:
+                raise ImproperlyConfigured(
+                    f"{view.__class__.__name__} can't filter on {name}, "
+                    "it is not indexed."
+                )
+            field = model._meta.get_field(name)  # pylint: disable=protected-access
+            declared[name] = Filter(form_field=cls.form_field(field), lookups=lookups)
+
+        filterset = type(
+            f"{model.__name__}FilterSet",
+            (FilterSet,),
+            {**declared, "default_strict_mode": StrictMode.fail},
+        )
+        cls._filtersets[view.__class__] = filterset
+        return filterset
+
+    @staticmethod
+    def form_field(field):
+        """Return the form field used to clean filter values for a model field."""
+        if isinstance(field, models.ForeignKey):
+            field = field.target_field
+        if isinstance(field, (models.AutoField, models.IntegerField)):
+            return forms.IntegerField()
+        return field.formfield(required=True)
+
+    def filter_queryset(self, request, queryset, view):
+        """Perform the filtering."""
+        filter_fields = getattr(view, "filter_fields", ())
+        model = queryset.model
+        names = {
+            field.name
+            for field in model._meta.get_fields()  # pylint: disable=protected-access
+        }
+        for key in request.query_params:
+            name = key.split("__")[0].rstrip("!")
+            if name in names and name not in filter_fields:
+                raise ValidationError(
+                    code="invalid_filter",
+                    detail={key: f"Filtering on '{name}' is not supported."},
+                )
+
+        if not filter_fields:
+            return queryset
+
+        filterset = self.get_filterset(view, model)(
+            data=request.query_params, queryset=queryset
+        )
+        try:
+            return filterset.filter()
+        except DjangoValidationError as exc:
+            raise ValidationError(exc.message_dict) from exc
+
+    def get_schema_operation_parameters(self, view):
+        """Return the query parameters of the filters of a view."""
+        queryset = getattr(view, "queryset", None)
+        if queryset is None:
+            return []
+
+        parameters = []
+        for name in getattr(view, "filter_fields", ()):
+            for lookup in indexed_lookups(queryset.model, name):
+                parameters.append(
+                    {
+                        "name": name if lookup == "exact" else f"{name}__{lookup}",
+                        "required": False,
+                        "in": "query",
+                        "description": f"Filter on {name} ({lookup}).",
+                        "schema": {"type": "string"},
+                    }
+                )
+        return parameters
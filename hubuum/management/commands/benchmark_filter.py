@@ -0,0 +1,127 @@
+"""Benchmark the permission filtering of list views."""
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+
+from hubuum.cache import invalidate_permissions
+from hubuum.filters import HubuumObjectPermissionsFilter
+from hubuum.models import Host, Namespace, Permission, User
+from hubuum.permissions import permission_mask
+
+
+class Command(BaseCommand):
+    """Benchmark HubuumObjectPermissionsFilter.
+
+    The command populates the database with namespaces, groups, permissions, and
+    hosts, lists the hosts visible to a user with each filtering strategy, and
+    reports the latencies. Everything is done in a transaction that is rolled back,
+    but it should still not be run against a production database.
+
+    Strategies:
+      - subquery: the original nested IN (permissions IN groups of the user).
+      - ids: the namespace ids from the permission snapshot.
+      - exists: the correlated EXISTS.
+    """
+
+    help = "Benchmark the permission filter of list views (changes are rolled back)."
+
+    def add_arguments(self, parser):
+        """Add the sizing arguments."""
+        parser.add_argument("--namespaces", type=int, default=10000)
+        parser.add_argument("--groups", type=int, default=500)
+        parser.add_argument(
+            "--grants", type=int, default=5, help="Groups with read per namespace."
+        )
+        parser.add_argument(
+            "--memberships", type=int, default=20, help="Groups the user is in."
+        )
+        parser.add_argument("--hosts", type=int, default=10, help="Per namespace.")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Populate, run the benchmark, and roll back."""
+        with transaction.atomic():
+            user = self.populate(random.Random(options["seed"]), options)
+            for strategy in ["subquery", "ids", "exists"]:
+                timings, rows = self.run(strategy, user, options["repeat"])
+                self.stdout.write(
+                    f"{strategy:>8}: {rows} hosts, "
+                    f"median {statistics.median(timings) * 1000:.1f} ms, "
+                    f"best {min(timings) * 1000:.1f} ms"
+                )
+            transaction.set_rollback(True)
+
+    def populate(self, rng, options):
+        """Create the benchmark data, return the user to list hosts as."""
+        self.stdout.write(
+            f"Populating {options['namespaces']} namespaces, {options['groups']} "
+            f"groups, {options['hosts']} hosts per namespace..."
+        )
+        namespaces = Namespace.objects.bulk_create(
+            Namespace(name=f"benchmark-{i}") for i in range(options["namespaces"])
+        )
+        groups = Group.objects.bulk_create(
+            Group(name=f"benchmark-{i}") for i in range(options["groups"])
+        )
+        # Some backends don't return primary keys from bulk_create.
+        namespaces = list(Namespace.objects.filter(name__startswith="benchmark-"))
+        groups = list(Group.objects.filter(name__startswith="benchmark-"))
+
+        read = permission_mask(["has_read"])
+        Permission.objects.bulk_create(
+            (
+                Permission(namespace=namespace, group=group, mask=read)
+                for namespace in namespaces
+                for group in rng.sample(groups, options["grants"])
+            ),
+            batch_size=5000,
+        )
+        Host.objects.bulk_create(
+            (
+                Host(name=f"host-{namespace.id}-{i}", namespace=namespace)
+                for namespace in namespaces
+                for i in range(options["hosts"])
+            ),
+            batch_size=5000,
+        )
+
+        user = User.objects.create(username="benchmark-user")
+        user.groups.set(rng.sample(groups, options["memberships"]))
+        return user
+
+    @staticmethod
+    def run(strategy, user, repeat):
+        """List the hosts visible to the user repeat times, return timings and rows."""
+        hubuum_filter = HubuumObjectPermissionsFilter()
+        limit = {"ids": 10**9, "exists": -1}.get(strategy)
+
+        timings = []
+        rows = 0
+        for _ in range(repeat):
+            # Start every run from scratch, without cached permissions.
+            user = User.objects.get(pk=user.pk)
+            invalidate_permissions([user.pk])
+            start = time.perf_counter()
+            if strategy == "subquery":
+                readable = (
+                    Permission.objects.granting("has_read")
+                    .filter(group__in=user.groups.all())
+                    .values_list("namespace", flat=True)
+                )
+                queryset = Host.objects.filter(namespace__in=readable)
+            else:
+                with override_settings(HUBUUM_FILTER_MAX_NAMESPACE_IDS=limit):
+                    queryset = hubuum_filter.filter_queryset(
+                        SimpleNamespace(user=user), Host.objects.all(), None
+                    )
+            rows = len(list(queryset.order_by("id")))
+            timings.append(time.perf_counter() - start)
+
+        return timings, rows
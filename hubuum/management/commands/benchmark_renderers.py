@@ -0,0 +1,105 @@
+"""Benchmark the renderers of the API."""
+import statistics
+import time
+
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from hubuum.api.v1.serializers import (
+    HostSerializer,
+    NamespaceSerializer,
+    PermissionSerializer,
+)
+from hubuum.models import Host, Namespace, Permission
+from hubuum.permissions import permission_mask
+from hubuum.renderers import MessagePackRenderer, ORJSONRenderer
+
+
+class Command(BaseCommand):
+    """Benchmark encoding lists with the DRF JSON, orjson, and MessagePack renderers.
+
+    The command populates the database with namespaces, permissions, and hosts,
+    serializes the full list of each model, and reports the encode time and the
+    payload size of each renderer per model. Everything is done in a transaction
+    that is rolled back, but it should still not be run against a production
+    database.
+    """
+
+    help = "Benchmark the renderers per model (changes are rolled back)."
+
+    renderers = {
+        "drf-json": JSONRenderer,
+        "orjson": ORJSONRenderer,
+        "msgpack": MessagePackRenderer,
+    }
+
+    def add_arguments(self, parser):
+        """Add the sizing arguments."""
+        parser.add_argument("--objects", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Populate, run the benchmark, and roll back."""
+        with transaction.atomic():
+            self.populate(options["objects"])
+            for model, serializer in [
+                (Host, HostSerializer),
+                (Namespace, NamespaceSerializer),
+                (Permission, PermissionSerializer),
+            ]:
+                data = serializer(model.objects.all(), many=True).data
+                for name, renderer in self.renderers.items():
+                    timings, size = self.run(renderer(), data, options["repeat"])
+                    self.stdout.write(
+                        f"{model.__name__:>10} {name:>8}: {len(data)} objects, "
+                        f"median {statistics.median(timings) * 1000:.1f} ms, "
+                        f"{size / 1024:.0f} KiB"
+                    )
+            transaction.set_rollback(True)
+
+    def populate(self, objects):
+        """Create the benchmark data."""
+        self.stdout.write(f"Populating {objects} objects per model...")
+        Namespace.objects.bulk_create(
+            Namespace(name=f"benchmark-{i}", description=f"Namespace {i}")
+            for i in range(objects)
+        )
+        namespaces = list(Namespace.objects.filter(name__startswith="benchmark-"))
+        group = Group.objects.create(name="benchmark")
+        Permission.objects.bulk_create(
+            (
+                Permission(
+                    namespace=namespace,
+                    group=group,
+                    mask=permission_mask(["has_read", "has_update"]),
+                )
+                for namespace in namespaces
+            ),
+            batch_size=5000,
+        )
+        Host.objects.bulk_create(
+            (
+                Host(
+                    name=f"host-{i}",
+                    fqdn=f"host-{i}.example.com",
+                    serial=f"serial-{i}",
+                    namespace=namespace,
+                )
+                for i, namespace in enumerate(namespaces)
+            ),
+            batch_size=5000,
+        )
+
+    @staticmethod
+    def run(renderer, data, repeat):
+        """Render the data repeat times, return the timings and the payload size."""
+        timings = []
+        size = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            size = len(renderer.render(data, renderer.media_type))
+            timings.append(time.perf_counter() - start)
+
+        return timings, size
@@ -0,0 +1,79 @@
+"""Benchmark the representation of lists, with and without read plans."""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from hubuum.api.v1.views import HostList
+from hubuum.models import Host, Namespace, User
+
+
+class Command(BaseCommand):
+    """Benchmark listing hosts through the serializer and through the read plan.
+
+    The command populates the database with hosts, lists them through HostList as
+    an admin user (so permission filtering does not weigh in) with the read plan
+    (fast) and without it (serializer), and reports the rows per second of each.
+    Everything is done in a transaction that is rolled back, but it should still
+    not be run against a production database.
+    """
+
+    help = "Benchmark the fast read path of lists (changes are rolled back)."
+
+    def add_arguments(self, parser):
+        """Add the sizing arguments."""
+        parser.add_argument("--hosts", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Populate, run the benchmark, and roll back."""
+        with transaction.atomic():
+            user = self.populate(options["hosts"])
+            for path, fast in [("serializer", False), ("fast", True)]:
+                with override_settings(HUBUUM_FAST_READS=fast):
+                    timings, rows = self.run(user, options["repeat"])
+                self.stdout.write(
+                    f"{path:>10}: {rows} hosts, "
+                    f"median {statistics.median(timings) * 1000:.1f} ms, "
+                    f"{rows / statistics.median(timings):.0f} rows/s"
+                )
+            transaction.set_rollback(True)
+
+    def populate(self, hosts):
+        """Create the benchmark data, return the user to list hosts as."""
+        self.stdout.write(f"Populating {hosts} hosts...")
+        namespace = Namespace.objects.create(name="benchmark")
+        Host.objects.bulk_create(
+            (
+                Host(
+                    name=f"host-{i}",
+                    fqdn=f"host-{i}.example.com",
+                    serial=f"serial-{i}",
+                    namespace=namespace,
+                )
+                for i in range(hosts)
+            ),
+            batch_size=5000,
+        )
+        return User.objects.create(username="benchmark-user", is_superuser=True)
+
+    @staticmethod
+    def run(user, repeat):
+        """List the hosts repeat times, return the timings and the rows."""
+        view = HostList.as_view()
+        factory = APIRequestFactory()
+        timings = []
+        rows = 0
+        for _ in range(repeat):
+            request = factory.get("/api/v1/hosts/")
+            force_authenticate(request, user=user)
+            start = time.perf_counter()
+            response = view(request)
+            response.render()
+            timings.append(time.perf_counter() - start)
+            rows = len(response.data)
+
+        return timings, rows
@@ -0,0 +1,70 @@
+"""Rebuild and verify the materialized effective permissions."""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from hubuum.cache import invalidate_permissions
+from hubuum.models import EffectivePermission, User
+
+
+class Command(BaseCommand):
+    """Rebuild the EffectivePermission table from scratch and verify it.
+
+    The table is rebuilt in a single transaction from the live computation
+    (User.compute_namespace_permissions), and then verified against it. With
+    --verify-only, the table is only verified.
+    """
+
+    help = "Rebuild the effective permissions table and verify it."
+
+    def add_arguments(self, parser):
+        """Add the arguments."""
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="Only verify the table against the live computation.",
+        )
+
+    def handle(self, *args, **options):
+        """Rebuild and/or verify."""
+        if not options["verify_only"]:
+            self.rebuild()
+
+        mismatches = self.verify()
+        if mismatches:
+            raise CommandError(f"{mismatches} users have mismatching permissions.")
+        self.stdout.write("The effective permissions are consistent.")
+
+    def rebuild(self):
+        """Rebuild the table from scratch."""
+        with transaction.atomic():
+            EffectivePermission.objects.all().delete()
+            rows = []
+            user_ids = []
+            for user in User.objects.all().iterator():
+                user_ids.append(user.pk)
+                rows.extend(
+                    EffectivePermission(user=user, namespace_id=namespace, mask=mask)
+                    for namespace, mask in user.compute_namespace_permissions().items()
+                )
+            EffectivePermission.objects.bulk_create(rows, batch_size=5000)
+            # Only the permission entries, the cache may be shared.
+            invalidate_permissions(user_ids)
+
+        self.stdout.write(f"Rebuilt {len(rows)} effective permissions.")
+
+    def verify(self):
+        """Compare the table to the live computation, return the number of mismatches."""
+        mismatches = 0
+        for user in User.objects.all().iterator():
+            live = user.compute_namespace_permissions()
+            stored = dict(
+                EffectivePermission.objects.filter(user=user).values_list(
+                    "namespace_id", "mask"
+                )
+            )
+            if live != stored:
+                mismatches += 1
+                self.stderr.write(
+                    f"User {user.username} ({user.pk}): stored {stored}, live {live}"
+                )
+        return mismatches
@@ -0,0 +1,207 @@
+"""Middleware for hubuum."""
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+DEFAULT_ENCODINGS = ("zstd", "br", "gzip")
+DEFAULT_LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+
+
+class GzipCompressor:
+    """Incremental gzip compression."""
+
+    def __init__(self, level):
+        """Start a gzip stream."""
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        """Compress a chunk, returning the output that is ready (if any)."""
+        return self.compressor.compress(data)
+
+    def flush(self):
+        """Flush the compressed data so far, so it can be sent right away."""
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        """End the stream."""
+        return self.compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    """Incremental brotli compression."""
+
+    def __init__(self, level):
+        """Start a brotli stream."""
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        """Compress a chunk, returning the output that is ready (if any)."""
+        return self.compressor.process(data)
+
+    def flush(self):
+        """Flush the compressed data so far, so it can be sent right away."""
+        return self.compressor.flush()
+
+    def finish(self):
+        """End the stream."""
+        return self.compressor.finish()
+
+
+class ZstdCompressor:
+    """Incremental zstd compression."""
+
+    def __init__(self, level):
+        """Start a zstd stream."""
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        """Compress a chunk, returning the output that is ready (if any)."""
+        return self.compressor.compress(data)
+
+    def flush(self):
+        """Flush the compressed data so far, so it can be sent right away."""
+        return self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        """End the stream."""
+        return self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_compressors():
+    """Map the encodings supported by the installed libraries to their compressors."""
+    compressors = {"gzip": GzipCompressor}
+    if brotli is not None:
+        compressors["br"] = BrotliCompressor
+    if zstandard is not None:
+        compressors["zstd"] = ZstdCompressor
+    return compressors
+
+
+def accepted_encodings(header):
+    """Return the encodings accepted by an Accept-Encoding header, with q > 0.
+
+    ie, "gzip, br;q=0.5, zstd;q=0" -> {"gzip", "br"}. A "*" accepts every encoding
+    that is not listed with q=0.
+    """
+    accepted = set()
+    refused = set()
+    for item in header.split(","):
+        encoding, _, params = item.strip().partition(";")
+        encoding = encoding.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if encoding:
+            (accepted if quality > 0 else refused).add(encoding)
+
+    if "*" in accepted:
+        accepted.update(set(DEFAULT_ENCODINGS) - refused)
+    return accepted
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress responses with zstd, brotli, or gzip, as accepted by the client.
+
+    The encoding is the first of settings.HUBUUM_COMPRESSION_ENCODINGS (default
+    zstd, br, gzip) that the client accepts and that is available (brotli and zstd
+    need the brotli and zstandard packages). The compression level of each
+    encoding is set in settings.HUBUUM_COMPRESSION_LEVELS, lower levels trade
+    size for CPU.
+
+    Responses smaller than settings.HUBUUM_COMPRESSION_MIN_SIZE bytes are sent as
+    they are. Streamed responses are compressed chunk by chunk as they are sent,
+    and flushed to the client every settings.HUBUUM_COMPRESSION_FLUSH_SIZE bytes
+    of content, see compress_stream().
+
+    As the compressed bytes differ from the uncompressed ones, strong ETags are
+    made weak, as GZipMiddleware does.
+    """
+
+    def process_response(self, request, response):
+        """Compress the response if possible."""
+        if response.has_header("Content-Encoding") or response.status_code in (
+            204,
+            304,
+        ):
+            return response
+        if not response.streaming and len(response.content) < getattr(
+            settings, "HUBUUM_COMPRESSION_MIN_SIZE", 1024
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = self.select_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        levels = {
+            **DEFAULT_LEVELS,
+            **getattr(settings, "HUBUUM_COMPRESSION_LEVELS", {}),
+        }
+        compressor = available_compressors()[encoding](levels[encoding])
+        if response.streaming:
+            response.streaming_content = self.compress_stream(
+                compressor,
+                response.streaming_content,
+                getattr(settings, "HUBUUM_COMPRESSION_FLUSH_SIZE", 65536),
+            )
+            del response["Content-Length"]
+        else:
+            compressed = compressor.compress(response.content) + compressor.finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        etag = response.get("ETag")
+        if etag and not etag.startswith("W/"):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
+
+    @staticmethod
+    def select_encoding(header):
+        """Return the preferred available encoding accepted by the client, or None."""
+        accepted = accepted_encodings(header)
+        available = available_compressors()
+        preferred = getattr(settings, "HUBUUM_COMPRESSION_ENCODINGS", DEFAULT_ENCODINGS)
+        for encoding in preferred:
+            if encoding in accepted and encoding in available:
+                return encoding
+        return None
+
+    @staticmethod
+    def compress_stream(compressor, chunks, flush_size):
+        """Compress a stream chunk by chunk, flushing every flush_size bytes.
+
+        Flushing every chunk (ie, every line of NDJSON) would cost most of the
+        compression, as every flush ends a block, and small blocks compress
+        poorly. The client still gets the stream in steady increments.
+        """
+        pending = 0
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            pending += len(chunk)
+            if pending >= flush_size:
+                compressed += compressor.flush()
+                pending = 0
+            if compressed:
+                yield compressed
+        yield compressor.finish()
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:48
+
+from django.db import migrations, models
+
+# The bit order of hubuum.permissions.fully_qualified_operations() at the time of
+# this migration. Bit n is set if the permission at index n is granted.
+OPERATIONS = ("has_create", "has_read", "has_update", "has_delete", "has_namespace")
+
+
+def booleans_to_mask(apps, schema_editor):
+    """Fold the boolean permission columns into the mask."""
+    Permission = apps.get_model("hubuum", "Permission")
+    for permission in Permission.objects.all():
+        permission.mask = sum(
+            1 << bit
+            for bit, operation in enumerate(OPERATIONS)
+            if getattr(permission, operation)
+        )
+        permission.save(update_fields=["mask"])
+
+
+def mask_to_booleans(apps, schema_editor):
+    """Expand the mask into the boolean permission columns."""
+    Permission = apps.get_model("hubuum", "Permission")
+    for permission in Permission.objects.all():
+        for bit, operation in enumerate(OPERATIONS):
+            setattr(permission, operation, bool(permission.mask & (1 << bit)))
+        permission.save(update_fields=list(OPERATIONS))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hubuum", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="permission",
+            name="mask",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(booleans_to_mask, mask_to_booleans),
+        migrations.RemoveField(
+            model_name="permission",
+            name="has_create",
+        ),
+        migrations.RemoveField(
+            model_name="permission",
+            name="has_delete",
+        ),
+        migrations.RemoveField(
+            model_name="permission",
+            name="has_namespace",
+        ),
+        migrations.RemoveField(
+            model_name="permission",
+            name="has_read",
+        ),
+        migrations.RemoveField(
+            model_name="permission",
+            name="has_update",
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hubuum", "0002_permission_mask"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="permission",
+            name="inherit",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name="namespace",
+            index=models.Index(
+                fields=["name"],
+                name="namespace_name_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+    ]
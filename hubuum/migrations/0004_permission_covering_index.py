@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hubuum", "0003_namespace_hierarchy"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="permission",
+            index=models.Index(
+                fields=["group", "mask", "namespace"],
+                name="permission_group_mask_ns_idx",
+            ),
+        ),
+    ]
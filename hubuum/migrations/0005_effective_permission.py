@@ -0,0 +1,92 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate(apps, schema_editor):
+    """Materialize the effective permissions of every user.
+
+    A standalone version of User.compute_namespace_permissions at the time of this
+    migration, run 'manage.py rebuild_permissions' to rebuild the table later.
+    """
+    User = apps.get_model("hubuum", "User")
+    Namespace = apps.get_model("hubuum", "Namespace")
+    Permission = apps.get_model("hubuum", "Permission")
+    EffectivePermission = apps.get_model("hubuum", "EffectivePermission")
+
+    names = dict(Namespace.objects.values_list("id", "name"))
+    grants = {}
+    for group, namespace, mask, inherit in Permission.objects.values_list(
+        "group_id", "namespace_id", "mask", "inherit"
+    ):
+        grants.setdefault(group, []).append((namespace, mask, inherit))
+
+    rows = []
+    for user in User.objects.prefetch_related("groups"):
+        masks = {}
+        inherited = {}
+        for group in user.groups.all():
+            for namespace, mask, inherit in grants.get(group.id, []):
+                masks[namespace] = masks.get(namespace, 0) | mask
+                if inherit:
+                    inherited[names[namespace]] = (
+                        inherited.get(names[namespace], 0) | mask
+                    )
+        if inherited:
+            for namespace, name in names.items():
+                scope = name.split(".")
+                for i in range(1, len(scope)):
+                    ancestor = ".".join(scope[:i])
+                    if ancestor in inherited:
+                        masks[namespace] = masks.get(namespace, 0) | inherited[ancestor]
+        rows.extend(
+            EffectivePermission(user=user, namespace_id=namespace, mask=mask)
+            for namespace, mask in masks.items()
+            if mask
+        )
+
+    EffectivePermission.objects.bulk_create(rows, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hubuum", "0004_permission_covering_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EffectivePermission",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("mask", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "namespace",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="hubuum.namespace",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("user", "namespace")},
+            },
+        ),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:03
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hubuum", "0005_effective_permission"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="host",
+            index=models.Index(fields=["namespace", "id"], name="host_ns_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="host",
+            index=models.Index(fields=["name"], name="host_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="host",
+            index=models.Index(fields=["fqdn"], name="host_fqdn_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="host",
+            index=models.Index(
+                django.db.models.functions.text.Upper("fqdn"),
+                name="host_fqdn_upper_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="host",
+            index=models.Index(fields=["serial"], name="host_serial_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="hosttype",
+            index=models.Index(fields=["namespace", "id"], name="hosttype_ns_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="hosttype",
+            index=models.Index(fields=["name"], name="hosttype_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="jack",
+            index=models.Index(fields=["namespace", "id"], name="jack_ns_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="jack",
+            index=models.Index(fields=["name"], name="jack_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="person",
+            index=models.Index(fields=["namespace", "id"], name="person_ns_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="person",
+            index=models.Index(fields=["username"], name="person_username_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="person",
+            index=models.Index(
+                django.db.models.functions.text.Upper("username"),
+                name="person_username_upper_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="purchasedocuments",
+            index=models.Index(
+                fields=["namespace", "id"], name="purchasedocuments_ns_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="purchaseorder",
+            index=models.Index(
+                fields=["namespace", "id"], name="purchaseorder_ns_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="room",
+            index=models.Index(fields=["namespace", "id"], name="room_ns_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(fields=["email"], name="user_email_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="vendor",
+            index=models.Index(fields=["namespace", "id"], name="vendor_ns_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="vendor",
+            index=models.Index(fields=["vendor_name"], name="vendor_name_idx"),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hubuum", "0006_lookup_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="host",
+            index=models.Index(fields=["updated_at"], name="host_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="host",
+            index=models.Index(
+                fields=["name"],
+                name="host_name_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="host",
+            index=models.Index(
+                fields=["fqdn"],
+                name="host_fqdn_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="hosttype",
+            index=models.Index(fields=["updated_at"], name="hosttype_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="jack",
+            index=models.Index(fields=["updated_at"], name="jack_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="person",
+            index=models.Index(fields=["updated_at"], name="person_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="purchasedocuments",
+            index=models.Index(
+                fields=["updated_at"], name="purchasedocuments_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="purchaseorder",
+            index=models.Index(fields=["updated_at"], name="purchaseorder_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="room",
+            index=models.Index(fields=["updated_at"], name="room_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="room",
+            index=models.Index(fields=["room_id"], name="room_room_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="vendor",
+            index=models.Index(fields=["updated_at"], name="vendor_updated_idx"),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:18
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hubuum", "0007_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model", models.CharField(max_length=100)),
+                ("object_id", models.BigIntegerField()),
+                ("namespace", models.BigIntegerField()),
+                ("deleted_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("readers", models.JSONField(blank=True, default=list)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["deleted_at", "id"], name="tombstone_deleted_idx"
+                    ),
+                    models.Index(
+                        fields=["model", "deleted_at", "id"], name="tombstone_model_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
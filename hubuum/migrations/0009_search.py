@@ -0,0 +1,59 @@
+"""Add generated tsvector columns with GIN indexes for full-text search.
+
+PostgreSQL only, see hubuum.search. The columns are not known to the models, and
+are maintained by the database. Other databases search without them.
+"""
+
+from django.db import migrations
+
+# A frozen copy of hubuum.search.SEARCH_FIELDS, by table.
+SEARCH_FIELDS = {
+    "hubuum_host": (("name", "A"), ("fqdn", "A"), ("serial", "B")),
+    "hubuum_person": (("username", "A"), ("email", "B"), ("department", "C")),
+    "hubuum_room": (("room_id", "A"), ("building", "B")),
+    "hubuum_vendor": (("vendor_name", "A"),),
+    "hubuum_purchaseorder": (("po_number", "A"),),
+}
+
+
+def vector_sql(fields):
+    """Return the SQL of the tsvector of a row."""
+    return " || ".join(
+        f"setweight(to_tsvector('simple', coalesce(\"{name}\", '')), '{weight}')"
+        for name, weight in fields
+    )
+
+
+def add_search_columns(apps, schema_editor):
+    """Add the search columns and their indexes."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for table, fields in SEARCH_FIELDS.items():
+        schema_editor.execute(
+            f'ALTER TABLE "{table}" ADD COLUMN "search_vector" tsvector '
+            f"GENERATED ALWAYS AS ({vector_sql(fields)}) STORED"
+        )
+        schema_editor.execute(
+            f'CREATE INDEX "{table}_search_idx" ON "{table}" '
+            'USING gin ("search_vector")'
+        )
+
+
+def remove_search_columns(apps, schema_editor):
+    """Remove the search columns, and with them their indexes."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for table in SEARCH_FIELDS:
+        schema_editor.execute(f'ALTER TABLE "{table}" DROP COLUMN "search_vector"')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hubuum", "0008_tombstones"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_columns, remove_search_columns),
+    ]
@@ -0,0 +1,78 @@
+"""Move the readers of tombstones from a JSON list to an indexed table."""
+# Generated by Django 4.2.30 on 2026-10-18 18:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_readers(apps, schema_editor):
+    """Copy the readers of the existing tombstones to the table."""
+    Tombstone = apps.get_model("hubuum", "Tombstone")
+    TombstoneReader = apps.get_model("hubuum", "TombstoneReader")
+    User = apps.get_model("hubuum", "User")
+    users = set(User.objects.values_list("id", flat=True))
+    TombstoneReader.objects.bulk_create(
+        TombstoneReader(tombstone_id=pk, user_id=user_id)
+        for pk, readers in Tombstone.objects.exclude(readers=[]).values_list(
+            "id", "readers"
+        )
+        for user_id in readers
+        if user_id in users
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hubuum", "0009_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TombstoneReader",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(
+                fields=["namespace", "deleted_at", "id"], name="tombstone_namespace_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="tombstonereader",
+            name="tombstone",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="readers",
+                to="hubuum.tombstone",
+            ),
+        ),
+        migrations.AddField(
+            model_name="tombstonereader",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tombstonereader",
+            index=models.Index(
+                fields=["user", "tombstone"], name="tombstonereader_user_idx"
+            ),
+        ),
+        migrations.RunPython(copy_readers, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="tombstone",
+            name="readers",
+        ),
+    ]
@@ -1,14 +1,29 @@
 """Models for the hubuum project."""
 # from datetime import datetime
 import re
+from contextlib import contextmanager
+from threading import local
 
 from django.apps import apps
 from django.contrib.auth.models import AbstractUser, Group
-from django.db import models
-from rest_framework.exceptions import NotFound
-
+from django.db import models, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Concat, Substr, Upper
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+
+from hubuum.cache import (
+    get_cached_permissions,
+    invalidate_permissions,
+    set_cached_permissions,
+)
 from hubuum.exceptions import MissingParam
-from hubuum.permissions import fully_qualified_operations, operation_exists
+from hubuum.permissions import (
+    fully_qualified_operations,
+    operation_exists,
+    permission_bit,
+    permission_mask,
+)
 
 
 def model_exists(model):
@@ -41,6 +56,14 @@ class User(AbstractUser):
 
     _group_list = None
 
+    class Meta(AbstractUser.Meta):
+        """Metadata for users."""
+
+        indexes = [
+            # The username is unique (and thus indexed), the email isn't.
+            models.Index(fields=["email"], name="user_email_idx"),
+        ]
+
     def is_admin(self):
         """Check if the user is any type of admin (staff/superadmin) (or in a similar group?)."""
         return self.is_staff or self.is_superuser
@@ -66,7 +89,64 @@ class User(AbstractUser):
 
     def is_member_of_any(self, groups):
         """Check to see if a user is a member of any of the groups in the list."""
-        return bool([i for i in groups if i in self.groups.all()])
+        return self.groups.filter(pk__in=[group.pk for group in groups]).exists()
+
+    def namespace_permissions(self) -> dict:
+        """Map namespace ids to the permission mask the user holds for the namespace.
+
+        The map is read from the materialized EffectivePermission rows of the user,
+        in a single query, and is cached across requests, see hubuum.cache.
+
+        return {namespace_id: mask} (may be empty)
+        """
+        masks = get_cached_permissions(self.pk)
+        if masks is not None:
+            return masks
+
+        masks = dict(
+            EffectivePermission.objects.filter(user=self).values_list(
+                "namespace_id", "mask"
+            )
+        )
+        set_cached_permissions(self.pk, masks)
+        return masks
+
+    def compute_namespace_permissions(self) -> dict:
+        """Compute the namespace permission map of the user from the permissions.
+
+        The mask is the union of the permissions granted to every group the user is a
+        member of, including permissions inherited from ancestor namespaces (see
+        Permission.inherit). The direct permissions are loaded in a single query, and
+        if any of them are inherited, the descendants of those namespaces are loaded
+        in a second.
+
+        This is the live computation behind EffectivePermission, use
+        namespace_permissions() to look up the permissions of a user.
+
+        return {namespace_id: mask} (may be empty)
+        """
+        masks = {}
+        inherited = {}
+        rows = Permission.objects.filter(group__user=self).values_list(
+            "namespace_id", "mask", "inherit", "namespace__name"
+        )
+        for namespace_id, mask, inherit, name in rows:
+            masks[namespace_id] = masks.get(namespace_id, 0) | mask
+            if inherit:
+                inherited[name] = inherited.get(name, 0) | mask
+
+        if inherited:
+            descendants = Q()
+            for name in inherited:
+                descendants |= Q(name__startswith=f"{name}.")
+            rows = Namespace.objects.filter(descendants).values_list("id", "name")
+            for namespace_id, name in rows:
+                mask = masks.get(namespace_id, 0)
+                for ancestor in Namespace.ancestor_names(name):
+                    mask |= inherited.get(ancestor, 0)
+                masks[namespace_id] = mask
+
+        return {namespace_id: mask for namespace_id, mask in masks.items() if mask}
 
     def namespaced_can(self, perm, namespace) -> bool:
         """Check to see if the user can perform perm for namespace.
@@ -80,8 +160,8 @@ class User(AbstractUser):
 
         # We need to check if the user is a member of a group
         # that has the given permission the namespace.
-        groups = namespace.groups_that_can(perm)
-        return self.is_member_of_any(groups)
+        mask = self.namespace_permissions().get(namespace.pk, 0)
+        return bool(mask & permission_bit(perm))
 
     def has_namespace(
         self,
@@ -94,8 +174,8 @@ class User(AbstractUser):
 
         For users, if the namespace isn't scoped (contains no dots), return False.
         Otherwise, check if the user can:
-          - create the namespace (using has_namespace) or,
-          - create objects in the namespace (using has_create) on the last element.
+          - create the namespace (using has_namespace) on the parent namespace or,
+          - create objects in the namespace (using has_create) on the namespace itself.
         """
         if isinstance(namespace, int):
             try:
@@ -108,8 +188,9 @@ class User(AbstractUser):
         if len(scope) == 1:
             return False
 
+        target = namespace
         if write_perm == "has_namespace":
-            target = scope[-2]
+            target = Namespace.parent_name(namespace)
 
         try:
             namespace_obj = Namespace.objects.get(name=target)
@@ -152,9 +233,8 @@ class User(AbstractUser):
 
         # We should always get an object to test against.
         if obj:
-            return Permission.objects.filter(
-                namespace=obj.namespace, **{field: True}, group__in=self.groups.all()
-            ).exists()
+            mask = self.namespace_permissions().get(obj.namespace_id, 0)
+            return bool(mask & permission_bit(field))
 
         return False
 
@@ -192,22 +272,135 @@ class NamespacedHubuumModel(HubuumModel):
         """Meta data for the class."""
 
         abstract = True
+        indexes = [
+            # Lists are filtered by namespace and ordered by id.
+            models.Index(fields=["namespace", "id"], name="%(class)s_ns_id_idx"),
+            models.Index(fields=["updated_at"], name="%(class)s_updated_idx"),
+        ]
 
 
 class Namespace(HubuumModel):
-    """The namespace ('domain') of an object."""
+    """The namespace ('domain') of an object.
+
+    Namespaces form a tree through their names, the name of a namespace is the
+    dotted path from its root, ie "a.b.c" is the child of "a.b", which is the child
+    of the root "a". The name thus doubles as a materialized path:
+      - The ancestors of a namespace are fetched by exact name, in a single query
+        against the unique index on name.
+      - The descendants of a namespace are fetched by name prefix, using the
+        pattern index on name.
+
+    Renaming a namespace renames all its descendants accordingly.
+    """
 
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField(blank=True)
 
+    # Set by save() to the name the namespace had before it was renamed.
+    previous_name = None
+
+    class Meta:
+        """Meta data for the class."""
+
+        indexes = [
+            # The unique index on name can't be used for prefix matching with
+            # LIKE in PostgreSQL unless the database uses the C locale.
+            models.Index(
+                fields=["name"],
+                name="namespace_name_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
+
+    @staticmethod
+    def ancestor_names(name):
+        """Return the names of the ancestors of a namespace name, root first.
+
+        ie, "a.b.c" -> ["a", "a.b"]
+        """
+        scope = name.split(".")
+        return [".".join(scope[:i]) for i in range(1, len(scope))]
+
+    @staticmethod
+    def parent_name(name):
+        """Return the name of the parent of a namespace name, or None for roots."""
+        ancestors = Namespace.ancestor_names(name)
+        return ancestors[-1] if ancestors else None
+
+    def ancestors(self):
+        """Return the existing ancestors of the namespace (a queryset, one query)."""
+        return Namespace.objects.filter(name__in=self.ancestor_names(self.name))
+
+    def descendants(self):
+        """Return all namespaces scoped under the namespace (a queryset, one query)."""
+        return Namespace.objects.filter(name__startswith=f"{self.name}.")
+
+    def get_parent(self):
+        """Return the parent namespace, or None if it is a root or does not exist."""
+        parent = self.parent_name(self.name)
+        if parent is None:
+            return None
+        return Namespace.objects.filter(name=parent).first()
+
+    def save(self, *args, **kwargs):
+        """Save the namespace, renaming the descendants if the namespace is renamed."""
+        with transaction.atomic():
+            old_name = None
+            if self.pk is not None:
+                old_name = (
+                    Namespace.objects.filter(pk=self.pk)
+                    .values_list("name", flat=True)
+                    .first()
+                )
+
+            # Set before saving, as the post_save signal handlers use it.
+            self.previous_name = None
+            if old_name is not None and old_name != self.name:
+                self.previous_name = old_name
+                # The descendants are moved first, so the tree is complete when
+                # the post_save signal handlers run.
+                renamed = Namespace.objects.filter(name__startswith=f"{old_name}.")
+                self.check_renamed(old_name, renamed)
+                renamed.update(
+                    name=Concat(Value(self.name), Substr("name", len(old_name) + 1)),
+                    updated_at=timezone.now(),
+                )
+
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        """Delete the namespace, recording the tombstones of its objects at once."""
+        with transaction.atomic(), Tombstone.deferred():
+            return super().delete(*args, **kwargs)
+
+    def check_renamed(self, old_name, renamed):
+        """Check that renaming the descendants won't collide with other namespaces.
+
+        raises: ValidationError if a descendant would get the name of an existing
+        namespace.
+        """
+        start = len(old_name)
+        names = {
+            self.name + name[start:] for name in renamed.values_list("name", flat=True)
+        }
+        taken = sorted(
+            Namespace.objects.filter(name__in=names)
+            .exclude(name__startswith=f"{old_name}.")
+            .values_list("name", flat=True)
+        )
+        if taken:
+            raise ValidationError(
+                code="namespace_exists",
+                detail={"name": f"Renaming would replace existing namespaces: {taken}"},
+            )
+
     def grant_all(self, group):
         """Grant all permissions to the namespace to the given group."""
-        create = {}
-        create["namespace"] = self
-        create["group"] = group
-        for perm in fully_qualified_operations():
-            create[perm] = True
-        Permission.objects.update_or_create(**create)
+        Permission.objects.update_or_create(
+            namespace=self,
+            group=group,
+            defaults={"mask": permission_mask(fully_qualified_operations())},
+        )
         return True
 
     def groups_that_can(self, perm):
@@ -216,13 +409,39 @@ class Namespace(HubuumModel):
         param: perm (permission string, 'has_[read|create|update|delete|namespace])
         return [group objects] (may be empty)
         """
-        qs = Permission.objects.filter(namespace=self.id, **{perm: True}).values(
-            "group"
-        )
+        qs = Permission.objects.filter(namespace=self.id).granting(perm).values("group")
         groups = Group.objects.filter(id__in=qs)
         return groups
 
 
+class PermissionQuerySet(models.QuerySet):
+    """QuerySet for models with a permission mask, adds bitwise filtering on the mask."""
+
+    def granting(self, *perms):
+        """Filter for rows that grant all of the given permissions.
+
+        param: perms (permission strings, 'has_[create|read|update|delete|namespace])
+        """
+        mask = permission_mask(perms)
+        return self.alias(granted=F("mask").bitand(mask)).filter(granted=mask)
+
+
+def permission_flag(perm):
+    """Expose a single permission of Permission.mask as a boolean property."""
+    bit = permission_bit(perm)
+
+    def getter(self):
+        return bool(self.mask & bit)
+
+    def setter(self, value):
+        if value:
+            self.mask |= bit
+        else:
+            self.mask &= ~bit
+
+    return property(getter, setter, doc=f"True if the permission grants {perm}.")
+
+
 class Permission(HubuumModel):
     """
     Permissions in Hubuum.
@@ -234,6 +453,14 @@ class Permission(HubuumModel):
     The permission `has_namespace` allows for the group to create new namespaces scoped
     under the current one.
 
+    If `inherit` is set, the permission also applies to every namespace scoped under
+    the namespace (see Namespace), ie a permission for "a" with inherit set also
+    grants access to "a.b" and "a.b.c".
+
+    The permissions themselves are stored as a bitmask (see permissions.permission_bit)
+    in `mask`, and are exposed as the boolean properties has_create, has_read,
+    has_update, has_delete, and has_namespace. The properties may also be passed when
+    creating objects, ie Permission(namespace=ns, group=group, has_read=True).
     """
 
     # If the namespace the permission points to goes away, clear the entry.
@@ -245,11 +472,16 @@ class Permission(HubuumModel):
         "auth.Group", related_name="p_group", on_delete=models.CASCADE
     )
 
-    has_create = models.BooleanField(null=False, default=False)
-    has_read = models.BooleanField(null=False, default=False)
-    has_update = models.BooleanField(null=False, default=False)
-    has_delete = models.BooleanField(null=False, default=False)
-    has_namespace = models.BooleanField(null=False, default=False)
+    mask = models.PositiveSmallIntegerField(null=False, default=0)
+    inherit = models.BooleanField(null=False, default=False)
+
+    has_create = permission_flag("has_create")
+    has_read = permission_flag("has_read")
+    has_update = permission_flag("has_update")
+    has_delete = permission_flag("has_delete")
+    has_namespace = permission_flag("has_namespace")
+
+    objects = PermissionQuerySet.as_manager()
 
     class Meta:
         """Metadata permissions."""
@@ -258,6 +490,190 @@ class Permission(HubuumModel):
             "namespace",
             "group",
         )
+        indexes = [
+            # Covers the permission lookups of the list filter (group -> readable
+            # namespaces), allowing index-only scans.
+            models.Index(
+                fields=["group", "mask", "namespace"],
+                name="permission_group_mask_ns_idx",
+            ),
+        ]
+
+
+class EffectivePermission(models.Model):
+    """The effective permissions of a user in a namespace.
+
+    This is derived data, materialized from Permission, group memberships, and the
+    namespace tree (see User.compute_namespace_permissions). There is one row per
+    user and namespace where the user has any permissions, including inherited
+    permissions, so permission checks and list filtering read a single indexed row.
+
+    The rows are kept up to date by the signal handlers in hubuum.signals, via
+    refresh(). The management command rebuild_permissions rebuilds the table from
+    scratch and verifies it against the live computation.
+    """
+
+    user = models.ForeignKey("User", on_delete=models.CASCADE)
+    namespace = models.ForeignKey("Namespace", on_delete=models.CASCADE)
+    mask = models.PositiveSmallIntegerField(null=False, default=0)
+
+    objects = PermissionQuerySet.as_manager()
+
+    class Meta:
+        """Metadata for effective permissions."""
+
+        unique_together = (
+            "user",
+            "namespace",
+        )
+
+    @classmethod
+    def refresh(cls, user_ids):
+        """Bring the rows of the given users in line with their live permissions.
+
+        Only rows that differ are written. The cached permissions of the users are
+        invalidated.
+        """
+        user_ids = set(user_ids)
+        for user in User.objects.filter(pk__in=user_ids):
+            live = user.compute_namespace_permissions()
+            current = dict(
+                cls.objects.filter(user=user).values_list("namespace_id", "mask")
+            )
+
+            stale = [ns for ns in current if ns not in live]
+            if stale:
+                cls.objects.filter(user=user, namespace__in=stale).delete()
+
+            for namespace_id, mask in live.items():
+                if namespace_id in current and current[namespace_id] != mask:
+                    cls.objects.filter(user=user, namespace=namespace_id).update(
+                        mask=mask
+                    )
+
+            cls.objects.bulk_create(
+                cls(user=user, namespace_id=namespace_id, mask=mask)
+                for namespace_id, mask in live.items()
+                if namespace_id not in current
+            )
+
+        invalidate_permissions(user_ids)
+
+
+# The tombstones waiting to be recorded, see Tombstone.deferred().
+_deferred_tombstones = local()
+
+
+class Tombstone(models.Model):
+    """A record of a deleted object, for clients syncing through the change feed.
+
+    A tombstone is written for every deleted namespace and namespaced object,
+    including objects removed by cascades, see hubuum.signals. Tombstones hold no
+    foreign keys, so they outlive the objects (and namespaces) they refer to.
+
+    Tombstones are readable by the users that can read the namespace they were in.
+    As the permissions to a namespace go away with the namespace, the tombstone of
+    a namespace also records the users that could read it (see TombstoneReader),
+    and those users can read the tombstones in the namespace.
+    """
+
+    model = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    namespace = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    # The ids of the users that could read a deleted namespace, set by build().
+    reader_ids = ()
+
+    class Meta:
+        """Metadata for tombstones."""
+
+        indexes = [
+            # The change feed is ordered by deleted_at, with or without a model,
+            # and filtered on the namespaces the user can read.
+            models.Index(fields=["deleted_at", "id"], name="tombstone_deleted_idx"),
+            models.Index(
+                fields=["model", "deleted_at", "id"], name="tombstone_model_idx"
+            ),
+            models.Index(
+                fields=["namespace", "deleted_at", "id"],
+                name="tombstone_namespace_idx",
+            ),
+        ]
+
+    @classmethod
+    def build(cls, obj):
+        """Return an (unsaved) tombstone for a namespace or a namespaced object."""
+        meta = obj._meta  # pylint: disable=protected-access
+        if isinstance(obj, Namespace):
+            namespace = obj.pk
+        else:
+            namespace = obj.namespace_id
+        tombstone = cls(model=meta.model_name, object_id=obj.pk, namespace=namespace)
+        tombstone.reader_ids = sorted(getattr(obj, "readers", []))
+        return tombstone
+
+    @staticmethod
+    def add_readers(tombstones):
+        """Record the readers of saved tombstones, in one query."""
+        TombstoneReader.objects.bulk_create(
+            TombstoneReader(tombstone=tombstone, user_id=user_id)
+            for tombstone in tombstones
+            for user_id in tombstone.reader_ids
+        )
+
+    @classmethod
+    def record(cls, obj):
+        """Record the deletion of a namespace or a namespaced object.
+
+        Within deferred(), the tombstone is recorded as the block exits.
+        """
+        tombstone = cls.build(obj)
+        pending = getattr(_deferred_tombstones, "pending", None)
+        if pending is None:
+            tombstone.save()
+            cls.add_readers([tombstone])
+        else:
+            pending.append(tombstone)
+        return tombstone
+
+    @classmethod
+    @contextmanager
+    def deferred(cls):
+        """Record the tombstones of the objects deleted in the block with one INSERT.
+
+        Otherwise every deleted object costs an INSERT of its own, which dominates
+        deleting namespaces (with their objects) and deleting objects in bulk. The
+        tombstones are recorded as the block exits, so the block should run in the
+        transaction of the deletes. Nested blocks record with the outermost one.
+        """
+        if getattr(_deferred_tombstones, "pending", None) is not None:
+            yield
+            return
+
+        _deferred_tombstones.pending = []
+        try:
+            yield
+            cls.add_readers(cls.objects.bulk_create(_deferred_tombstones.pending))
+        finally:
+            _deferred_tombstones.pending = None
+
+
+class TombstoneReader(models.Model):
+    """A user that could read a deleted namespace, see Tombstone."""
+
+    tombstone = models.ForeignKey(
+        Tombstone, on_delete=models.CASCADE, related_name="readers"
+    )
+    user = models.ForeignKey("User", on_delete=models.CASCADE)
+
+    class Meta:
+        """Metadata for tombstone readers."""
+
+        indexes = [
+            # The deleted namespaces a user could read.
+            models.Index(fields=["user", "tombstone"], name="tombstonereader_user_idx"),
+        ]
 
 
 class Host(NamespacedHubuumModel):
@@ -296,6 +712,28 @@ class Host(NamespacedHubuumModel):
         null=True,
     )
 
+    class Meta(NamespacedHubuumModel.Meta):
+        """Meta data for the class."""
+
+        indexes = [
+            *NamespacedHubuumModel.Meta.indexes,
+            models.Index(fields=["name"], name="host_name_idx"),
+            models.Index(fields=["fqdn"], name="host_fqdn_idx"),
+            models.Index(Upper("fqdn"), name="host_fqdn_upper_idx"),
+            models.Index(fields=["serial"], name="host_serial_idx"),
+            # For prefix matching with LIKE, see Namespace.
+            models.Index(
+                fields=["name"],
+                name="host_name_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+            models.Index(
+                fields=["fqdn"],
+                name="host_fqdn_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
+
     def __str__(self):
         """Stringify the object, used to represent the object towards users."""
         return self.name
@@ -387,6 +825,14 @@ class HostType(NamespacedHubuumModel):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
 
+    class Meta(NamespacedHubuumModel.Meta):
+        """Meta data for the class."""
+
+        indexes = [
+            *NamespacedHubuumModel.Meta.indexes,
+            models.Index(fields=["name"], name="hosttype_name_idx"),
+        ]
+
     def __str__(self):
         """Stringify the object, used to represent the object towards users."""
         return self.name
@@ -409,6 +855,14 @@ class Jack(NamespacedHubuumModel):
     )
     building = models.CharField(max_length=255, blank=True, null=True)
 
+    class Meta(NamespacedHubuumModel.Meta):
+        """Meta data for the class."""
+
+        indexes = [
+            *NamespacedHubuumModel.Meta.indexes,
+            models.Index(fields=["name"], name="jack_name_idx"),
+        ]
+
     def __str__(self):
         """Stringify the object, used to represent the object towards users."""
         return self.name
@@ -430,6 +884,15 @@ class Person(NamespacedHubuumModel):
     office_phone = models.CharField(max_length=255, blank=True, null=True)
     mobile_phone = models.CharField(max_length=255, blank=True, null=True)
 
+    class Meta(NamespacedHubuumModel.Meta):
+        """Meta data for the class."""
+
+        indexes = [
+            *NamespacedHubuumModel.Meta.indexes,
+            models.Index(fields=["username"], name="person_username_idx"),
+            models.Index(Upper("username"), name="person_username_upper_idx"),
+        ]
+
     def __str__(self):
         """Stringify the object, used to represent the object towards users."""
         return self.username
@@ -447,7 +910,7 @@ class PurchaseDocuments(NamespacedHubuumModel):
     )
     document = models.BinaryField(blank=False, null=False)
 
-    class Meta:
+    class Meta(NamespacedHubuumModel.Meta):
         """Set permissions and other metadata."""
 
         verbose_name_plural = "purchase documents"
@@ -488,6 +951,14 @@ class Room(NamespacedHubuumModel):
     building = models.CharField(max_length=255, blank=True, null=True)
     floor = models.CharField(max_length=255, blank=True, null=True)
 
+    class Meta(NamespacedHubuumModel.Meta):
+        """Meta data for the class."""
+
+        indexes = [
+            *NamespacedHubuumModel.Meta.indexes,
+            models.Index(fields=["room_id"], name="room_room_id_idx"),
+        ]
+
     def __str__(self):
         """Stringify the object, used to represent the object towards users."""
         return self.building + "-" + self.floor.rjust(2, "0") + "-" + self.room_id
@@ -506,6 +977,14 @@ class Vendor(NamespacedHubuumModel):
     contact_email = models.EmailField()
     contact_phone = models.CharField(max_length=255, blank=True, null=True)
 
+    class Meta(NamespacedHubuumModel.Meta):
+        """Meta data for the class."""
+
+        indexes = [
+            *NamespacedHubuumModel.Meta.indexes,
+            models.Index(fields=["vendor_name"], name="vendor_name_idx"),
+        ]
+
     def __str__(self):
         """Stringify the object, used to represent the object towards users."""
         return self.vendor_name
@@ -0,0 +1,288 @@
+"""Pagination for hubuum list views.
+
+Lists are paginated by keyset, ie, the cursor holds the values of the ordering
+fields of the last object on the page, and the next page is the objects ordered
+after it. Fetching a page thus costs the same no matter how deep the client pages,
+and pages stay stable when objects are inserted or deleted concurrently.
+
+Pagination is enabled by the client, by passing page_size, cursor, or count as a
+query parameter. Without any of them, the full list is returned as before. Change
+feeds are always paginated, see FeedPagination. Streamed (NDJSON) lists are never
+paginated, and reject the parameters, see HubuumList.list.
+
+Pages are not counted unless the client asks for it with ?count=, as counting a
+permission-filtered list costs more than fetching a page of it:
+  - count=none (the default) skips counting.
+  - count=estimate uses the row estimate of the query planner, falling back to an
+    exact count for small lists and for databases without planner estimates.
+  - count=exact counts the full (filtered) list.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import ValidationError as APIValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Keyset (cursor) pagination on the ordering of the queryset of a view.
+
+    The ordering is the order_by of the queryset, or the ordering of the model,
+    with the primary key appended as a tie-breaker if no ordering field is unique.
+    The ordering fields must be non-nullable fields of the model itself.
+
+    The cursors are opaque to the client, and carry the position (the values of the
+    ordering fields of an object) and the direction of the page.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    count_query_param = "count"
+    count_modes = ("none", "estimate", "exact")
+    invalid_cursor_message = "Invalid cursor."
+
+    def __init__(self):
+        """Read the page sizes from the settings."""
+        self.page_size = getattr(settings, "HUBUUM_PAGE_SIZE", 100)
+        self.max_page_size = getattr(settings, "HUBUUM_MAX_PAGE_SIZE", 1000)
+        self.base_url = None
+        self.ordering = None
+        self.next_position = None
+        self.previous_position = None
+        self.count = None
+
+    def is_requested(self, request):
+        """Check if the client asked for a paginated response."""
+        params = request.query_params
+        return any(
+            param in params
+            for param in (
+                self.cursor_query_param,
+                self.page_size_query_param,
+                self.count_query_param,
+            )
+        )
+
+    def get_count_mode(self, request):
+        """Return the count mode requested by the client.
+
+        raises: ValidationError if the mode is unknown.
+        """
+        mode = request.query_params.get(self.count_query_param) or "none"
+        if mode not in self.count_modes:
+            raise APIValidationError(
+                code="invalid_count",
+                detail={self.count_query_param: f"Must be one of {self.count_modes}."},
+            )
+        return mode
+
+    @staticmethod
+    def estimate_count(queryset):
+        """Return the number of objects in the queryset, as estimated by the planner.
+
+        Estimates below settings.HUBUUM_EXACT_COUNT_THRESHOLD are replaced by exact
+        counts, as the planner is least accurate (relatively) for small results,
+        and small results are cheap to count. Databases other than PostgreSQL get
+        exact counts.
+        """
+        threshold = getattr(settings, "HUBUUM_EXACT_COUNT_THRESHOLD", 1000)
+        if connections[queryset.db].vendor == "postgresql":
+            plan = json.loads(queryset.order_by().explain(format="json"))
+            estimate = int(plan[0]["Plan"]["Plan Rows"])
+            if estimate >= threshold:
+                return estimate
+
+        return queryset.count()
+
+    def get_page_size(self, request):
+        """Return the page size requested by the client, within the limits."""
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        return min(max(size, 1), self.max_page_size)
+
+    @staticmethod
+    def get_ordering(queryset):
+        """Return the ordering of a queryset as a list of (field, descending)."""
+        meta = queryset.model._meta  # pylint: disable=protected-access
+        ordering = []
+        for name in queryset.query.order_by or meta.ordering or ():
+            descending = name.startswith("-")
+            name = name.lstrip("-")
+            field = meta.pk if name == "pk" else meta.get_field(name)
+            ordering.append((field, descending))
+
+        if not any(field.primary_key or field.unique for field, _ in ordering):
+            ordering.append((meta.pk, False))
+
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return a page of the queryset, or None if pagination was not requested."""
+        if not self.is_requested(request):
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(queryset)
+        page_size = self.get_page_size(request)
+        mode = self.get_count_mode(request)
+        if mode == "exact":
+            self.count = queryset.count()
+        elif mode == "estimate":
+            self.count = self.estimate_count(queryset)
+        position, reverse = self.decode_cursor(request)
+
+        ordering = [
+            (field, descending != reverse) for field, descending in self.ordering
+        ]
+        queryset = queryset.order_by(
+            *[
+                ("-" if descending else "") + field.name
+                for field, descending in ordering
+            ]
+        )
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+
+        results = list(queryset[: page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+
+        first = self.position(results[0]) if results else None
+        last = self.position(results[-1]) if results else None
+        if reverse:
+            self.next_position = last
+            self.previous_position = first if has_more else None
+        else:
+            self.next_position = last if has_more else None
+            self.previous_position = first if position is not None else None
+
+        return results
+
+    @staticmethod
+    def after(ordering, position):
+        """Return a condition for the objects ordered after the position.
+
+        For the ordering (a, b) that is: a > x OR (a = x AND b > y).
+        """
+        condition = Q()
+        equal = {}
+        for (field, descending), value in zip(ordering, position):
+            lookup = "lt" if descending else "gt"
+            condition |= Q(**equal, **{f"{field.name}__{lookup}": value})
+            equal[field.name] = value
+
+        return condition
+
+    def position(self, obj):
+        """Return the values of the ordering fields of an object."""
+        return [field.value_to_string(obj) for field, _ in self.ordering]
+
+    def decode_cursor(self, request):
+        """Return the (position, reverse) of the cursor of the request.
+
+        raises: NotFound if the cursor is invalid.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            values = cursor["p"]
+            if len(values) != len(self.ordering):
+                raise ValueError("Cursor does not match the ordering.")
+            position = [
+                field.to_python(value)
+                for (field, _), value in zip(self.ordering, values)
+            ]
+            return position, bool(cursor.get("r", False))
+        except (BinasciiError, KeyError, TypeError, ValidationError, ValueError) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+
+    def encode_cursor(self, position, reverse):
+        """Return the URL of the page at the position."""
+        cursor = json.dumps({"p": position, "r": reverse}, separators=(",", ":"))
+        encoded = urlsafe_b64encode(cursor.encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        """Return the URL of the next page, if any."""
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, False)
+
+    def get_previous_link(self):
+        """Return the URL of the previous page, if any."""
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, True)
+
+    def get_paginated_response(self, data):
+        """Wrap a page in a response with the links to the adjacent pages.
+
+        The count of the full list is included if the client asked for it.
+        """
+        page = {"next": self.get_next_link(), "previous": self.get_previous_link()}
+        if self.count is not None:
+            page["count"] = self.count
+        page["results"] = data
+        return Response(page)
+
+    def get_paginated_response_schema(self, schema):
+        """Return the schema of a paginated response."""
+        return {
+            "type": "object",
+            "properties": {
+                "count": {"type": "integer", "nullable": False},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        """Return the query parameters of the pagination."""
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Count the results: none (default), estimate, or exact.",
+                "schema": {"type": "string", "enum": list(self.count_modes)},
+            },
+        ]
+
+
+class FeedPagination(KeysetPagination):
+    """Keyset pagination that is always enabled, for the change feeds."""
+
+    def is_requested(self, request):
+        """Paginate every request."""
+        return True
@@ -0,0 +1,29 @@
+"""Parsers for hubuum, the counterparts of the renderers in hubuum.renderers."""
+import msgpack
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+
+class ORJSONParser(JSONParser):
+    """Parse JSON with orjson."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Parse the body as JSON."""
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}") from exc
+
+
+class MessagePackParser(BaseParser):
+    """Parse MessagePack."""
+
+    media_type = "application/msgpack"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Parse the body as MessagePack."""
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (msgpack.UnpackException, ValueError) as exc:
+            raise ParseError(f"MessagePack parse error - {exc}") from exc
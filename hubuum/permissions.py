@@ -22,6 +22,37 @@ class CustomObjectPermissions(DjangoObjectPermissions):
     }
 
 
+# The namespace permission required to perform a request method on an object.
+OBJECT_PERMISSIONS = {
+    "GET": "has_read",
+    "OPTIONS": "has_read",
+    "HEAD": "has_read",
+    "POST": "has_create",
+    "PUT": "has_update",
+    "PATCH": "has_update",
+    "DELETE": "has_delete",
+}
+
+# The namespace permission required to perform a request method on a namespace.
+NAMESPACE_PERMISSIONS = {
+    "GET": "has_read",
+    "OPTIONS": "has_read",
+    "HEAD": "has_read",
+    "POST": "has_create",
+    "PUT": "has_namespace",
+    "PATCH": "has_namespace",
+    "DELETE": "has_namespace",
+}
+
+# The request method corresponding to each operation.
+OPERATION_METHODS = {
+    "create": "POST",
+    "read": "GET",
+    "update": "PATCH",
+    "delete": "DELETE",
+}
+
+
 def operations():
     """Define the list of valid operations."""
     return ("create", "read", "update", "delete", "namespace")
@@ -40,6 +71,69 @@ def operation_exists(permission, fully_qualified=False):
     return permission in operations()
 
 
+def permission_bit(permission):
+    """Return the bit representing a fully qualified permission in a permission mask."""
+    return 1 << fully_qualified_operations().index(permission)
+
+
+def permission_mask(permissions):
+    """Return the permission mask for an iterable of fully qualified permissions."""
+    mask = 0
+    for permission in permissions:
+        mask |= permission_bit(permission)
+    return mask
+
+
+class PermissionSnapshot:
+    """The effective namespace permissions of a user.
+
+    The snapshot maps namespace ids to the permission mask the user holds for the
+    namespace through any of their groups. The map is loaded lazily, in a single
+    query, the first time it is needed, and is then reused for the lifetime of the
+    snapshot (typically a single request, see permission_snapshot()).
+    """
+
+    def __init__(self, user):
+        """Create a snapshot for the given user, nothing is loaded until it is used."""
+        self.user = user
+        self._masks = None
+
+    @property
+    def masks(self):
+        """Return the namespace id -> permission mask map."""
+        if self._masks is None:
+            self._masks = self.user.namespace_permissions()
+        return self._masks
+
+    def can(self, perm, namespace) -> bool:
+        """Check if the user can perform perm in namespace.
+
+        param: perm (permission string, 'has_[create|read|update|delete|namespace])
+        param: namespace (namespace object or namespace id)
+        return True|False
+        """
+        namespace_id = getattr(namespace, "pk", namespace)
+        return bool(self.masks.get(namespace_id, 0) & permission_bit(perm))
+
+    def namespaces_with(self, perm):
+        """Return the ids of all namespaces where the user can perform perm."""
+        bit = permission_bit(perm)
+        return [namespace for namespace, mask in self.masks.items() if mask & bit]
+
+
+def permission_snapshot(request):
+    """Return the permission snapshot of the user of the request.
+
+    The snapshot is created on first use and stored on the request object, so the
+    permission classes and the filters of a request share the same snapshot.
+    """
+    snapshot = getattr(request, "hubuum_permissions", None)
+    if snapshot is None:
+        snapshot = PermissionSnapshot(request.user)
+        request.hubuum_permissions = snapshot
+    return snapshot
+
+
 def is_super_or_admin(user):
     """Check to see if a user is superuser or admin (staff)."""
     return user.is_staff or user.is_superuser
@@ -128,6 +222,9 @@ class NameSpace(IsSuperOrAdminOrReadOnly):
             if hasattr(view, "namespace_write_permission"):
                 write_perm = view.namespace_write_permission
 
+            if isinstance(request.data, list):
+                return self.can_create_all(request, request.data, write_perm)
+
             if write_perm == "has_namespace":
                 name = request.data["name"]
                 # We are creating a new namespace as a normal user.
@@ -140,6 +237,43 @@ class NameSpace(IsSuperOrAdminOrReadOnly):
 
         return True
 
+    @staticmethod
+    def can_create_all(request, items, write_perm):
+        """Check if the user can create every item of a bulk create.
+
+        The permission is checked once per distinct namespace, against the
+        permission snapshot of the request. Items without a namespace id are left
+        for validation to reject. Namespaces can't be created in bulk.
+        """
+        if write_perm == "has_namespace":
+            return False
+
+        namespaces = set()
+        for item in items:
+            try:
+                namespaces.add(int(item["namespace"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        return NameSpace.can_all(request, write_perm, namespaces)
+
+    @staticmethod
+    def can_all(request, perm, namespaces):
+        """Check if the user can perform perm in every one of the namespaces.
+
+        Used by bulk operations, which check each distinct namespace once rather
+        than every object.
+
+        param: perm (permission string, 'has_[create|read|update|delete|namespace])
+        param: namespaces (iterable of namespace ids)
+        return True|False
+        """
+        if is_super_or_admin(request.user):
+            return True
+
+        snapshot = permission_snapshot(request)
+        return all(snapshot.can(perm, namespace) for namespace in namespaces)
+
     def has_object_permission(self, request, view, obj):
         """Check for object-specific access."""
         # We can't user the super method, as it allows read-only for everyone,
@@ -150,32 +284,13 @@ class NameSpace(IsSuperOrAdminOrReadOnly):
         if is_super_or_admin(request.user):
             return True
 
-        perms_map = {
-            "GET": "has_read",
-            "OPTIONS": "has_read",
-            "HEAD": "has_read",
-            "POST": "has_create",
-            "PUT": "has_update",
-            "PATCH": "has_update",
-            "DELETE": "has_delete",
-        }
-
-        perms_map_namespace = {
-            "GET": "has_read",
-            "OPTIONS": "has_read",
-            "HEAD": "has_read",
-            "POST": "has_create",
-            "PUT": "has_namespace",
-            "PATCH": "has_namespace",
-            "DELETE": "has_namespace",
-        }
-
         if hasattr(view, "namespace_write_permission"):
-            perm = perms_map_namespace[request.method]
+            perm = NAMESPACE_PERMISSIONS[request.method]
         else:
-            perm = perms_map[request.method]
+            perm = OBJECT_PERMISSIONS[request.method]
 
+        snapshot = permission_snapshot(request)
         if hasattr(obj, "namespace"):
-            return request.user.namespaced_can(perm, obj.namespace)
+            return snapshot.can(perm, obj.namespace_id)
 
-        return request.user.namespaced_can(perm, obj)
+        return snapshot.can(perm, obj)
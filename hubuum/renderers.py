@@ -0,0 +1,93 @@
+"""Renderers for hubuum.
+
+JSON is rendered with orjson rather than the standard library, and MessagePack is
+offered as a compact binary alternative, selected with the Accept header (or
+?format=). Both encode the types orjson and MessagePack don't know (ie, lazy
+strings, decimals, and datetimes outside of serializers) like the DRF JSON
+encoder does, so the JSON output is the same as with the DRF JSONRenderer.
+"""
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Datetimes are passed to the DRF encoder, which formats UTC as "Z".
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME
+
+_encoder = JSONEncoder()
+
+
+def encode_default(obj):
+    """Encode the objects orjson and MessagePack can't, like DRF does."""
+    return _encoder.default(obj)
+
+
+def dumps(data, option=0):
+    """Encode data as JSON bytes, like the DRF JSONRenderer does.
+
+    As DRF does, U+2028 and U+2029 are escaped, as they are invalid in
+    JavaScript strings.
+    """
+    encoded = orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS | option)
+    if b"\xe2\x80\xa8" in encoded or b"\xe2\x80\xa9" in encoded:
+        encoded = encoded.replace(b"\xe2\x80\xa8", b"\\u2028")
+        encoded = encoded.replace(b"\xe2\x80\xa9", b"\\u2029")
+    return encoded
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Render JSON with orjson.
+
+    The output is compact, or indented by two spaces if an indent is requested
+    (ie, by the browsable API), as orjson only supports that indentation.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render the data as JSON."""
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        return dumps(data, orjson.OPT_INDENT_2 if indent else 0)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Render MessagePack."""
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render the data as MessagePack."""
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Render newline delimited JSON, one object per line.
+
+    Lists are rendered as one line per element, anything else as a single line.
+    List views stream their objects in this format rather than render them, see
+    HubuumList in hubuum.api.v1.views.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    @staticmethod
+    def line(data):
+        """Encode a single object as a line."""
+        return dumps(data, orjson.OPT_APPEND_NEWLINE)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render the data, one line per element if it is a list."""
+        if data is None:
+            return b""
+        if isinstance(data, list):
+            return b"".join(self.line(item) for item in data)
+        return self.line(data)
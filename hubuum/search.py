@@ -0,0 +1,106 @@
+"""Full-text search of hubuum objects.
+
+The searchable models and fields are listed in SEARCH_FIELDS, with a weight per
+field (A is the highest, D the lowest, as in PostgreSQL).
+
+In PostgreSQL, every searchable table has a generated tsvector column (see
+SEARCH_COLUMN and the migration 0009_search) with a GIN index, so the column is
+maintained by the database on every write, and searches are answered from the
+index and ranked with ts_rank. Other databases (ie, SQLite in tests) fall back to
+case insensitive matching with regular expressions (see word_prefix()), ranked by
+the weights of the matching fields.
+
+Queries are split into terms on whitespace, and objects must match every term. A
+term matches a word that starts with it, so serial fragments and partial names
+are found.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = "simple"
+SEARCH_COLUMN = "search_vector"
+SEARCH_FIELDS = {
+    "host": (("name", "A"), ("fqdn", "A"), ("serial", "B")),
+    "person": (("username", "A"), ("email", "B"), ("department", "C")),
+    "room": (("room_id", "A"), ("building", "B")),
+    "vendor": (("vendor_name", "A"),),
+    "purchaseorder": (("po_number", "A"),),
+}
+# The default weights of ts_rank, used by the fallback ranking.
+WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2, "D": 0.1}
+
+
+def search_terms(query):
+    """Return the terms of a search query."""
+    return query.split()
+
+
+def tsquery(terms):
+    """Return a tsquery matching the words that start with every term.
+
+    The terms are quoted, so characters with a meaning in tsquery are matched as
+    text, and are normalized by the text search parser like the indexed text.
+    """
+    quoted = []
+    for term in terms:
+        term = term.replace("\\", "\\\\").replace("'", "''")
+        quoted.append(f"'{term}':*")
+    return " & ".join(quoted)
+
+
+def word_prefix(term):
+    """Return a regular expression matching the words that start with term.
+
+    Words are delimited by anything but letters, digits and underscores, which
+    approximates how the PostgreSQL text search parser splits text, so the
+    fallback matches what to_tsquery matches with a prefix.
+    """
+    return r"(^|\W)" + re.escape(term)
+
+
+def search(queryset, query):
+    """Filter a queryset of a searchable model to the matches of a query.
+
+    The matches are annotated with their rank (search_rank), and ordered by it,
+    best first.
+    """
+    model_name = queryset.model._meta.model_name  # pylint: disable=protected-access
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+
+    if connections[queryset.db].vendor == "postgresql":
+        table = queryset.model._meta.db_table  # pylint: disable=protected-access
+        column = f'"{table}"."{SEARCH_COLUMN}"'
+        expression = f"to_tsquery('{SEARCH_CONFIG}', %s)"
+        params = [tsquery(terms)]
+        queryset = queryset.filter(
+            RawSQL(f"{column} @@ {expression}", params, output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(
+                f"ts_rank({column}, {expression})", params, output_field=FloatField()
+            )
+        )
+    else:
+        fields = SEARCH_FIELDS[model_name]
+        for term in terms:
+            matches = Q()
+            for name, _ in fields:
+                matches |= Q(**{f"{name}__iregex": word_prefix(term)})
+            queryset = queryset.filter(matches)
+        rank = Value(0.0)
+        for term in terms:
+            for name, weight in fields:
+                rank += Case(
+                    When(
+                        **{f"{name}__iregex": word_prefix(term)},
+                        then=Value(WEIGHTS[weight]),
+                    ),
+                    default=Value(0.0),
+                )
+        queryset = queryset.annotate(search_rank=rank)
+
+    return queryset.order_by("-search_rank", "pk")
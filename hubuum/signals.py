@@ -0,0 +1,162 @@
+"""Signal handlers for hubuum.
+
+These keep the materialized effective permissions (see EffectivePermission) and the
+cached permissions (see hubuum.cache) in sync with the Permission model, group
+memberships, and namespaces, drop cached identifiers (see
+hubuum.cache.identifier_cache) when objects are saved or deleted, and record
+tombstones (see Tombstone) for deleted objects.
+"""
+# pylint: disable=unused-argument
+from django.apps import apps
+from django.contrib.auth.models import Group
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from hubuum.cache import identifier_cache, invalidate_permissions
+from hubuum.models import (
+    EffectivePermission,
+    Namespace,
+    NamespacedHubuumModel,
+    Permission,
+    Tombstone,
+    User,
+)
+
+
+def _members_of(group_id):
+    """Return the ids of the users in a group."""
+    return list(User.objects.filter(groups=group_id).values_list("id", flat=True))
+
+
+# A permission moved to another group is lost by the members of the previous
+# group, so they are collected before the previous group is overwritten.
+@receiver(pre_save, sender=Permission)
+def permission_saving(sender, instance, **kwargs):
+    """Collect the members of the previous group of a moved permission."""
+    instance.affected_users = []
+    if instance.pk is None:
+        return
+    previous = (
+        Permission.objects.filter(pk=instance.pk)
+        .values_list("group_id", flat=True)
+        .first()
+    )
+    if previous is not None and previous != instance.group_id:
+        instance.affected_users = _members_of(previous)
+
+
+@receiver(post_save, sender=Permission)
+def permission_saved(sender, instance, **kwargs):
+    """Refresh the permissions of the members of the groups of the permission."""
+    EffectivePermission.refresh(
+        _members_of(instance.group_id) + getattr(instance, "affected_users", [])
+    )
+
+
+# The members are collected before the fact, as cascading deletes of groups have
+# already removed the group memberships by the time post_delete is sent.
+@receiver(pre_delete, sender=Permission)
+def permission_deleting(sender, instance, **kwargs):
+    """Collect the members of the group of the permission."""
+    instance.affected_users = _members_of(instance.group_id)
+
+
+@receiver(post_delete, sender=Permission)
+def permission_deleted(sender, instance, **kwargs):
+    """Refresh the permissions of the members of the group of the permission."""
+    EffectivePermission.refresh(getattr(instance, "affected_users", []))
+
+
+@receiver(pre_delete, sender=Namespace)
+def namespace_deleted(sender, instance, **kwargs):
+    """Invalidate the permissions of every user with access to the namespace.
+
+    The effective permissions of the namespace are removed by the database cascade,
+    and changes to inherited permissions are handled by the Permission handlers.
+    The users that can read the namespace are kept for its tombstone.
+    """
+    users = User.objects.filter(effectivepermission__namespace=instance)
+    invalidate_permissions(users.values_list("id", flat=True))
+    instance.readers = list(
+        EffectivePermission.objects.filter(namespace=instance)
+        .granting("has_read")
+        .values_list("user_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=Namespace)
+def namespace_saved(sender, instance, **kwargs):
+    """Refresh the permissions of users inheriting permissions into the namespace.
+
+    Creating or renaming (moving) a namespace changes which inherited permissions
+    apply to it and its descendants.
+    """
+    ancestors = Namespace.ancestor_names(instance.name)
+    if instance.previous_name is not None:
+        ancestors += Namespace.ancestor_names(instance.previous_name)
+    if not ancestors:
+        return
+
+    users = User.objects.filter(
+        groups__p_group__namespace__name__in=ancestors, groups__p_group__inherit=True
+    )
+    EffectivePermission.refresh(users.values_list("id", flat=True))
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def group_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Refresh the permissions of users joining or leaving groups.
+
+    If reverse is set, the membership was changed from the group side
+    (group.user_set), instance is the group and pk_set holds user ids.
+    """
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            EffectivePermission.refresh([instance.pk])
+    elif action in ("post_add", "post_remove"):
+        EffectivePermission.refresh(pk_set)
+    elif action == "pre_clear":
+        instance.affected_users = _members_of(instance.pk)
+    elif action == "post_clear":
+        EffectivePermission.refresh(getattr(instance, "affected_users", []))
+
+
+def namespaced_models():
+    """Return Namespace and the concrete namespaced models."""
+    models = apps.get_app_config("hubuum").get_models()
+    return [Namespace, *(m for m in models if issubclass(m, NamespacedHubuumModel))]
+
+
+def identified_models():
+    """Return the models with identifiers in hubuum.cache.identifier_cache.
+
+    These are the models resolved by hubuum.tools.resolve_object, that is the
+    models of the detail views and of hubuum.tools.get_object.
+    """
+    return [User, Group, Permission, *namespaced_models()]
+
+
+def object_changed(sender, **kwargs):
+    """Drop the cached identifiers of the model of the saved or deleted object."""
+    identifier_cache.invalidate(sender)
+
+
+def object_deleted(sender, instance, **kwargs):
+    """Record a tombstone for deleted namespaces and namespaced objects."""
+    Tombstone.record(instance)
+
+
+# Connected per model rather than for every model, as any post_delete receiver
+# stops Django from deleting the rows of the model without fetching them first,
+# which the internal tables (ie, EffectivePermission) rely on.
+for _model in identified_models():
+    post_save.connect(object_changed, sender=_model)
+    post_delete.connect(object_changed, sender=_model)
+for _model in namespaced_models():
+    post_delete.connect(object_deleted, sender=_model)
@@ -1,8 +1,10 @@
 """Provide a base class for testing model behaviour."""
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
+from django.core.cache import cache
 from django.test import TestCase
 
+from hubuum.cache import identifier_cache
 from hubuum.exceptions import MissingParam
 from hubuum.models import (  # Permissions,
     Namespace,
@@ -19,6 +21,9 @@ class HubuumModelTestCase(TestCase):
 
     def setUp(self):
         """Set up defaults for the test object."""
+        # Object ids are reused between tests, cached data must not be.
+        cache.clear()
+        identifier_cache.clear()
         self.username = "test"
         self.password = "test"  # nosec
         self.groupname = "test"
@@ -1,10 +1,14 @@
 """Test module: Users and Groups."""
 import pytest
+from django.db.models.signals import post_save
 from rest_framework.exceptions import NotFound
 
-from hubuum.exceptions import MissingParam
-from hubuum.models import Namespace, User
-from hubuum.tools import get_object
+from hubuum.cache import IdentifierCache, identifier_cache
+from hubuum.exceptions import AmbiguousLookup, MissingParam
+from hubuum.middleware import accepted_encodings
+from hubuum.models import EffectivePermission, Host, Namespace, User
+from hubuum.search import search_terms, tsquery
+from hubuum.tools import get_object, resolve_object, resolve_objects
 
 from .base import HubuumModelTestCase
 
@@ -37,6 +41,113 @@ class InternalsTestCase(HubuumModelTestCase):
         with pytest.raises(NotFound):
             assert get_object(User, "doesnotexist")  # nosec
 
+    def test_resolve_objects(self):
+        """Test resolving identifiers in bulk, in order of lookup field precedence."""
+        other = User.objects.create(username=str(self.user.id), email="test")
+        lookup_fields = ["id", "username", "email"]
+        with self.assertNumQueries(1):
+            found = resolve_objects(
+                User.objects.all(),
+                lookup_fields,
+                [str(self.user.id), "test", str(other.id), "nope"],
+            )
+        # The id takes precedence over the username, and the username over email.
+        self.assertEqual(
+            found,
+            {str(self.user.id): self.user, "test": self.user, str(other.id): other},
+        )
+
+        # Ambiguous matches are not resolved.
+        User.objects.create(username="third", email="test@example.com")
+        User.objects.create(username="fourth", email="test@example.com")
+        self.assertEqual(
+            resolve_objects(User.objects.all(), lookup_fields, ["test@example.com"]),
+            {},
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_objects(User.objects.all(), ["id"], ["x"]), {})
+            self.assertEqual(
+                resolve_objects(User.objects.all(), ["id"], [str(2**70)]), {}
+            )
+
+    def test_resolve_object(self):
+        """Test resolving a single identifier."""
+        User.objects.create(username="third", email="test@example.com")
+        User.objects.create(username="fourth", email="test@example.com")
+        lookup_fields = ["id", "username", "email"]
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                resolve_object(User.objects.all(), lookup_fields, "test"), self.user
+            )
+        with pytest.raises(AmbiguousLookup):
+            resolve_object(User.objects.all(), lookup_fields, "test@example.com")
+        with pytest.raises(AmbiguousLookup):
+            get_object(User, "test@example.com")
+        assert (  # nosec
+            get_object(User, "test@example.com", raise_exception=False) is None
+        )
+        with pytest.raises(NotFound):
+            resolve_object(User.objects.all(), lookup_fields, "nope")
+
+    def test_tsquery(self):
+        """Test that search terms are quoted and prefix matched in tsqueries."""
+        assert search_terms("  laptop\t3.14 ") == ["laptop", "3.14"]  # nosec
+        assert tsquery(["laptop", "3.14"]) == "'laptop':* & '3.14':*"  # nosec
+        assert tsquery(["o'neil", "a\\b&!"]) == "'o''neil':* & 'a\\\\b&!':*"  # nosec
+
+    def test_accepted_encodings(self):
+        """Test parsing Accept-Encoding headers."""
+        assert accepted_encodings("") == set()  # nosec
+        header = "gzip, BR;q=0.5, zstd;q=0, deflate;q=x"
+        assert accepted_encodings(header) == {"gzip", "br"}  # nosec
+        assert accepted_encodings("*, br;q=0") == {"*", "gzip", "zstd"}  # nosec
+
+    def test_identifier_cache(self):
+        """Test caching the resolution of identifiers to primary keys."""
+        lookup_fields = ["id", "username", "email"]
+        self.assertEqual(identifier_cache.stats(), {"hits": 0, "misses": 0, "size": 0})
+        resolve_object(User.objects.all(), lookup_fields, "test")
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                resolve_object(User.objects.all(), lookup_fields, "test"), self.user
+            )
+        self.assertEqual(identifier_cache.stats(), {"hits": 1, "misses": 1, "size": 1})
+
+        # Saving an object of the model drops the entries of the model.
+        self.user.username = "renamed"
+        self.user.save()
+        self.assertEqual(identifier_cache.stats()["size"], 0)
+        with pytest.raises(NotFound):
+            resolve_object(User.objects.all(), lookup_fields, "test")
+
+        # Stale entries (ie, from changes in other processes) are not used.
+        other = User.objects.create(username="other")
+        identifier_cache.set(User, lookup_fields, "renamed", "username", other.pk)
+        self.assertEqual(
+            resolve_object(User.objects.all(), lookup_fields, "renamed"), self.user
+        )
+
+    def test_identifier_cache_signals(self):
+        """Test that identifiers are only invalidated for the models they cache."""
+        for model in (User, Host, Namespace):
+            assert post_save.has_listeners(model)  # nosec
+        assert not post_save.has_listeners(EffectivePermission)  # nosec
+
+    def test_identifier_cache_eviction(self):
+        """Test that the identifier cache evicts old and expired entries."""
+        lru = IdentifierCache(maxsize=2, timeout=60)
+        lru.set(User, ["id"], "1", "id", 1)
+        lru.set(User, ["id"], "2", "id", 2)
+        self.assertEqual(lru.get(User, ["id"], "1"), ("id", 1))
+        lru.set(User, ["id"], "3", "id", 3)
+        self.assertIsNone(lru.get(User, ["id"], "2"))
+        self.assertEqual(lru.get(User, ["id"], "1"), ("id", 1))
+
+        lru.timeout = 0
+        lru.set(User, ["id"], "4", "id", 4)
+        self.assertIsNone(lru.get(User, ["id"], "4"))
+        self.assertEqual(lru.stats(), {"hits": 2, "misses": 2, "size": 1})
+
     def test_has_perm(self):
         """Test the internals of has_perm."""
         # These should never happen, but are handled.
@@ -0,0 +1,122 @@
+"""Test module for the Namespace model."""
+from django.contrib.auth.models import Group
+from rest_framework.exceptions import ValidationError
+
+from hubuum.models import Namespace, Permission
+
+from .base import HubuumModelTestCase
+
+
+class NamespaceTestCase(HubuumModelTestCase):
+    """This class defines the test suite for the Namespace model."""
+
+    def setUp(self):
+        """Set up a small namespace tree."""
+        super().setUp()
+        self.attributes = {"name": "test"}
+        self.obj = self.namespace
+        for name in ["test.a", "test.a.b", "test.a.b.c", "test.ab", "other"]:
+            self._create_object(model=Namespace, name=name)
+        self.user.groups.add(self.group)
+
+    def _names(self, queryset):
+        """Return the sorted names of the namespaces in a queryset."""
+        return sorted(queryset.values_list("name", flat=True))
+
+    def test_str(self):
+        """Test that stringifying objects works as expected."""
+        self.assertEqual(str(self.obj), "Namespace object (" + str(self.obj.id) + ")")
+
+    def test_ancestor_and_parent_names(self):
+        """Test deriving ancestor and parent names."""
+        self.assertEqual(Namespace.ancestor_names("a.b.c"), ["a", "a.b"])
+        self.assertEqual(Namespace.ancestor_names("a"), [])
+        self.assertEqual(Namespace.parent_name("a.b.c"), "a.b")
+        self.assertIsNone(Namespace.parent_name("a"))
+
+    def test_ancestors_and_descendants(self):
+        """Test resolving ancestors and descendants in a single query each."""
+        deepest = Namespace.objects.get(name="test.a.b.c")
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                self._names(deepest.ancestors()), ["test", "test.a", "test.a.b"]
+            )
+        namespace = Namespace.objects.get(name="test.a")
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                self._names(namespace.descendants()), ["test.a.b", "test.a.b.c"]
+            )
+        self.assertEqual(deepest.get_parent().name, "test.a.b")
+        self.assertIsNone(self.namespace.get_parent())
+        self.assertEqual(self._names(self.namespace.ancestors()), [])
+
+    def test_rename_moves_descendants(self):
+        """Test that renaming a namespace renames its descendants."""
+        namespace = Namespace.objects.get(name="test.a")
+        namespace.name = "test.x"
+        namespace.save()
+        self.assertEqual(namespace.previous_name, "test.a")
+        self.assertEqual(
+            self._names(Namespace.objects.filter(name__startswith="test")),
+            ["test", "test.ab", "test.x", "test.x.b", "test.x.b.c"],
+        )
+
+    def test_rename_conflicts(self):
+        """Test that renames that would collide with other namespaces are refused."""
+        Namespace.objects.create(name="test.x.b")
+        namespace = Namespace.objects.get(name="test.a")
+        namespace.name = "test.x"
+        with self.assertRaises(ValidationError):
+            namespace.save()
+        self.assertTrue(Namespace.objects.filter(name="test.a.b.c").exists())
+        self.assertFalse(Namespace.objects.filter(name="test.x").exists())
+
+    def test_inherited_permissions(self):
+        """Test that permissions with inherit set apply to descendants."""
+        ids = dict(Namespace.objects.values_list("name", "id"))
+        permission = Permission.objects.create(
+            namespace=self.namespace, group=self.group, has_read=True
+        )
+        self.assertEqual(list(self.user.namespace_permissions()), [ids["test"]])
+
+        permission.inherit = True
+        permission.save()
+        self.assertEqual(
+            sorted(self.user.namespace_permissions()),
+            sorted(v for k, v in ids.items() if k != "other"),
+        )
+        self.assertTrue(
+            self.user.namespaced_can(
+                "has_read", Namespace.objects.get(pk=ids["test.a"])
+            )
+        )
+        self.assertFalse(
+            self.user.namespaced_can(
+                "has_update", Namespace.objects.get(pk=ids["test.a"])
+            )
+        )
+
+        # Direct and inherited permissions are combined.
+        other = Group.objects.create(name="other")
+        self.user.groups.add(other)
+        Permission.objects.create(
+            namespace=Namespace.objects.get(name="test.a.b"),
+            group=other,
+            has_update=True,
+            inherit=True,
+        )
+        deepest = Namespace.objects.get(name="test.a.b.c")
+        self.assertTrue(self.user.namespaced_can("has_update", deepest))
+        self.assertTrue(self.user.namespaced_can("has_read", deepest))
+
+        # New and moved namespaces pick up inherited permissions.
+        new = Namespace.objects.create(name="test.new")
+        self.assertTrue(self.user.namespaced_can("has_read", new))
+        moved = Namespace.objects.get(name="other")
+        self.assertFalse(self.user.namespaced_can("has_read", moved))
+        moved.name = "test.other"
+        moved.save()
+        self.assertTrue(self.user.namespaced_can("has_read", moved))
+        new.name = "new"
+        new.save()
+        self.assertFalse(self.user.namespaced_can("has_read", new))
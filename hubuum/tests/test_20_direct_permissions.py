@@ -1,8 +1,16 @@
 """Test module: Permissions."""
 from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
 from django.test import TestCase
 
-from hubuum.models import Host, Namespace, Permission, User
+from hubuum.cache import get_cached_permissions
+from hubuum.models import EffectivePermission, Host, Namespace, Permission, User
+from hubuum.permissions import (
+    PermissionSnapshot,
+    fully_qualified_operations,
+    permission_mask,
+)
 
 
 class PermissionsTestCase(TestCase):
@@ -10,6 +18,7 @@ class PermissionsTestCase(TestCase):
 
     def setUp(self) -> None:
         """Set up example users and groups."""
+        cache.clear()
         self.one = User.objects.create(username="one", password="test")  # nosec
         self.two = User.objects.create(username="two", password="test")  # nosec
         self.staff = User.objects.create(username="staff", password="test")  # nosec
@@ -77,3 +86,176 @@ class PermissionsTestCase(TestCase):
             namespace=self.onehost.namespace, group=self.twogroup
         ).delete()
         self.assertFalse(self.two.has_perm(self.read_perm, self.onehost))
+
+    def test_namespace_permissions(self):
+        """Test that the namespace permission map is the union of the group permissions."""
+        everything = permission_mask(fully_qualified_operations())
+        self.assertEqual(
+            self.one.namespace_permissions(), {self.onenamespace.id: everything}
+        )
+        self.assertEqual(self.staff.namespace_permissions(), {})
+
+        Permission.objects.create(
+            namespace=self.onenamespace, group=self.twogroup, has_read=True
+        )
+        self.two.groups.add(self.onegroup)
+        masks = self.two.namespace_permissions()
+        self.assertEqual(masks[self.onenamespace.id], everything)
+        self.assertEqual(masks[self.twonamespace.id], everything)
+
+    def test_permission_snapshot(self):
+        """Test that a snapshot answers permission checks from a single query."""
+        Permission.objects.create(
+            namespace=self.twonamespace, group=self.onegroup, has_read=True
+        )
+        snapshot = PermissionSnapshot(self.one)
+        with self.assertNumQueries(1):
+            self.assertTrue(snapshot.can("has_delete", self.onenamespace))
+            self.assertTrue(snapshot.can("has_read", self.twonamespace.id))
+            self.assertFalse(snapshot.can("has_delete", self.twonamespace))
+            self.assertEqual(
+                sorted(snapshot.namespaces_with("has_read")),
+                sorted([self.onenamespace.id, self.twonamespace.id]),
+            )
+            self.assertEqual(
+                snapshot.namespaces_with("has_update"), [self.onenamespace.id]
+            )
+
+    def test_permission_cache(self):
+        """Test that effective permissions are cached and invalidated on changes."""
+        self.assertTrue(self.one.has_perm(self.read_perm, self.onehost))
+        with self.assertNumQueries(0):
+            self.assertTrue(self.one.has_perm(self.read_perm, self.onehost))
+            self.assertTrue(self.one.namespaced_can("has_read", self.onenamespace))
+
+        # Changing permissions.
+        self.onepermissions.has_read = False
+        self.onepermissions.save()
+        self.assertFalse(self.one.has_perm(self.read_perm, self.onehost))
+        self.onepermissions.has_read = True
+        self.onepermissions.save()
+        self.assertTrue(self.one.has_perm(self.read_perm, self.onehost))
+
+        # Group memberships, from either side of the relation.
+        self.assertFalse(self.two.has_perm(self.read_perm, self.onehost))
+        self.two.groups.add(self.onegroup)
+        self.assertTrue(self.two.has_perm(self.read_perm, self.onehost))
+        self.onegroup.user_set.remove(self.two)
+        self.assertFalse(self.two.has_perm(self.read_perm, self.onehost))
+        self.onegroup.user_set.add(self.two)
+        self.assertTrue(self.two.has_perm(self.read_perm, self.onehost))
+        self.onegroup.user_set.clear()
+        self.assertFalse(self.one.has_perm(self.read_perm, self.onehost))
+        self.assertFalse(self.two.has_perm(self.read_perm, self.onehost))
+        self.two.groups.clear()
+        self.assertFalse(self.two.has_perm(self.read_perm, self.twohost))
+
+        # Deleting namespaces and groups.
+        self.one.groups.set([self.onegroup, self.twogroup])
+        self.assertTrue(self.one.namespaced_can("has_read", self.twonamespace))
+        self.twonamespace.delete()
+        self.assertEqual(
+            self.one.namespace_permissions(),
+            {self.onenamespace.id: permission_mask(fully_qualified_operations())},
+        )
+        self.onegroup.delete()
+        self.assertEqual(self.one.namespace_permissions(), {})
+
+    def test_permission_mask(self):
+        """Test that the has_* flags map to the permission mask and back."""
+        permission = Permission(
+            namespace=self.onenamespace, group=self.twogroup, has_read=True
+        )
+        self.assertEqual(permission.mask, permission_mask(["has_read"]))
+        permission.has_delete = True
+        permission.has_read = False
+        self.assertEqual(permission.mask, permission_mask(["has_delete"]))
+        self.assertTrue(permission.has_delete)
+        self.assertFalse(permission.has_read)
+        permission.save()
+
+        self.assertEqual(
+            list(Permission.objects.granting("has_delete").order_by("id")),
+            [self.onepermissions, self.twopermissions, permission],
+        )
+        self.assertEqual(
+            list(Permission.objects.granting("has_read", "has_create").order_by("id")),
+            [self.onepermissions, self.twopermissions],
+        )
+        self.assertEqual(
+            list(self.onenamespace.groups_that_can("has_delete").order_by("id")),
+            [self.onegroup, self.twogroup],
+        )
+        self.assertEqual(
+            list(self.onenamespace.groups_that_can("has_read")), [self.onegroup]
+        )
+
+    def _assert_effective_permissions_are_live(self):
+        """Check that the materialized permissions match the live computation."""
+        for user in User.objects.all():
+            stored = dict(
+                EffectivePermission.objects.filter(user=user).values_list(
+                    "namespace_id", "mask"
+                )
+            )
+            self.assertEqual(stored, user.compute_namespace_permissions())
+
+    def test_effective_permissions(self):
+        """Test that the materialized permissions follow changes incrementally."""
+        self._assert_effective_permissions_are_live()
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                self.one.namespace_permissions(),
+                {self.onenamespace.id: permission_mask(fully_qualified_operations())},
+            )
+
+        sub = Namespace.objects.create(name="one.sub")
+        self.onepermissions.inherit = True
+        self.onepermissions.has_delete = False
+        self.onepermissions.save()
+        self._assert_effective_permissions_are_live()
+        self.assertTrue(self.one.namespaced_can("has_read", sub))
+        self.assertFalse(self.one.namespaced_can("has_delete", sub))
+
+        self.two.groups.add(self.onegroup)
+        self._assert_effective_permissions_are_live()
+        self.onegroup.user_set.clear()
+        self._assert_effective_permissions_are_live()
+        self.twogroup.user_set.add(self.one)
+        sub.name = "two.sub"
+        sub.save()
+        self._assert_effective_permissions_are_live()
+        self.twonamespace.delete()
+        self._assert_effective_permissions_are_live()
+        self.twogroup.delete()
+        self._assert_effective_permissions_are_live()
+
+    def test_move_permission(self):
+        """Test that moving a permission to another group updates both groups."""
+        self.assertTrue(self.one.namespaced_can("has_read", self.onenamespace))
+        self.assertFalse(self.two.namespaced_can("has_read", self.onenamespace))
+        self.assertIsNotNone(get_cached_permissions(self.one.pk))
+        self.onepermissions.group = self.twogroup
+        self.onepermissions.save()
+        # The cached permissions of the members of both groups are dropped.
+        self.assertIsNone(get_cached_permissions(self.one.pk))
+        self.assertIsNone(get_cached_permissions(self.two.pk))
+        self.assertFalse(self.one.has_perm(self.read_perm, self.onehost))
+        self._assert_effective_permissions_are_live()
+        self.assertEqual(self.one.namespace_permissions(), {})
+        self.assertTrue(self.two.namespaced_can("has_read", self.onenamespace))
+
+    def test_rebuild_permissions(self):
+        """Test rebuilding and verifying the materialized permissions."""
+        call_command("rebuild_permissions", "--verify-only", stdout=None)
+        EffectivePermission.objects.filter(user=self.one).update(mask=1)
+        with self.assertRaises(CommandError):
+            call_command("rebuild_permissions", "--verify-only", stderr=None)
+        self.one.namespace_permissions()
+        self.assertIsNotNone(get_cached_permissions(self.one.pk))
+        cache.set("unrelated", "kept")
+        call_command("rebuild_permissions", stdout=None)
+        self._assert_effective_permissions_are_live()
+        # Only the cached permissions are dropped.
+        self.assertIsNone(get_cached_permissions(self.one.pk))
+        self.assertEqual(cache.get("unrelated"), "kept")
@@ -1,8 +1,13 @@
 """Tools for huubum."""
 
 from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import IntegerField, Q
 from rest_framework.exceptions import NotFound
 
+from hubuum.cache import identifier_cache
+from hubuum.exceptions import AmbiguousLookup
 from hubuum.models import Namespace, Permission, User
 
 
@@ -59,29 +64,163 @@ def get_object(cls, lookup_value, lookup_fields=None, raise_exception=True):
       - the models class attribute 'lookup_fields'
       - the list ["id"]
 
+    The lookup is done in a single query, see resolve_object().
+
     param: cls (the model to look into)
     param: lookup_value (value to search for)
     param: lookup_fields=[] (explicitly declare fields to look into)
 
     return object or None
+
+    raises: NotFound if no object found, AmbiguousLookup if the lookup is ambiguous.
     """
-    obj = None
     fields = ["id"]
     if lookup_fields:
         fields = lookup_fields
     elif hasattr(cls, "lookup_fields"):
         fields = cls.lookup_fields
 
-    for field in fields:
-        try:
-            obj = cls.objects.get(**{field: lookup_value})
-            if obj:
-                return obj
+    try:
+        return resolve_object(cls.objects.all(), fields, lookup_value)
+    except (NotFound, AmbiguousLookup):
+        if raise_exception:
+            raise
+
+    return None
+
+
+def field_value(field, identifier):
+    """Convert an identifier to a value that can be looked up in a field.
+
+    param: field (the model field)
+    param: identifier (the value to convert)
+
+    returns: the converted value
+
+    raises: ValueError if the identifier can't be a value of the field.
+    """
+    try:
+        value = field.to_python(identifier)
+    except (ValidationError, TypeError) as exc:
+        raise ValueError(exc) from exc
+
+    if isinstance(field, IntegerField):
+        # Not integer_field_range(), as SQLite claims to have no limits.
+        low, high = connection.ops.integer_field_ranges[field.get_internal_type()]
+        if not low <= value <= high:
+            raise ValueError(f"{value} is out of range for {field.name}")
+
+    return value
 
-        except Exception:  # nosec pylint: disable=broad-except
-            pass
 
-    if raise_exception:
+def match_objects(queryset, lookup_fields, identifiers):
+    """Match a collection of identifiers against lookup fields with a single query.
+
+    Identifiers that can't be converted to the type of a field (ie, "foo" for an
+    integer id) are never looked up in that field. Every identifier is matched
+    by the first field, in order of precedence, where at least one object has
+    the identifier as its value.
+
+    param: queryset (the queryset to look into)
+    param: lookup_fields (the fields to look into, in order of precedence)
+    param: identifiers (an iterable of values to look for)
+
+    return {identifier: (field, [objects ordered by pk])} for the identifiers
+    that matched.
+    """
+    model = queryset.model
+    candidates = {}
+    query = Q()
+    for name in lookup_fields:
+        field = model._meta.get_field(name)  # pylint: disable=protected-access
+        values = {}
+        for identifier in identifiers:
+            try:
+                value = field_value(field, identifier)
+            except ValueError:
+                continue
+            values.setdefault(value, []).append(identifier)
+
+        if values:
+            candidates[name] = values
+            query |= Q(**{f"{name}__in": list(values)})
+
+    if not candidates:
+        return {}
+
+    objects = list(queryset.filter(query).order_by("pk"))
+    matched = {}
+    for name, values in candidates.items():
+        matches = {}
+        for obj in objects:
+            for identifier in values.get(getattr(obj, name), []):
+                matches.setdefault(identifier, []).append(obj)
+
+        for identifier, objs in matches.items():
+            matched.setdefault(identifier, (name, objs))
+
+    return matched
+
+
+def resolve_objects(queryset, lookup_fields, identifiers):
+    """Resolve a collection of identifiers to objects with a single query.
+
+    Identifiers are matched as described in match_objects(). Identifiers that
+    are ambiguous, ie, match more than one object in the field with the highest
+    precedence, are not resolved.
+
+    param: queryset (the queryset to look into)
+    param: lookup_fields (the fields to look into, in order of precedence)
+    param: identifiers (an iterable of values to look for)
+
+    return {identifier: object} for the identifiers that were found.
+    """
+    return {
+        identifier: objs[0]
+        for identifier, (_, objs) in match_objects(
+            queryset, lookup_fields, identifiers
+        ).items()
+        if len(objs) == 1
+    }
+
+
+def resolve_object(queryset, lookup_fields, identifier):
+    """Resolve a single identifier to an object with a single query.
+
+    Resolved identifiers are cached in hubuum.cache.identifier_cache, and later
+    fetched by their primary key. A cached entry is only used if the object still
+    has the identifier as the value of the deciding field.
+
+    param: queryset (the queryset to look into)
+    param: lookup_fields (the fields to look into, in order of precedence)
+    param: identifier (the value to look for)
+
+    return object
+
+    raises: NotFound if no object found, AmbiguousLookup if the field with the
+            highest precedence that matches the identifier matches more than
+            one object.
+    """
+    model = queryset.model
+    cached = identifier_cache.get(model, lookup_fields, identifier)
+    if cached is not None:
+        field, pk = cached
+        obj = queryset.filter(pk=pk).first()
+        if obj is not None and getattr(obj, field) == field_value(
+            model._meta.get_field(field), identifier  # pylint: disable=protected-access
+        ):
+            return obj
+        identifier_cache.discard(model, lookup_fields, identifier)
+
+    match = match_objects(queryset, lookup_fields, [identifier]).get(identifier)
+    if match is None:
         raise NotFound()
 
-    return None
+    field, objs = match
+    if len(objs) > 1:
+        raise AmbiguousLookup(
+            detail=f"'{identifier}' matches {len(objs)} objects by {field}."
+        )
+
+    identifier_cache.set(model, lookup_fields, identifier, field, objs[0].pk)
+    return objs[0]
@@ -51,6 +51,7 @@ AUTH_USER_MODEL = "hubuum.User"
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "hubuum.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -84,9 +85,72 @@ DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": ("knox.auth.TokenAuthentication",),
     "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.IsAuthenticated"],
+    # JSON is rendered and parsed with orjson, and MessagePack is available as
+    # application/msgpack, see hubuum.renderers and hubuum.parsers.
+    "DEFAULT_RENDERER_CLASSES": [
+        "hubuum.renderers.ORJSONRenderer",
+        "hubuum.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "hubuum.parsers.ORJSONParser",
+        "hubuum.parsers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "TEST_REQUEST_DEFAULT_FORMAT": "json",
 }
 
+# Lists are paginated by cursor when the client passes page_size, cursor, or
+# count, see hubuum.pagination. HUBUUM_PAGE_SIZE is the default page size, and
+# clients can't ask for pages larger than HUBUUM_MAX_PAGE_SIZE.
+HUBUUM_PAGE_SIZE = int(os.environ.get("HUBUUM_PAGE_SIZE", 100))
+HUBUUM_MAX_PAGE_SIZE = int(os.environ.get("HUBUUM_MAX_PAGE_SIZE", 1000))
+
+# Pages counted with ?count=estimate use the planner estimate (PostgreSQL only)
+# unless it is below this, in which case the list is counted exactly.
+HUBUUM_EXACT_COUNT_THRESHOLD = int(os.environ.get("HUBUUM_EXACT_COUNT_THRESHOLD", 1000))
+
+# Lists of serializers with fast_reads are fetched as rows and represented
+# through a precompiled plan, see hubuum.api.v1.serializers.ReadPlan.
+HUBUUM_FAST_READS = os.environ.get("HUBUUM_FAST_READS", "true").lower() == "true"
+
+# Lists of objects POSTed (or PATCHed) to list views are created (or updated)
+# in batches of HUBUUM_BULK_BATCH_SIZE, at most HUBUUM_BULK_MAX_ITEMS per request.
+# Bulk DELETEs delete HUBUUM_BULK_BATCH_SIZE objects per transaction.
+HUBUUM_BULK_MAX_ITEMS = int(os.environ.get("HUBUUM_BULK_MAX_ITEMS", 1000))
+HUBUUM_BULK_BATCH_SIZE = int(os.environ.get("HUBUUM_BULK_BATCH_SIZE", 500))
+
+# Searches (see hubuum.search) return at most this many results by default.
+HUBUUM_SEARCH_LIMIT = int(os.environ.get("HUBUUM_SEARCH_LIMIT", 50))
+
+# Lists streamed as newline delimited JSON are fetched from the database in
+# chunks of this many objects.
+HUBUUM_STREAM_CHUNK_SIZE = int(os.environ.get("HUBUUM_STREAM_CHUNK_SIZE", 1000))
+
+# Responses are compressed with the first of HUBUUM_COMPRESSION_ENCODINGS that
+# the client accepts (zstd and br need the zstandard and brotli packages), see
+# hubuum.middleware. Responses below HUBUUM_COMPRESSION_MIN_SIZE bytes are not
+# compressed. HUBUUM_COMPRESSION_LEVELS sets the level per encoding, lower levels
+# use less CPU. Streamed responses are flushed to the client every
+# HUBUUM_COMPRESSION_FLUSH_SIZE bytes of uncompressed content.
+HUBUUM_COMPRESSION_ENCODINGS = os.environ.get(
+    "HUBUUM_COMPRESSION_ENCODINGS", "zstd,br,gzip"
+).split(",")
+HUBUUM_COMPRESSION_MIN_SIZE = int(os.environ.get("HUBUUM_COMPRESSION_MIN_SIZE", 1024))
+HUBUUM_COMPRESSION_FLUSH_SIZE = int(
+    os.environ.get("HUBUUM_COMPRESSION_FLUSH_SIZE", 65536)
+)
+HUBUUM_COMPRESSION_LEVELS = {
+    "zstd": int(os.environ.get("HUBUUM_COMPRESSION_ZSTD_LEVEL", 3)),
+    "br": int(os.environ.get("HUBUUM_COMPRESSION_BR_LEVEL", 4)),
+    "gzip": int(os.environ.get("HUBUUM_COMPRESSION_GZIP_LEVEL", 6)),
+}
+
+# Lists carry an ETag computed with an aggregate query over the filtered list
+# (see hubuum.conditional). Disable to save that query on every list request.
+HUBUUM_LIST_ETAGS = os.environ.get("HUBUUM_LIST_ETAGS", "true").lower() == "true"
+
 AUTHENTICATION_BACKENDS = (
     "django.contrib.auth.backends.ModelBackend",  # this is default
 )
@@ -119,6 +183,43 @@ DATABASES = {
     }
 }
 
+# Caches
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+#
+# The effective namespace permissions of users are cached in the cache named by
+# HUBUUM_PERMISSION_CACHE for HUBUUM_PERMISSION_CACHE_TIMEOUT seconds. Changes to
+# permissions, group memberships, and namespaces invalidate the cached entries.
+# Note that the local-memory backend is per process, use a shared backend (ie,
+# memcached or redis) if you run multiple processes.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "HUBUUM_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("HUBUUM_CACHE_LOCATION", "hubuum"),
+    }
+}
+
+HUBUUM_PERMISSION_CACHE = "default"
+HUBUUM_PERMISSION_CACHE_TIMEOUT = int(
+    os.environ.get("HUBUUM_PERMISSION_CACHE_TIMEOUT", 300)
+)
+
+# The resolution of identifiers (ie, names) to primary keys is cached per process
+# in an LRU cache of at most HUBUUM_IDENTIFIER_CACHE_SIZE entries, each kept for
+# HUBUUM_IDENTIFIER_CACHE_TIMEOUT seconds. Set the size to 0 to disable the cache.
+HUBUUM_IDENTIFIER_CACHE_SIZE = int(os.environ.get("HUBUUM_IDENTIFIER_CACHE_SIZE", 1024))
+HUBUUM_IDENTIFIER_CACHE_TIMEOUT = int(
+    os.environ.get("HUBUUM_IDENTIFIER_CACHE_TIMEOUT", 60)
+)
+
+# Lists are filtered on the ids of the namespaces the user can read, unless there
+# are more than this many of them. Then, a correlated EXISTS is used instead.
+HUBUUM_FILTER_MAX_NAMESPACE_IDS = int(
+    os.environ.get("HUBUUM_FILTER_MAX_NAMESPACE_IDS", 500)
+)
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 